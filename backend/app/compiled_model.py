@@ -0,0 +1,182 @@
+import json
+import os
+import numpy as np
+from model_artifacts import META_FILE
+from scoring import FEATURE_COLUMNS
+
+# Compiled model format: the fitted model reduced to plain arrays and
+# evaluated with NumPy alone, so a serving process never imports xgboost,
+# sklearn, scipy or pandas.
+# - XGBoost (binary:logistic): every tree flattened into one node table
+#   (feature, threshold, left, right, default_left, value) plus the root of
+#   each tree; a batch walks all trees at once, one level per step.
+# - LogisticRegression: [intercept, coef...].
+COMPILED_FILE = "compiled_model.npz"
+LOGISTIC_OBJECTIVES = ("binary:logistic", "reg:logistic")
+# Rows per tree walk: keeps the (rows, trees) node-index arrays cache-sized,
+# about twice as fast on 10k-row batches as walking them all at once
+BLOCK_ROWS = 256
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    # exp(-z) overflows to inf for z < -709, which correctly gives 0
+    with np.errstate(over="ignore"):
+        return 1.0 / (1.0 + np.exp(-z))
+
+class CompiledLinearModel:
+    """Binary logistic regression from its weight vector."""
+
+    kind = "logistic_regression"
+
+    def __init__(self, weights: np.ndarray):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.intercept = float(self.weights[0])
+        self.coef = np.ascontiguousarray(self.weights[1:])
+
+    def arrays(self) -> dict:
+        return {"weights": self.weights}
+
+    def fast_predictor(self):
+        coef, intercept = self.coef, self.intercept
+
+        def predict(X):
+            return _sigmoid(X @ coef + intercept)
+        return predict
+
+    def predict_proba(self, X):
+        p = self.fast_predictor()(np.asarray(X, dtype=np.float64))
+        return np.column_stack([1 - p, p])
+
+class CompiledTreeEnsemble:
+    """
+    Sum of regression trees followed by a sigmoid, evaluated like XGBoost
+    does: features and thresholds compared as float32, x < threshold goes
+    left, NaN follows the node's default direction. Leaves point to
+    themselves, so every row can take max_depth steps in every tree without
+    per-row branching.
+    """
+
+    kind = "tree_ensemble"
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, max_depth: int, base_margin: float):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.base_margin = float(base_margin)
+        # Child lookup as one gather: _children[2 * node + went_left]
+        self._children = np.empty(2 * len(self.left), dtype=np.intp)
+        self._children[0::2] = self.right
+        self._children[1::2] = self.left
+        self._feature = self.feature.astype(np.intp)
+
+    @classmethod
+    def from_xgboost(cls, booster):
+        model = json.loads(booster.save_raw("json"))["learner"]
+        objective = model["objective"]["name"]
+        if objective not in LOGISTIC_OBJECTIVES:
+            raise ValueError(f"Unsupported XGBoost objective for compilation: {objective}")
+        params = model["learner_model_param"]
+        if int(params.get("num_class", "0")) > 1 or int(params.get("num_target", "1")) > 1:
+            raise ValueError("Only single-output XGBoost models can be compiled")
+        base_score = float(params["base_score"].strip("[]"))
+
+        feature, threshold, left, right, default_left, value, roots, max_depth = [], [], [], [], [], [], [], 0
+        for tree in model["gradient_booster"]["model"]["trees"]:
+            if any(tree["split_type"]):
+                raise ValueError("Categorical splits cannot be compiled")
+            offset = len(feature)
+            roots.append(offset)
+            depth = [0] * len(tree["left_children"])
+            stack = [0]
+            while stack:
+                node = stack.pop()
+                l, r = tree["left_children"][node], tree["right_children"][node]
+                if l != -1:
+                    depth[l] = depth[r] = depth[node] + 1
+                    stack += [l, r]
+            for node, (l, r) in enumerate(zip(tree["left_children"], tree["right_children"])):
+                leaf = l == -1
+                feature.append(0 if leaf else tree["split_indices"][node])
+                threshold.append(0.0 if leaf else tree["split_conditions"][node])
+                left.append(offset + (node if leaf else l))
+                right.append(offset + (node if leaf else r))
+                default_left.append(bool(tree["default_left"][node]))
+                value.append(tree["split_conditions"][node] if leaf else 0.0)
+            max_depth = max(max_depth, max(depth))
+        return cls(feature, threshold, left, right, default_left, value, roots, max_depth,
+                   base_margin=np.log(base_score / (1 - base_score)))
+
+    def arrays(self) -> dict:
+        return {
+            "feature": self.feature, "threshold": self.threshold, "left": self.left, "right": self.right,
+            "default_left": self.default_left, "value": self.value, "roots": self.roots,
+            "max_depth": np.array(self.max_depth), "base_margin": np.array(self.base_margin),
+        }
+
+    def margin(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.shape[0] <= BLOCK_ROWS:
+            return self._margin_block(X)
+        return np.concatenate([self._margin_block(X[start:start + BLOCK_ROWS])
+                               for start in range(0, X.shape[0], BLOCK_ROWS)])
+
+    def _margin_block(self, X: np.ndarray) -> np.ndarray:
+        n, n_features = X.shape
+        flat = X.ravel()
+        row_start = (np.arange(n, dtype=np.intp) * n_features)[:, None]
+        nodes = np.broadcast_to(self.roots.astype(np.intp), (n, len(self.roots))).copy()
+        has_nan = bool(np.isnan(flat).any())
+        for _ in range(self.max_depth):
+            x = flat.take(row_start + self._feature.take(nodes))
+            went_left = x < self.threshold.take(nodes)
+            if has_nan:
+                missing = np.isnan(x)
+                went_left[missing] = self.default_left.take(nodes[missing])
+            nodes = self._children.take(2 * nodes + went_left)
+        return self.value.take(nodes).sum(axis=1) + self.base_margin
+
+    def fast_predictor(self):
+        def predict(X):
+            return _sigmoid(self.margin(X))
+        return predict
+
+    def predict_proba(self, X):
+        p = self.fast_predictor()(X)
+        return np.column_stack([1 - p, p])
+
+def compile_model(model):
+    """Compiled equivalent of a fitted XGBClassifier / booster or binary LogisticRegression."""
+    if hasattr(model, "get_booster") or type(model).__name__ == "Booster":
+        return CompiledTreeEnsemble.from_xgboost(model.get_booster() if hasattr(model, "get_booster") else model)
+    if type(model).__name__ in ("LogisticRegression", "SharedLogisticModel") and model.coef_.shape[0] == 1:
+        return CompiledLinearModel(np.concatenate([np.ravel(model.intercept_), np.ravel(model.coef_)]))
+    raise ValueError(f"Unsupported model type for compilation: {type(model).__name__}")
+
+def export_compiled_model(model, out_dir: str) -> str:
+    """Compiles model into out_dir and returns the compiled kind."""
+    compiled = compile_model(model)
+    os.makedirs(out_dir, exist_ok=True)
+    np.savez(os.path.join(out_dir, COMPILED_FILE), **compiled.arrays())
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump({"kind": compiled.kind, "source": type(model).__name__, "features": FEATURE_COLUMNS}, f, indent=2)
+    return compiled.kind
+
+def load_compiled_model(model_dir: str):
+    with open(os.path.join(model_dir, META_FILE)) as f:
+        meta = json.load(f)
+    if meta["features"] != FEATURE_COLUMNS:
+        raise ValueError(f"Model feature order {meta['features']} does not match {FEATURE_COLUMNS}")
+
+    with np.load(os.path.join(model_dir, COMPILED_FILE)) as arrays:
+        if meta["kind"] == CompiledLinearModel.kind:
+            return CompiledLinearModel(arrays["weights"])
+        if meta["kind"] == CompiledTreeEnsemble.kind:
+            return CompiledTreeEnsemble(
+                arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"], arrays["default_left"],
+                arrays["value"], arrays["roots"], int(arrays["max_depth"]), float(arrays["base_margin"]),
+            )
+    raise ValueError(f"Unknown compiled model kind: {meta['kind']}")
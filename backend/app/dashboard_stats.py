@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from sqlalchemy import select, func, delete, insert, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from models import Loan, LoanStatusAggregate
+
+UNKNOWN_STATUS = "Unknown"
+
+def rebuild_aggregates(db: Session):
+    """Recomputes loan_status_aggregates from a full scan of loans."""
+    rows = db.execute(
+        select(Loan.loan_status, func.count(Loan.id), func.coalesce(func.sum(Loan.amount), 0.0))
+        .group_by(Loan.loan_status)
+    ).all()
+    db.execute(delete(LoanStatusAggregate))
+    if rows:
+        db.execute(insert(LoanStatusAggregate), [
+            {"loan_status": status or UNKNOWN_STATUS, "loan_count": count, "total_amount": float(amount)}
+            for status, count, amount in rows
+        ])
+
+def apply_loan_deltas(db: Session, deltas: dict):
+    """
+    Adds {status: (count_delta, amount_delta)} to the aggregates with an upsert.
+    If the aggregates were never built (empty table over a non-empty loans
+    table) they are rebuilt from scratch instead.
+    """
+    if db.execute(select(LoanStatusAggregate.loan_status).limit(1)).first() is None:
+        # The rebuild scans loans, which must include changes still pending in db
+        db.flush()
+        rebuild_aggregates(db)
+        return
+    for status, (count, amount) in deltas.items():
+        stmt = sqlite_insert(LoanStatusAggregate).values(
+            loan_status=status or UNKNOWN_STATUS, loan_count=count, total_amount=amount
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LoanStatusAggregate.loan_status],
+            set_={
+                "loan_count": LoanStatusAggregate.loan_count + stmt.excluded.loan_count,
+                "total_amount": LoanStatusAggregate.total_amount + stmt.excluded.total_amount,
+            },
+        )
+        db.execute(stmt)
+
+def loan_deltas(loans_df) -> dict:
+    """Aggregate deltas for a batch of newly inserted loans (DataFrame with loan_status, amount)."""
+    grouped = loans_df.groupby(loans_df["loan_status"].fillna(UNKNOWN_STATUS))["amount"].agg(["count", "sum"])
+    return {status: (int(row["count"]), float(row["sum"])) for status, row in grouped.iterrows()}
+
+def record_status_change(db: Session, loan: Loan, new_status: str):
+    """
+    Moves a loan to new_status and shifts its amount between the two
+    aggregates. The dashboard cache is invalidated once db commits.
+    """
+    old_status = loan.loan_status
+    if old_status == new_status:
+        return
+    amount = loan.amount or 0.0
+    loan.loan_status = new_status
+    apply_loan_deltas(db, {old_status: (-1, -amount), new_status: (1, amount)})
+    dashboard_cache.invalidate_after_commit(db)
+
+class DashboardStatsCache:
+    """
+    In-process cache of the /dashboard/stats payload. Entries are served for at
+    most max_staleness seconds; a miss reads the few rows of
+    loan_status_aggregates instead of scanning loans. A value read while an
+    invalidation happened is returned but not cached.
+    """
+
+    def __init__(self, max_staleness: float = 30.0):
+        self.max_staleness = max_staleness
+        self.hits = 0
+        self.misses = 0
+        self._value = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._generation += 1
+
+    def invalidate_after_commit(self, db: Session):
+        """Invalidates when db's transaction commits, so no reader can cache the pre-commit aggregates."""
+        event.listen(db, "after_commit", lambda session: self.invalidate(), once=True)
+
+    def get(self, db: Session) -> dict:
+        with self._lock:
+            if self._value is not None and time.monotonic() - self._loaded_at < self.max_staleness:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+            generation = self._generation
+        value = self._load(db)
+        with self._lock:
+            if generation == self._generation:
+                self._value = value
+                self._loaded_at = time.monotonic()
+        return value
+
+    def _load(self, db: Session) -> dict:
+        rows = db.execute(select(
+            LoanStatusAggregate.loan_status, LoanStatusAggregate.loan_count, LoanStatusAggregate.total_amount
+        )).all()
+        if not rows and db.execute(select(Loan.id).limit(1)).first() is not None:
+            rebuild_aggregates(db)
+            db.commit()
+            return self._load(db)
+        status_dist = {status: count for status, count, _ in rows if count}
+        return {
+            "total_loans": sum(count for _, count, _ in rows),
+            "total_volume": sum(amount for _, _, amount in rows) or 0.0,
+            "status_distribution": status_dist
+        }
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "max_staleness_seconds": self.max_staleness,
+        }
+
+dashboard_cache = DashboardStatsCache(float(os.getenv("CREDITPATH_DASHBOARD_MAX_STALENESS", "30")))
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -11,20 +12,118 @@ BACKEND_DIR = os.path.dirname(CURRENT_DIR)
 PROJECT_ROOT = os.path.dirname(BACKEND_DIR)
 
 # Use absolute path for DB to avoid CWD confusion
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(PROJECT_ROOT, 'creditpath.db')}"
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "CREDITPATH_DATABASE_URL", f"sqlite:///{os.path.join(PROJECT_ROOT, 'creditpath.db')}"
+)
 
-print(f"Database URL: {SQLALCHEMY_DATABASE_URL}")
+# Applied to every new SQLite connection. WAL lets readers run alongside a
+# writer, busy_timeout makes a blocked writer wait instead of failing with
+# "database is locked", and mmap/cache keep hot pages out of read() calls.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("CREDITPATH_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("CREDITPATH_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("CREDITPATH_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("CREDITPATH_SQLITE_MMAP_BYTES", str(256 * 1024 * 1024))),
+    # Negative = KiB, i.e. 64 MiB of page cache per connection
+    "cache_size": int(os.getenv("CREDITPATH_SQLITE_CACHE_KIB", str(-64 * 1024))),
+    "temp_store": "MEMORY",
+}
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+DB_POOL_SIZE = int(os.getenv("CREDITPATH_DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("CREDITPATH_DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("CREDITPATH_DB_POOL_TIMEOUT", "30"))
+# "1" serves the read endpoints through an aiosqlite engine (see make_async_engine)
+DB_ASYNC = os.getenv("CREDITPATH_DB_ASYNC", "0") == "1"
+
+def configure_sqlite(engine, pragmas: dict = None):
+    """Runs the PRAGMAs on every connection the engine opens (no-op for other databases)."""
+    if engine.dialect.name != "sqlite":
+        return engine
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+def _pool_args(url) -> dict:
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory databases live and die with their single connection
+        return {}
+    return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+
+def make_engine(url: str = SQLALCHEMY_DATABASE_URL, pragmas: dict = None, **kwargs):
+    """Engine with a sized connection pool and the SQLite PRAGMAs applied on connect."""
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    options = {"connect_args": connect_args, **_pool_args(url), **kwargs}
+    return configure_sqlite(create_engine(url, **options), pragmas)
+
+def make_async_engine(url: str = SQLALCHEMY_DATABASE_URL, pragmas: dict = None, **kwargs):
+    """
+    Async engine for the same database (sqlite+aiosqlite; needs the aiosqlite
+    package). PRAGMAs are applied through the underlying sync engine.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+    if url.startswith("sqlite:"):
+        url = "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    engine = create_async_engine(url, **_pool_args(url), **kwargs)
+    configure_sqlite(engine.sync_engine, pragmas)
+    return engine
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    async_engine = make_async_engine()
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+class QueryCounter:
+    """
+    Records the SQL statements executed while it is active, on one engine or
+    (bind=None) on every engine. Meant for tests and benchmarks that pin the
+    number of queries an endpoint issues:
+
+        with QueryCounter() as queries:
+            client.get("/loans/1")
+        assert queries.count == 1
+    """
+
+    def __init__(self, bind=None):
+        self.target = bind if bind is not None else Engine
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.target, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.target, "before_cursor_execute", self._record)
+        return False
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,184 @@
+import datetime
+import threading
+import numpy as np
+from sqlalchemy.orm import Session
+from models import LoanFeatures
+from risk_scoring import feature_matrix_query
+from scoring import DEFAULT_CHUNK_SIZE, FEATURE_COLUMNS
+
+def _to_arrays(rows):
+    loan_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    X = np.array([row[2:] for row in rows], dtype=np.float64).reshape(len(rows), len(FEATURE_COLUMNS))
+    updated = [row[1] for row in rows if row[1] is not None]
+    return loan_ids, X, max(updated) if updated else None
+
+def read_features(db: Session, loan_ids) -> tuple:
+    """
+    Database path of OnlineFeatureStore.lookup: (X, found) for loan_ids, with
+    X holding the rows of the found ids in request order. One query.
+    """
+    loan_ids = [int(i) for i in loan_ids]
+    rows = db.execute(feature_matrix_query(LoanFeatures.loan_id).where(LoanFeatures.loan_id.in_(set(loan_ids)))).all()
+    by_id = {row[0]: row for row in rows}
+    found = np.array([i in by_id for i in loan_ids], dtype=bool)
+    return _to_arrays([by_id[i] for i in loan_ids if i in by_id])[1], found
+
+class OnlineFeatureStore:
+    """
+    The model inputs of every featured loan, in memory for scoring by loan id:
+    one contiguous (n_loans, n_features) float64 matrix in FEATURE_COLUMNS
+    order plus a dense loan_id -> row index (int32, -1 for unknown ids), about
+    70 bytes per loan.
+
+    load() reads everything; refresh() reads the loan_features rows with
+    updated_at past the watermark, updating rows in place and appending new
+    loans. The watermark trails the read time by overlap_seconds, so rows
+    stamped just before a read but committed after it are picked up by the
+    next refresh (re-reading recent rows once is harmless). Changes to
+    loans/borrowers columns alone do not bump updated_at and only show up
+    after the next load().
+    """
+
+    def __init__(self, session_factory, overlap_seconds: float = 5.0, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.session_factory = session_factory
+        self.overlap = datetime.timedelta(seconds=overlap_seconds)
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.watermark = None
+        self.loaded_at = None
+        self.refreshed_at = None
+        self.refreshes = 0
+        self.last_refresh_rows = 0
+        self.last_error = None
+        self._X = np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float64)
+        self._row_of = np.empty(0, dtype=np.int32)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+
+    def _read(self, since=None) -> tuple:
+        query = feature_matrix_query(LoanFeatures.loan_id)
+        if since is not None:
+            query = query.where(LoanFeatures.updated_at > since)
+        ids_parts, X_parts, last_updated = [], [], None
+        with self.session_factory() as db:
+            result = db.execute(query.execution_options(yield_per=self.chunk_size))
+            for rows in result.partitions():
+                loan_ids, X, updated = _to_arrays(rows)
+                ids_parts.append(loan_ids)
+                X_parts.append(X)
+                if updated is not None and (last_updated is None or updated > last_updated):
+                    last_updated = updated
+        if not ids_parts:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(FEATURE_COLUMNS))), last_updated
+        return np.concatenate(ids_parts), np.concatenate(X_parts), last_updated
+
+    def _next_watermark(self, read_started, updated):
+        if updated is None:
+            return self.watermark
+        watermark = min(updated, read_started - self.overlap)
+        return watermark if self.watermark is None or watermark > self.watermark else self.watermark
+
+    def load(self) -> int:
+        """Replaces the store's contents with a full read. Returns the number of loans."""
+        read_started = datetime.datetime.utcnow()
+        loan_ids, X, updated = self._read()
+        row_of = np.full(int(loan_ids.max()) + 1 if len(loan_ids) else 0, -1, dtype=np.int32)
+        row_of[loan_ids] = np.arange(len(loan_ids), dtype=np.int32)
+        with self._lock:
+            self._X = np.ascontiguousarray(X)
+            self._row_of = row_of
+            self.size = len(loan_ids)
+            self.watermark = None if updated is None else min(updated, read_started - self.overlap)
+            self.loaded_at = self.refreshed_at = datetime.datetime.utcnow()
+        self.last_error = None
+        return self.size
+
+    def refresh(self) -> int:
+        """Applies the feature rows changed since the last load/refresh. Returns the number of rows read."""
+        if not self.ready:
+            return self.load()
+        read_started = datetime.datetime.utcnow()
+        loan_ids, X, updated = self._read(self.watermark)
+        with self._lock:
+            if len(loan_ids):
+                self._apply(loan_ids, X)
+            self.watermark = self._next_watermark(read_started, updated)
+            self.refreshed_at = datetime.datetime.utcnow()
+            self.refreshes += 1
+            self.last_refresh_rows = len(loan_ids)
+        self.last_error = None
+        return len(loan_ids)
+
+    def _apply(self, loan_ids, X):
+        # Caller holds the lock
+        if loan_ids.max() >= len(self._row_of):
+            grown = np.full(max(int(loan_ids.max()) + 1, 2 * len(self._row_of)), -1, dtype=np.int32)
+            grown[:len(self._row_of)] = self._row_of
+            self._row_of = grown
+        rows = self._row_of[loan_ids]
+        new = rows < 0
+        if new.any():
+            n_new = int(new.sum())
+            if self.size + n_new > len(self._X):
+                grown = np.empty((max(self.size + n_new, 2 * len(self._X)), len(FEATURE_COLUMNS)), dtype=np.float64)
+                grown[:self.size] = self._X[:self.size]
+                self._X = grown
+            rows[new] = np.arange(self.size, self.size + n_new)
+            self._row_of[loan_ids[new]] = rows[new]
+            self.size += n_new
+        self._X[rows] = X
+
+    def get(self, loan_id: int):
+        """(1, n_features) copy of one loan's features, or None if the loan is not in the store."""
+        with self._lock:
+            if 0 <= loan_id < len(self._row_of):
+                row = self._row_of[loan_id]
+                if row >= 0:
+                    return self._X[row:row + 1].copy()
+        return None
+
+    def lookup(self, loan_ids) -> tuple:
+        """(X, found): the rows of the found ids in request order and a mask over loan_ids."""
+        loan_ids = np.asarray(loan_ids, dtype=np.int64)
+        rows = np.full(len(loan_ids), -1, dtype=np.int64)
+        with self._lock:
+            valid = (loan_ids >= 0) & (loan_ids < len(self._row_of))
+            rows[valid] = self._row_of[loan_ids[valid]]
+            found = rows >= 0
+            return self._X[rows[found]], found
+
+    def stats(self) -> dict:
+        with self._lock:
+            memory = self._X.nbytes + self._row_of.nbytes
+        return {
+            "loans": self.size,
+            "memory_bytes": memory,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "refreshed_at": self.refreshed_at.isoformat() if self.refreshed_at else None,
+            "refreshes": self.refreshes,
+            "last_refresh_rows": self.last_refresh_rows,
+            "last_error": self.last_error,
+        }
+
+    def start(self, interval: float):
+        """Refreshes every interval seconds in a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="feature-store", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Feature store refresh failed: {e}")
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import tempfile
+import warnings
+import numpy as np
+import pandas as pd
+import joblib
+from scipy.special import expit
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.preprocessing import StandardScaler
+from compiled_model import export_compiled_model
+from model_artifacts import export_shared_model
+from model_registry import current_version, register_model
+from scoring import FEATURE_COLUMNS
+
+# Out-of-core training: the training export is streamed in record batches, so
+# memory is bounded by batch_rows rather than by the size of the export.
+# - xgboost: ExtMemQuantileDMatrix over a DataIter; quantised pages are cached
+#   on disk and boosting can continue from the current booster.
+# - linear: SGDClassifier.partial_fit (log loss) on standardised batches; the
+#   scaling is folded back into a plain LogisticRegression for serving.
+MODEL_PATH = "CreditPathAI/backend/app/artifacts/best_model.pkl"
+SHARED_MODEL_DIR = "CreditPathAI/backend/app/artifacts/shared"
+COMPILED_MODEL_DIR = "CreditPathAI/backend/app/artifacts/compiled"
+TARGET_COLUMN = "default_probability"
+DEFAULT_BATCH_ROWS = 250000
+# Loans with loan_id % HOLDOUT_MODULUS == 0 are held out for evaluation
+HOLDOUT_MODULUS = 10
+
+XGB_PARAMS = {
+    "objective": "binary:logistic",
+    "eval_metric": "logloss",
+    "tree_method": "hist",
+    "max_depth": 5,
+    "learning_rate": 0.1,
+    "max_bin": 256,
+}
+
+def iter_training_batches(path, batch_rows=DEFAULT_BATCH_ROWS, filters=None, holdout=False):
+    """
+    Yields (X, y) numpy batches of at most batch_rows rows from a training export
+    (partitioned Parquet dataset or CSV). Only FEATURE_COLUMNS, the target and
+    loan_id are read. holdout=False yields the training rows, holdout=True the
+    evaluation rows (loan_id % HOLDOUT_MODULUS == 0). `filters` (Parquet only)
+    selects partitions, e.g. [("issue_month", "=", "2024-06")] for one month.
+    """
+    columns = FEATURE_COLUMNS + [TARGET_COLUMN, "loan_id"]
+    if os.path.isdir(path) or path.endswith(".parquet"):
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        expression = pq.filters_to_expression(filters) if filters else None
+        # No read-ahead: one batch in flight keeps memory at ~batch_rows
+        frames = (batch.to_pandas() for batch in dataset.to_batches(
+            columns=columns, filter=expression, batch_size=batch_rows, batch_readahead=0, fragment_readahead=1))
+    elif filters:
+        raise ValueError("Partition filters need the Parquet training export")
+    else:
+        frames = pd.read_csv(path, usecols=columns, chunksize=batch_rows)
+
+    for df in frames:
+        df = df.dropna(subset=FEATURE_COLUMNS + [TARGET_COLUMN])
+        df = df[(df["loan_id"] % HOLDOUT_MODULUS == 0) == holdout]
+        if len(df):
+            yield df[FEATURE_COLUMNS].to_numpy(dtype=np.float64), df[TARGET_COLUMN].to_numpy(dtype=np.int64)
+
+def holdout_auc(path, predict, batch_rows=DEFAULT_BATCH_ROWS, filters=None):
+    """ROC AUC of predict(X) on the streamed holdout rows (None if only one class is present)."""
+    labels, probs = [], []
+    for X, y in iter_training_batches(path, batch_rows, filters, holdout=True):
+        labels.append(y)
+        probs.append(predict(X))
+    if not labels:
+        return None
+    y = np.concatenate(labels)
+    return float(roc_auc_score(y, np.concatenate(probs))) if len(np.unique(y)) == 2 else None
+
+def _batch_iter(path, batch_rows, filters, cache_prefix):
+    import xgboost as xgb
+
+    class TrainingBatchIter(xgb.DataIter):
+        def __init__(self):
+            self._batches = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def reset(self):
+            self._batches = None
+
+        def next(self, input_data):
+            if self._batches is None:
+                self._batches = iter_training_batches(path, batch_rows, filters)
+            batch = next(self._batches, None)
+            if batch is None:
+                return False
+            input_data(data=batch[0], label=batch[1])
+            return True
+
+    return TrainingBatchIter()
+
+def train_xgboost_external(path, init_model=None, num_boost_round=100, batch_rows=DEFAULT_BATCH_ROWS,
+                           filters=None, params=None, cache_dir=None):
+    """
+    Trains an XGBClassifier from the streamed export with external-memory
+    quantised pages. With init_model (any model exposing get_booster) boosting
+    continues from its trees, adding num_boost_round new ones.
+    """
+    import xgboost as xgb
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        dtrain = xgb.ExtMemQuantileDMatrix(
+            _batch_iter(path, batch_rows, filters, os.path.join(tmp, "cache")),
+            max_bin=(params or XGB_PARAMS).get("max_bin", 256),
+        )
+        booster = xgb.train(
+            params or XGB_PARAMS, dtrain, num_boost_round=num_boost_round,
+            xgb_model=init_model.get_booster() if init_model is not None else None,
+        )
+        # Round-trip through the native format to get the sklearn wrapper the
+        # rest of the app (fast predictor, shared export) expects
+        model_file = os.path.join(tmp, "model.ubj")
+        booster.save_model(model_file)
+        model = xgb.XGBClassifier()
+        model.load_model(model_file)
+        # Release the page cache before its directory goes away
+        del dtrain
+    return model
+
+def train_linear_sgd(path, init_model=None, epochs=3, batch_rows=DEFAULT_BATCH_ROWS, filters=None,
+                     alpha=1e-4, eta0=0.01, seed=42):
+    """
+    Streams the export once to fit feature means/scales, then runs `epochs`
+    passes of averaged SGD (log loss) with partial_fit on standardised batches.
+    A LogisticRegression init_model seeds the weights. Returns a
+    LogisticRegression on the raw features (coef / scale folded in).
+    """
+    scaler = StandardScaler()
+    for X, _ in iter_training_batches(path, batch_rows, filters):
+        scaler.partial_fit(X)
+    if not hasattr(scaler, "mean_"):
+        raise ValueError("No training rows found")
+    mean, scale = scaler.mean_, scaler.scale_
+
+    classes = np.array([0, 1])
+    sgd = SGDClassifier(loss="log_loss", alpha=alpha, learning_rate="constant", eta0=eta0,
+                        average=True, random_state=seed, max_iter=1, tol=None)
+    init = None
+    if init_model is not None:
+        # Same decision function in the standardised space
+        coef = np.asarray(init_model.coef_, dtype=np.float64).reshape(1, -1)
+        init = {"coef_init": coef * scale,
+                "intercept_init": np.asarray(init_model.intercept_, dtype=np.float64) + coef @ mean}
+
+    for _ in range(epochs):
+        for X, y in iter_training_batches(path, batch_rows, filters):
+            if init is not None:
+                # partial_fit cannot seed weights; a one-pass fit on the first batch can
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", ConvergenceWarning)
+                    sgd.fit(scaler.transform(X), y, **init)
+                init = None
+            else:
+                sgd.partial_fit(scaler.transform(X), y, classes=classes)
+
+    model = LogisticRegression()
+    model.classes_ = classes
+    model.coef_ = sgd.coef_ / scale
+    model.intercept_ = sgd.intercept_ - model.coef_ @ mean
+    model.n_features_in_ = len(FEATURE_COLUMNS)
+    model.n_iter_ = np.array([epochs])
+    return model
+
+def _predictor(model):
+    if hasattr(model, "get_booster"):
+        booster = model.get_booster()
+        return booster.inplace_predict
+    coef_t, intercept = model.coef_.T, model.intercept_
+    return lambda X: expit((X @ coef_t + intercept).ravel())
+
+def train_incremental(data_path, family="auto", warm_start=True, model_path=MODEL_PATH,
+                      shared_dir=SHARED_MODEL_DIR, batch_rows=DEFAULT_BATCH_ROWS, filters=None,
+                      num_boost_round=100, epochs=3, save=True, registry_dir=None,
+                      compiled_dir=COMPILED_MODEL_DIR):
+    """
+    Out-of-core (re)training from a training export. family is "xgboost",
+    "linear" or "auto" (the family of the model at model_path, xgboost if there
+    is none). With warm_start the current model is updated with the selected
+    data (e.g. filters=[("issue_month", "=", "2024-06")]) instead of refitted
+    from scratch. With registry_dir the result is also registered as a new
+    version (parent = the registry's current version when warm-starting).
+    Saving writes the pickle, the shared export and the compiled export, like
+    train.py. Returns (model, holdout AUC of the selected data).
+    """
+    current = joblib.load(model_path) if os.path.exists(model_path) else None
+    if family == "auto":
+        family = "linear" if current is not None and not hasattr(current, "get_booster") else "xgboost"
+
+    init_model = None
+    if warm_start and current is not None:
+        if (family == "xgboost") != hasattr(current, "get_booster") or (family == "linear" and not hasattr(current, "coef_")):
+            raise ValueError(f"Cannot warm-start {family} from a {type(current).__name__}")
+        init_model = current
+
+    print(f"Training {family} out of core ({'warm start' if init_model is not None else 'from scratch'})...")
+    if family == "xgboost":
+        model = train_xgboost_external(data_path, init_model, num_boost_round, batch_rows, filters)
+    elif family == "linear":
+        model = train_linear_sgd(data_path, init_model, epochs, batch_rows, filters)
+    else:
+        raise ValueError(f"Unknown family: {family}")
+
+    auc = holdout_auc(data_path, _predictor(model), batch_rows, filters)
+    print(f"Holdout AUC: {auc}")
+    if save:
+        os.makedirs(os.path.dirname(model_path), exist_ok=True)
+        joblib.dump(model, model_path)
+        export_shared_model(model, shared_dir)
+        # NumPy-only compiled copy (CREDITPATH_MODEL_FORMAT=compiled)
+        export_compiled_model(model, compiled_dir)
+        if registry_dir is not None:
+            parent = current_version(registry_dir) if init_model is not None else None
+            run = {"data_path": os.path.abspath(data_path), "filters": filters, "parent": parent,
+                   "family": family, "num_boost_round": num_boost_round, "epochs": epochs}
+            version = register_model(
+                model, registry_dir, metrics={"holdout_auc": auc}, parent=parent,
+                training_hash=hashlib.sha256(json.dumps(run, sort_keys=True, default=str).encode()).hexdigest(),
+                params={"family": family, "warm_start": init_model is not None, "filters": filters},
+            )
+            print(f"Model saved and registered as {version}.")
+        else:
+            print("Model saved.")
+    return model, auc
@@ -1,64 +1,249 @@
 import pandas as pd
-from sqlalchemy.orm import Session
-from database import SessionLocal, engine, Base
-from models import Borrower, Loan, Repayment
+import datetime
+import glob
+import io
+import time
+from sqlalchemy import case, func, select, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.schema import CreateIndex, DropIndex
+from database import engine, Base
+from models import Borrower, Loan, Repayment, IngestCheckpoint
+from dashboard_stats import rebuild_aggregates, dashboard_cache
 import os
 import sys
 
-def ingest_data(data_dir="CreditPathAI/data/raw"):
+CSV_CHUNK_SIZE = 100000
+
+# (file pattern, model, natural key, datetime columns), in foreign-key order.
+# Patterns pick up daily delta files such as repayments_2024-06-01.csv next to
+# the full extracts; files of each kind are loaded in name order.
+INGEST_FILES = [
+    ("borrowers*.csv", Borrower, ["id"], []),
+    ("loans*.csv", Loan, ["id"], ["issue_date"]),
+    ("repayments*.csv", Repayment, ["id"], ["payment_date"]),
+]
+
+# Bulk-load tuning, applied for the duration of the load only; the
+# connection's previous values (database.SQLITE_PRAGMAS for pooled
+# connections) are put back afterwards
+BULK_LOAD_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": -200000,
+}
+
+# Same text format SQLAlchemy's SQLite DateTime type stores
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Set to the load time on rows the upsert inserts or changes, for tables
+# that have it (repayments: see features.update_features_incremental)
+STAMP_COLUMN = "updated_at"
+
+# column -> companion column that keeps the column's value from before an
+# update changed it, for tables that have the companion (repayments moved to
+# another loan: see features.update_features_incremental)
+PREVIOUS_VALUE_COLUMNS = {"loan_id": "previous_loan_id"}
+
+def _file_fingerprint(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime
+
+def _get_checkpoint(conn, file_name):
+    return conn.execute(
+        select(IngestCheckpoint).where(IngestCheckpoint.file_name == file_name)
+    ).first()
+
+def _save_checkpoint(conn, file_name, fingerprint, rows, byte_offset, completed=False):
+    values = dict(
+        file_size=fingerprint[0], file_mtime=fingerprint[1], rows_loaded=rows, byte_offset=byte_offset,
+        completed_at=datetime.datetime.utcnow() if completed else None
+    )
+    stmt = sqlite_insert(IngestCheckpoint).values(file_name=file_name, **values)
+    conn.execute(stmt.on_conflict_do_update(index_elements=[IngestCheckpoint.file_name], set_=values))
+
+def _to_rows(chunk, columns, date_columns):
+    """Chunk -> list of tuples in `columns` order, dates pre-formatted, NaN -> None."""
+    chunk = chunk[columns].copy()
+    for col in date_columns:
+        chunk[col] = pd.to_datetime(chunk[col]).dt.strftime(SQLITE_DATETIME_FORMAT)
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    return list(chunk.itertuples(index=False, name=None))
+
+def _upsert_sql(conn, table, columns, key, stamp_column=None):
+    """
+    INSERT ... ON CONFLICT(key) DO UPDATE for the given columns. The update only
+    fires when a value actually differs, so re-delivered rows cost no writes.
+    stamp_column (one of columns) is written on insert and on update but not
+    compared. PREVIOUS_VALUE_COLUMNS companions record the replaced value.
+    """
+    stmt = sqlite_insert(table)
+    changed = [c for c in columns if c not in key and c != stamp_column]
+    if changed:
+        set_ = {c: stmt.excluded[c] for c in changed + ([stamp_column] if stamp_column else [])}
+        for c, previous in PREVIOUS_VALUE_COLUMNS.items():
+            if c in changed and previous in table.c:
+                # The oldest unconsumed value wins, so A -> B -> C still reports A
+                set_[previous] = case(
+                    (table.c[c].is_distinct_from(stmt.excluded[c]), func.coalesce(table.c[previous], table.c[c])),
+                    else_=table.c[previous],
+                )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key,
+            set_=set_,
+            where=or_(*[table.c[c].is_distinct_from(stmt.excluded[c]) for c in changed]),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=key)
+    return str(stmt.compile(dialect=conn.dialect, column_keys=columns))
+
+def read_csv_chunks(csv_path, chunk_size=CSV_CHUNK_SIZE, byte_offset=0):
+    """
+    Yields (DataFrame, end_byte_offset) for chunk_size-line chunks of csv_path,
+    starting at byte_offset (0 = first data row). Rows must not contain
+    embedded newlines.
+    """
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        if byte_offset:
+            f.seek(byte_offset)
+        while True:
+            lines = []
+            for _ in range(chunk_size):
+                line = f.readline()
+                if not line:
+                    break
+                if line.strip():
+                    lines.append(line)
+            if not lines:
+                return
+            yield pd.read_csv(io.BytesIO(header + b"".join(lines))), f.tell()
+
+def load_csv(conn, csv_path, file_name, model, key, date_columns, chunk_size=CSV_CHUNK_SIZE):
+    """
+    Upserts csv_path into model's table chunk by chunk. Every chunk is committed
+    together with the file's checkpoint, so a crash loses at most one chunk and
+    the next run resumes from the last committed byte offset.
+    Returns (rows_read, rows_written).
+    """
+    table = model.__table__
+    fingerprint = _file_fingerprint(csv_path)
+    checkpoint = _get_checkpoint(conn, file_name)
+    rows_read, byte_offset = 0, 0
+    if checkpoint is not None and (checkpoint.file_size, checkpoint.file_mtime) == fingerprint:
+        rows_read, byte_offset = checkpoint.rows_loaded or 0, checkpoint.byte_offset or 0
+        if byte_offset:
+            print(f"Resuming {file_name} at row {rows_read}.")
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    columns = [c.name for c in table.columns if c.name in header and c.name != STAMP_COLUMN]
+    stamp_column = STAMP_COLUMN if STAMP_COLUMN in table.c else None
+    if stamp_column:
+        columns.append(stamp_column)
+        date_columns = date_columns + [stamp_column]
+    sql = _upsert_sql(conn, table, columns, key, stamp_column)
+
+    rows_written = 0
+    for chunk, end_offset in read_csv_chunks(csv_path, chunk_size, byte_offset):
+        if stamp_column:
+            chunk = chunk.assign(**{stamp_column: datetime.datetime.utcnow()})
+        rows_written += conn.exec_driver_sql(sql, _to_rows(chunk, columns, date_columns)).rowcount
+        rows_read += len(chunk)
+        _save_checkpoint(conn, file_name, fingerprint, rows_read, end_offset)
+        conn.commit()
+
+    _save_checkpoint(conn, file_name, fingerprint, rows_read, fingerprint[0], completed=True)
+    conn.commit()
+    return rows_read, rows_written
+
+def _pending_files(conn, data_dir):
+    for pattern, model, key, date_columns in INGEST_FILES:
+        for csv_path in sorted(glob.glob(os.path.join(data_dir, pattern))):
+            file_name = os.path.basename(csv_path)
+            checkpoint = _get_checkpoint(conn, file_name)
+            if (checkpoint is not None and checkpoint.completed_at is not None
+                    and (checkpoint.file_size, checkpoint.file_mtime) == _file_fingerprint(csv_path)):
+                print(f"Skipping {file_name}: already loaded.")
+                continue
+            yield csv_path, file_name, model, key, date_columns
+
+def ingest_data(data_dir="CreditPathAI/data/raw", chunk_size=CSV_CHUNK_SIZE, bind=None):
+    """
+    Loads borrowers, loans and repayments CSVs (full extracts, shards and
+    daily deltas) with upserts on each table's natural key.
+
+    Files are streamed in chunks under SQLite bulk-load PRAGMAs; every chunk
+    commits together with a per-file byte/row checkpoint. Completed, unchanged
+    files are skipped, interrupted files resume after their last committed
+    chunk, and re-delivered rows that did not change are not rewritten.
+    The load strategy is chosen once per table for all of its pending files:
+    secondary indexes of a table that is empty before its first file are
+    dropped, and indexes and dashboard aggregates are (re)built once after
+    the table's last file.
+    """
+    bind = bind or engine
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    
-    db = SessionLocal()
-    
-    try:
-        # Load Borrowers
-        print("Loading Borrowers...")
-        borrowers_df = pd.read_csv(os.path.join(data_dir, "borrowers.csv"))
-        borrowers = [Borrower(**row) for row in borrowers_df.to_dict(orient="records")]
-        db.add_all(borrowers)
-        db.commit()
-        print(f"Loaded {len(borrowers)} borrowers.")
-        
-        # Load Loans
-        print("Loading Loans...")
-        loans_df = pd.read_csv(os.path.join(data_dir, "loans.csv"))
-        # Convert date strings to datetime objects
-        loans_df["issue_date"] = pd.to_datetime(loans_df["issue_date"])
-        loans = [Loan(**row) for row in loans_df.to_dict(orient="records")]
-        db.add_all(loans)
-        db.commit()
-        print(f"Loaded {len(loans)} loans.")
-        
-        # Load Repayments
-        print("Loading Repayments...")
-        repayments_df = pd.read_csv(os.path.join(data_dir, "repayments.csv"))
-        repayments_df["payment_date"] = pd.to_datetime(repayments_df["payment_date"])
-        
-        # Process in chunks if too large
-        chunk_size = 1000
-        total_repayments = 0
-        for i in range(0, len(repayments_df), chunk_size):
-            chunk = repayments_df.iloc[i:i+chunk_size]
-            repayments = [Repayment(**row) for row in chunk.to_dict(orient="records")]
-            db.add_all(repayments)
-            db.commit()
-            total_repayments += len(chunk)
-            
-        print(f"Loaded {total_repayments} repayments.")
-        
-    except Exception as e:
-        print(f"Error during ingestion: {e}")
-        db.rollback()
-    finally:
-        db.close()
+    Base.metadata.create_all(bind=bind)
+
+    stats = {}
+    with bind.connect() as conn:
+        previous_pragmas = {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in BULK_LOAD_PRAGMAS}
+        for name, value in BULK_LOAD_PRAGMAS.items():
+            conn.exec_driver_sql(f"PRAGMA {name}={value}")
+        conn.commit()
+        try:
+            pending = list(_pending_files(conn, data_dir))
+            for _, model, _, _ in INGEST_FILES:
+                files = [f for f in pending if f[2] is model]
+                if not files:
+                    continue
+                table = model.__table__
+                file_name = None
+                try:
+                    if conn.execute(select(table.c.id).limit(1)).first() is None:
+                        for index in table.indexes:
+                            # IF EXISTS rather than checkfirst: reflection skips expression indexes
+                            conn.execute(DropIndex(index, if_exists=True))
+                        conn.commit()
+
+                    for csv_path, file_name, _, key, date_columns in files:
+                        print(f"Loading {file_name}...")
+                        start = time.perf_counter()
+                        rows_read, rows_written = load_csv(conn, csv_path, file_name, model, key, date_columns, chunk_size)
+                        elapsed = time.perf_counter() - start
+                        stats[file_name] = {
+                            "rows": rows_read, "rows_written": rows_written, "seconds": elapsed,
+                            "rows_per_sec": rows_read / elapsed if elapsed else 0.0
+                        }
+                        print(f"Loaded {rows_read} rows ({rows_written} inserted/updated) from {file_name} "
+                              f"in {elapsed:.2f}s ({stats[file_name]['rows_per_sec']:,.0f} rows/sec).")
+
+                    file_name = None
+                    start = time.perf_counter()
+                    if model is Loan:
+                        rebuild_aggregates(conn)
+                    for index in table.indexes:
+                        conn.execute(CreateIndex(index, if_not_exists=True))
+                    conn.commit()
+                    print(f"Built indexes{' and aggregates' if model is Loan else ''} of {table.name} "
+                          f"in {time.perf_counter() - start:.2f}s.")
+                except Exception as e:
+                    conn.rollback()
+                    print(f"Error during ingestion of {file_name or table.name}: {e}")
+                    raise
+        finally:
+            for name, value in previous_pragmas.items():
+                conn.exec_driver_sql(f"PRAGMA {name}={value}")
+            conn.commit()
+            dashboard_cache.invalidate()
+    return stats
 
 if __name__ == "__main__":
     # Adjust path if running from root
     base_path = "C:/Users/saikrishna/Downloads/Desktop/infosys_project"
     data_path = os.path.join(base_path, "CreditPathAI/data/raw")
-    
+
     # Enable running module directly
     sys.path.append(os.path.join(base_path, "CreditPathAI/backend/app"))
-    
+
     ingest_data(data_dir=data_path)
@@ -0,0 +1,299 @@
+import bisect
+import contextvars
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Request and stage instrumentation for the API, exposed in the Prometheus
+# text format by /metrics:
+# - InstrumentationMiddleware: per-route request count and latency histogram,
+#   plus the SQL statements (count and time) each request issued
+# - Metrics.timer(stage): latency histogram of a block of the scoring path
+# - SlowRequestProfiler: opt-in stack sampler that writes folded stacks
+#   (flamegraph.pl / speedscope input) for requests slower than a threshold
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+class RequestStats:
+    """Per-request accumulator; SQLAlchemy hooks add to the one of the current request."""
+
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+_current_request = contextvars.ContextVar("creditpath_request_stats", default=None)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(items):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="{}"'.format("+Inf" if bound == float("inf") else repr(float(bound)))
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+class CounterMetric:
+    def __init__(self, name: str, help_text: str, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(self.label_names, labels)} {value}" for labels, value in items)
+        return lines
+
+class _StageTimer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, stage):
+        self.histogram = histogram
+        self.labels = (stage,)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(self.labels, time.perf_counter() - self.start)
+        return False
+
+class Metrics:
+    """
+    The API's metric registry. Besides its own series, render() appends the
+    samples of registered collectors: callables returning
+    [(name, type, help, {labels tuple: value}, label_names)], used for the
+    stats the caches, batcher and model holder already keep.
+    """
+
+    def __init__(self, prefix: str = "creditpath"):
+        self.requests = CounterMetric(f"{prefix}_http_requests_total", "HTTP requests by route and status.",
+                                      ("method", "route", "status"))
+        self.request_latency = Histogram(f"{prefix}_http_request_duration_seconds",
+                                         "Time until the last response byte was sent.", ("method", "route"))
+        self.stage_latency = Histogram(f"{prefix}_stage_duration_seconds",
+                                       "Time spent in a stage of the scoring path.", ("stage",), STAGE_BUCKETS)
+        self.db_queries = CounterMetric(f"{prefix}_db_queries_total", "SQL statements executed, by route.", ("route",))
+        self.db_seconds = CounterMetric(f"{prefix}_db_query_seconds_total", "Time spent in SQL statements, by route.",
+                                        ("route",))
+        self.db_queries_per_request = Histogram(f"{prefix}_db_queries_per_request", "SQL statements per request.",
+                                                ("route",), QUERY_COUNT_BUCKETS)
+        self.collectors = []
+
+    def timer(self, stage: str) -> _StageTimer:
+        return _StageTimer(self.stage_latency, stage)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        self.requests.inc((method, route, str(status)))
+        self.request_latency.observe((method, route), seconds)
+        self.db_queries_per_request.observe((route,), stats.queries)
+        if stats.queries:
+            self.db_queries.inc((route,), stats.queries)
+            self.db_seconds.inc((route,), stats.query_seconds)
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.requests, self.request_latency, self.stage_latency, self.db_queries,
+                       self.db_seconds, self.db_queries_per_request):
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for name, kind, help_text, values, label_names in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(label_names, labels)} {float(value)}"
+                             for labels, value in values.items())
+        return "\n".join(lines) + "\n"
+
+_hooks_installed = False
+
+def install_sqlalchemy_hooks():
+    """Counts and times every SQL statement of every engine against the current request."""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current_request.get() is not None:
+            conn.info.setdefault("creditpath_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_request.get()
+        starts = conn.info.get("creditpath_query_start")
+        if stats is not None and starts:
+            stats.queries += 1
+            stats.query_seconds += time.perf_counter() - starts.pop()
+
+class SlowRequestProfiler:
+    """
+    While requests are in flight a sampler thread records the Python stacks
+    of all other threads every interval_ms. A request that takes longer than
+    threshold_ms gets the stacks sampled during its lifetime written to
+    output_dir as folded stacks ("frame;frame;frame count" lines). Samples are
+    process-wide, so under load they include concurrent requests as well.
+    """
+
+    def __init__(self, threshold_ms: float, output_dir: str, interval_ms: float = 5.0, max_dumps: int = 100):
+        self.threshold = threshold_ms / 1000
+        self.output_dir = output_dir
+        self.interval = interval_ms / 1000
+        self.max_dumps = max_dumps
+        self.dumps = 0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def begin(self) -> Counter:
+        samples = Counter()
+        with self._lock:
+            self._active[id(samples)] = samples
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return samples
+
+    def end(self, samples: Counter, method: str, route: str, seconds: float):
+        with self._lock:
+            self._active.pop(id(samples), None)
+            if not self._active:
+                self._wake.clear()
+            if seconds < self.threshold or not samples or self.dumps >= self.max_dumps:
+                return None
+            self.dumps += 1
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", f"{method}{route}").strip("_")
+        path = os.path.join(self.output_dir, f"{time.time_ns()}_{name}_{seconds * 1000:.0f}ms.folded")
+        with open(path, "w") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in samples.most_common())
+        return path
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while True:
+            self._wake.wait()
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stacks.append(";".join([names.get(ident, str(ident))] + frames[::-1]))
+            with self._lock:
+                for samples in self._active.values():
+                    samples.update(stacks)
+            time.sleep(self.interval)
+
+class InstrumentationMiddleware:
+    """
+    Pure ASGI middleware: labels each HTTP request with its route template
+    (e.g. /loans/{loan_id}; "unmatched" for 404s), records it in `metrics`
+    once the last body chunk has been sent (background tasks excluded) and
+    hands it to the optional slow-request profiler.
+    """
+
+    def __init__(self, app, metrics: Metrics, profiler: SlowRequestProfiler = None):
+        self.app = app
+        self.metrics = metrics
+        self.profiler = profiler
+        self._route_paths = None
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._route_paths is None:
+            self._route_paths = {}
+            for route in getattr(scope.get("app"), "routes", []):
+                self._route_paths.setdefault(getattr(route, "endpoint", None) or getattr(route, "app", None),
+                                             route.path)
+        return self._route_paths.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        samples = self.profiler.begin() if self.profiler is not None else None
+        status = 500
+        start = time.perf_counter()
+        finished = None
+
+        async def send_wrapper(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            seconds = (finished or time.perf_counter()) - start
+            route = self._route(scope)
+            self.metrics.observe_request(scope["method"], route, status, seconds, stats)
+            if samples is not None:
+                self.profiler.end(samples, scope["method"], route, seconds)
@@ -1,16 +1,30 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Header, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-import pandas as pd
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional
 import numpy as np
 import joblib
+import json
 import os
-from database import SessionLocal, get_db
-from models import Borrower, Loan
+import secrets
+import time
+from database import SessionLocal, async_engine, get_async_db, get_db
+from models import NULL_CREDIT_SCORE, Borrower, Loan, LoanFeatures
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, literal_column, select, tuple_
 from recommendations import RecommendationEngine
+from batching import MicroBatcher
+from compiled_model import load_compiled_model
+from model_artifacts import load_shared_model
+from model_registry import LoadedModel, ModelHolder, ModelWatcher, current_version, list_versions, set_current
+from dashboard_stats import dashboard_cache, record_status_change
+from feature_store import OnlineFeatureStore, read_features
+from instrumentation import InstrumentationMiddleware, Metrics, SlowRequestProfiler, install_sqlalchemy_hooks
+from prediction_cache import PredictionCache
+from scoring import DEFAULT_CHUNK_SIZE, FEATURE_COLUMNS, rows_to_matrix, request_to_vector, score_matrix
 
 app = FastAPI(title="CreditPathAI API", version="1.0.0")
 
@@ -23,6 +37,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, per-stage timers and SQL counts, served by /metrics.
+# CREDITPATH_PROFILE_SLOW_MS enables the sampling profiler: requests slower
+# than that many ms leave a folded-stack file in CREDITPATH_PROFILE_DIR.
+metrics = Metrics()
+install_sqlalchemy_hooks()
+PROFILE_SLOW_MS = os.getenv("CREDITPATH_PROFILE_SLOW_MS")
+PROFILE_DIR = os.getenv("CREDITPATH_PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts/profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv("CREDITPATH_PROFILE_INTERVAL_MS", "5"))
+slow_request_profiler = None
+if PROFILE_SLOW_MS:
+    slow_request_profiler = SlowRequestProfiler(float(PROFILE_SLOW_MS), PROFILE_DIR, PROFILE_INTERVAL_MS)
+app.add_middleware(InstrumentationMiddleware, metrics=metrics, profiler=slow_request_profiler)
+
 # Serve Frontend
 current_dir = os.path.dirname(os.path.abspath(__file__))
 frontend_dir = os.path.join(current_dir, "../../frontend")
@@ -36,16 +63,95 @@ else:
 MODEL_PATH = "artifacts/best_model.pkl" 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_FULL_PATH = os.path.join(BASE_DIR, MODEL_PATH)
+SHARED_MODEL_DIR = os.path.join(BASE_DIR, "artifacts/shared")
+COMPILED_MODEL_DIR = os.path.join(BASE_DIR, "artifacts/compiled")
+REGISTRY_DIR = os.getenv("CREDITPATH_MODEL_REGISTRY", os.path.join(BASE_DIR, "artifacts/registry"))
+
+# "pickle" (default) unpickles the model in every worker; "shared" loads the
+# pickle-free export (see model_artifacts.py / serve.py); "compiled" the
+# NumPy-only export, which needs neither xgboost nor sklearn (compiled_model.py)
+MODEL_FORMAT = os.getenv("CREDITPATH_MODEL_FORMAT", "pickle")
+# Seconds between checks of the registry's CURRENT pointer; 0 disables the watch
+MODEL_WATCH_SECONDS = float(os.getenv("CREDITPATH_MODEL_WATCH_SECONDS", "0"))
+# /admin endpoints require a matching X-Admin-Token header; without a token
+# configured they are refused altogether
+ADMIN_TOKEN = os.getenv("CREDITPATH_ADMIN_TOKEN")
 
+# The serving model lives in model_holder and can be swapped at runtime
+# (see model_registry.py). Without a registry the unversioned artifact is used.
+model_holder = ModelHolder(REGISTRY_DIR, MODEL_FORMAT)
 try:
-    model = joblib.load(MODEL_FULL_PATH)
-    print(f"Model loaded from {MODEL_FULL_PATH}")
+    if current_version(REGISTRY_DIR):
+        loaded = model_holder.load()
+        print(f"Model {loaded.version} loaded from {REGISTRY_DIR}")
+    elif MODEL_FORMAT == "shared":
+        model_holder.swap(LoadedModel("unversioned", load_shared_model(SHARED_MODEL_DIR), {"source": SHARED_MODEL_DIR}))
+        print(f"Shared model loaded from {SHARED_MODEL_DIR}")
+    elif MODEL_FORMAT == "compiled":
+        model_holder.swap(LoadedModel("unversioned", load_compiled_model(COMPILED_MODEL_DIR), {"source": COMPILED_MODEL_DIR}))
+        print(f"Compiled model loaded from {COMPILED_MODEL_DIR}")
+    else:
+        model_holder.swap(LoadedModel("unversioned", joblib.load(MODEL_FULL_PATH), {"source": MODEL_FULL_PATH}))
+        print(f"Model loaded from {MODEL_FULL_PATH}")
 except Exception as e:
     print(f"Failed to load model: {e}")
-    model = None
+    model_holder.last_error = str(e)
+
+model_watcher = None
+if MODEL_WATCH_SECONDS > 0:
+    model_watcher = ModelWatcher(model_holder, MODEL_WATCH_SECONDS)
+    model_watcher.start()
+
+def current_predict(X):
+    """Native single/batch predictor of the serving model (identical scores to model.predict_proba)."""
+    return model_holder.current.predict(X)
+
+def current_fast_path() -> bool:
+    """Whether current_predict is a native fast path, cheap enough for the event loop."""
+    return model_holder.current.fast_path
+
+# Optional micro-batching of concurrent /predict calls
+MICROBATCH_ENABLED = os.getenv("CREDITPATH_MICROBATCH", "0") == "1"
+MICROBATCH_MAX_ROWS = int(os.getenv("CREDITPATH_MICROBATCH_MAX_ROWS", "64"))
+MICROBATCH_WAIT_MS = float(os.getenv("CREDITPATH_MICROBATCH_WAIT_MS", "2"))
+
+micro_batcher = None
+if MICROBATCH_ENABLED and model_holder.current is not None:
+    micro_batcher = MicroBatcher(current_predict, max_batch_size=MICROBATCH_MAX_ROWS, max_wait_ms=MICROBATCH_WAIT_MS,
+                                 inline=current_fast_path)
 
 rec_engine = RecommendationEngine()
 
+# Response cache for repeated /predict calls; size 0 disables it.
+# CREDITPATH_PREDICTION_CACHE_DECIMALS rounds the features of the key so that
+# near-identical requests share an entry (default: exact values).
+PREDICTION_CACHE_SIZE = int(os.getenv("CREDITPATH_PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("CREDITPATH_PREDICTION_CACHE_TTL", "300"))
+_cache_decimals = os.getenv("CREDITPATH_PREDICTION_CACHE_DECIMALS")
+PREDICTION_CACHE_DECIMALS = int(_cache_decimals) if _cache_decimals else None
+
+# Entries belong to one model version and are dropped on a swap. /recommend
+# is not cached: segmenting a probability is cheaper than a cache lookup.
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, PREDICTION_CACHE_DECIMALS)
+
+# Online feature store behind /loans/{loan_id}/risk: the model inputs of every
+# featured loan in memory (see feature_store.py), refreshed from
+# loan_features.updated_at every CREDITPATH_FEATURE_STORE_REFRESH_SECONDS
+# (0: never). Disabled, the risk endpoints read the features per request.
+FEATURE_STORE_ENABLED = os.getenv("CREDITPATH_FEATURE_STORE", "0") == "1"
+FEATURE_STORE_REFRESH_SECONDS = float(os.getenv("CREDITPATH_FEATURE_STORE_REFRESH_SECONDS", "30"))
+
+feature_store = None
+if FEATURE_STORE_ENABLED:
+    feature_store = OnlineFeatureStore(SessionLocal)
+    try:
+        print(f"Feature store loaded {feature_store.load()} loans")
+    except Exception as e:
+        print(f"Failed to load feature store: {e}")
+        feature_store.last_error = str(e)
+    if FEATURE_STORE_REFRESH_SECONDS > 0:
+        feature_store.start(FEATURE_STORE_REFRESH_SECONDS)
+
 class PredictionRequest(BaseModel):
     repayment_velocity: float
     credit_utilization_ratio: float
@@ -59,81 +165,481 @@ class PredictionRequest(BaseModel):
 class RecommendationRequest(BaseModel):
     default_probability: float
 
+class LoanRiskRequest(BaseModel):
+    loan_ids: List[int]
+
+class LoanStatusUpdate(BaseModel):
+    loan_status: str
+
 from fastapi.responses import RedirectResponse
 
 @app.get("/")
 def read_root():
     return RedirectResponse(url="/app/index.html")
 
-@app.post("/predict")
-def predict_risk(request: PredictionRequest):
-    if not model:
+def require_model() -> LoadedModel:
+    # One read per request: a concurrent swap cannot change the model mid-request
+    loaded = model_holder.current
+    if loaded is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
-    
-    data = pd.DataFrame([request.dict()])
-    
-    features = [
-        "repayment_velocity", "credit_utilization_ratio", 
-        "delinquency_freq", "payment_consistency_score", 
-        "amount", "interest_rate", "annual_income", "credit_score"
-    ]
-    
+    return loaded
+
+def _scores_inline(loaded: Optional[LoadedModel], X) -> bool:
+    # A native fast path scores one row in microseconds, cheaper on the loop
+    # than a threadpool hop; predict_proba fallbacks (e.g. LightGBM) and
+    # batches would block every other request
+    return loaded is not None and loaded.fast_path and len(X) == 1
+
+async def _predict(loaded: LoadedModel, X) -> np.ndarray:
+    if _scores_inline(loaded, X):
+        return loaded.predict(X)
+    return await run_in_threadpool(loaded.predict, X)
+
+async def _run_shadow(X, probs, primary_ms: float):
+    if _scores_inline(model_holder.shadow, X):
+        model_holder.run_shadow(X, probs, primary_ms)
+    else:
+        await run_in_threadpool(model_holder.run_shadow, X, probs, primary_ms)
+
+def _queue_shadow(background_tasks: Optional[BackgroundTasks], X, probs, primary_ms: float):
+    # Shadow scoring runs after the response has been sent
+    if background_tasks is not None and model_holder.shadow_due():
+        background_tasks.add_task(_run_shadow, X, probs, primary_ms)
+
+@app.post("/predict")
+async def predict_risk(request: PredictionRequest, background_tasks: BackgroundTasks):
+    loaded = require_model()
+    cache_key = None
+    if prediction_cache.enabled:
+        with metrics.timer("cache_lookup"):
+            cache_key = prediction_cache.key("predict", [getattr(request, c) for c in FEATURE_COLUMNS])
+            cached = prediction_cache.get(cache_key, loaded.version)
+        if cached is not None:
+            return cached
+
     try:
-        X = data[features]
-        prob = model.predict_proba(X)[0][1] 
-        rec = rec_engine.get_recommendation(prob)
+        if micro_batcher is not None:
+            with metrics.timer("microbatch_wait"):
+                prob = await micro_batcher.submit(rows_to_matrix([request])[0])
+        else:
+            with metrics.timer("vectorize"):
+                X = request_to_vector(request)
+                inline = _scores_inline(loaded, X)
+                if not inline:
+                    # The per-thread buffer is refilled by requests handled while this one awaits
+                    X = X.copy()
+            with metrics.timer("model") as timer:
+                prob = float((await _predict(loaded, X))[0])
+            _queue_shadow(background_tasks, X.copy() if inline else X, [prob], (time.perf_counter() - timer.start) * 1000)
+        with metrics.timer("recommend"):
+            rec = rec_engine.get_recommendation(prob)
+        if cache_key is not None:
+            prediction_cache.put(cache_key, rec, loaded.version)
         return rec
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/recommend")
-def recommend_action(request: RecommendationRequest):
-    return rec_engine.get_recommendation(request.default_probability)
+def score_rows(rows, loaded: LoadedModel, background_tasks: Optional[BackgroundTasks] = None) -> list:
+    with metrics.timer("batch_vectorize"):
+        X = rows_to_matrix(rows)
+    return score_features(X, loaded, background_tasks)
 
-@app.get("/loans/{loan_id}")
-def get_loan_details(loan_id: int, db: Session = Depends(get_db)):
-    loan = db.query(Loan).filter(Loan.id == loan_id).first()
-    if not loan:
-        raise HTTPException(status_code=404, detail="Loan not found")
+def score_features(X: np.ndarray, loaded: LoadedModel, background_tasks: Optional[BackgroundTasks] = None) -> list:
+    with metrics.timer("batch_model") as timer:
+        probs = score_matrix(loaded.predict, X, chunk_size=DEFAULT_CHUNK_SIZE)
+    _queue_shadow(background_tasks, X, probs, (time.perf_counter() - timer.start) * 1000)
+    with metrics.timer("batch_recommend"):
+        return rec_engine.get_recommendations(probs)
+
+@app.post("/predict/batch")
+def predict_risk_batch(requests: List[PredictionRequest], background_tasks: BackgroundTasks):
+    """
+    Scores a JSON array of feature rows with one vectorized model call per chunk.
+    """
+    loaded = require_model()
+    try:
+        return score_rows(requests, loaded, background_tasks)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict/batch/ndjson")
+async def predict_risk_batch_ndjson(request: Request):
+    """
+    NDJSON variant: reads newline-delimited JSON rows from the request stream and
+    scores them every DEFAULT_CHUNK_SIZE rows as they arrive, so parsing and
+    inference overlap with the upload. Returns one NDJSON result per input line;
+    invalid lines produce an {"line": n, "error": ...} entry instead of a score.
+    """
+    loaded = require_model()
+
+    def flush(entries):
+        valid = [row for row in entries if isinstance(row, PredictionRequest)]
+        recs = iter(score_rows(valid, loaded)) if valid else iter(())
+        out = []
+        for row in entries:
+            out.append(next(recs) if isinstance(row, PredictionRequest) else row)
+        return "".join(json.dumps(item) + "\n" for item in out)
+
+    def parse(line, line_no):
+        try:
+            return PredictionRequest(**json.loads(line))
+        except (ValueError, TypeError, ValidationError) as e:
+            return {"line": line_no, "error": str(e)}
+
+    parts = []
+    buffer = b""
+    entries = []
+    line_no = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                entries.append(parse(line, line_no))
+            if len(entries) >= DEFAULT_CHUNK_SIZE:
+                parts.append(await run_in_threadpool(flush, entries))
+                entries = []
+    if buffer.strip():
+        entries.append(parse(buffer, line_no + 1))
+    if entries:
+        parts.append(await run_in_threadpool(flush, entries))
+
+    return Response(content="".join(parts), media_type="application/x-ndjson")
+
+def _app_metrics() -> list:
+    """Stats kept by the caches, model holder and batcher, as metric samples for /metrics."""
+    stats = prediction_cache.stats()
+    cache_events = {("predict", event): stats[event]
+                    for event in ("hits", "misses", "evictions", "expirations", "invalidations")}
+    cache_entries = {("predict",): stats["size"]}
+    dashboard = dashboard_cache.stats()
+    samples = [
+        ("creditpath_prediction_cache_events_total", "counter", "Prediction cache events.", cache_events,
+         ("cache", "event")),
+        ("creditpath_prediction_cache_entries", "gauge", "Entries in the prediction cache.", cache_entries, ("cache",)),
+        ("creditpath_dashboard_cache_requests_total", "counter", "Dashboard stats cache lookups.",
+         {("hit",): dashboard["hits"], ("miss",): dashboard["misses"]}, ("result",)),
+        ("creditpath_model_swaps_total", "counter", "Serving model swaps.", {(): model_holder.swaps}, ()),
+    ]
+    if feature_store is not None:
+        store = feature_store.stats()
+        samples.append(("creditpath_feature_store_loans", "gauge", "Loans held by the online feature store.",
+                        {(): store["loans"]}, ()))
+        samples.append(("creditpath_feature_store_refreshes_total", "counter", "Incremental feature store refreshes.",
+                        {(): store["refreshes"]}, ()))
+    if micro_batcher is not None:
+        batcher = micro_batcher.stats()
+        samples.append(("creditpath_microbatch_batches_total", "counter", "Micro-batches scored.",
+                        {(): batcher["batches_total"]}, ()))
+        samples.append(("creditpath_microbatch_rows_total", "counter", "Rows scored through the micro-batcher.",
+                        {(): batcher["rows_total"]}, ()))
+    return samples
+
+metrics.collectors.append(_app_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of the request, stage, SQL and cache metrics."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/predict/batcher/stats")
+def get_batcher_stats():
+    if micro_batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **micro_batcher.stats()}
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (CREDITPATH_ADMIN_TOKEN is not set)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/model", dependencies=[Depends(require_admin)])
+def get_model_info():
+    return model_holder.info()
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+def get_model_versions():
+    return list_versions(REGISTRY_DIR)
+
+@app.post("/admin/model/reload", dependencies=[Depends(require_admin)])
+async def reload_model(version: Optional[str] = None, activate: bool = False):
+    """
+    Loads `version` (default: the registry's CURRENT) in a worker thread and
+    swaps it in; requests keep being served by the old model until the swap.
+    activate=true then also points CURRENT at it, so other workers with a model
+    watch follow; a version that fails to load never becomes CURRENT.
+    """
+    try:
+        loaded = await run_in_threadpool(model_holder.load, version)
+        if activate and version:
+            set_current(REGISTRY_DIR, version)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Model reload failed: {e}")
+    return loaded.info()
+
+@app.post("/admin/model/shadow", dependencies=[Depends(require_admin)])
+async def start_shadow(version: str, sample_rate: float = 1.0):
+    """Scores a sample of live /predict and /predict/batch traffic with `version` as well."""
+    if not 0 < sample_rate <= 1:
+        raise HTTPException(status_code=400, detail="sample_rate must be in (0, 1]")
+    try:
+        loaded = await run_in_threadpool(model_holder.set_shadow, version, sample_rate)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Shadow model load failed: {e}")
+    return loaded.info()
+
+@app.get("/admin/model/shadow", dependencies=[Depends(require_admin)])
+def get_shadow_stats():
+    shadow = model_holder.shadow
     return {
-        "id": loan.id,
-        "amount": loan.amount,
-        "status": loan.loan_status,
-        "borrower": loan.borrower.full_name
+        "shadow": shadow.info() if shadow else None,
+        "primary": model_holder.current.version if model_holder.current else None,
+        **model_holder.shadow_stats.snapshot(),
     }
 
+@app.delete("/admin/model/shadow", dependencies=[Depends(require_admin)])
+def stop_shadow():
+    model_holder.set_shadow(None)
+    return {"shadow": None}
+
+@app.get("/predict/cache/stats")
+def get_prediction_cache_stats():
+    return {"predict": prediction_cache.stats()}
+
+@app.delete("/predict/cache", dependencies=[Depends(require_admin)])
+def clear_prediction_cache():
+    prediction_cache.invalidate()
+    return {"predict": prediction_cache.stats()}
+
+@app.post("/recommend")
+def recommend_action(request: RecommendationRequest):
+    return rec_engine.get_recommendation(request.default_probability)
+
 @app.get("/dashboard/stats")
 def get_dashboard_stats(db: Session = Depends(get_db)):
-    total_loans = db.query(Loan).count()
-    total_volume = db.query(Loan).with_entities(func.sum(Loan.amount)).scalar() or 0.0
-    status_counts = db.query(Loan.loan_status, func.count(Loan.loan_status)).group_by(Loan.loan_status).all()
-    status_dist = {s: c for s, c in status_counts}
-    
-    return {
-        "total_loans": total_loans,
-        "total_volume": total_volume,
-        "status_distribution": status_dist
-    }
+    # Served from loan_status_aggregates through a TTL cache (see dashboard_stats.py)
+    return dashboard_cache.get(db)
 
-@app.get("/borrowers")
-def get_borrowers(skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
+@app.get("/dashboard/stats/cache")
+def get_dashboard_cache_stats():
+    return dashboard_cache.stats()
+
+BORROWER_SORTS = ("id", "credit_score")
+
+def _parse_cursor(cursor: str, sort: str) -> tuple:
     try:
-        loans = db.query(Loan).join(Borrower).offset(skip).limit(limit).all()
-        results = []
-        for loan in loans:
-            results.append({
-                "id": int(loan.borrower.id),
-                "name": str(loan.borrower.full_name),
-                "loan_amount": float(loan.amount) if loan.amount is not None else 0.0,
-                "status": str(loan.loan_status),
-                "credit_score": int(loan.borrower.credit_score) if loan.borrower.credit_score is not None else 0,
-                "risk_segment": "Calculated on-demand"
-            })
-        return results
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+        values = tuple(int(v) for v in cursor.split(":"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != (1 if sort == "id" else 3):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def _borrowers_query(cursor, sort, status, min_credit_score, max_credit_score, risk_segment, skip, limit):
+    if sort not in BORROWER_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {BORROWER_SORTS}")
+    query = (
+        select(
+            Loan.id, Borrower.id, Borrower.full_name, Loan.amount, Loan.loan_status,
+            Borrower.credit_score, LoanFeatures.risk_segment, LoanFeatures.default_probability
+        )
+        .join(Borrower, Borrower.id == Loan.borrower_id)
+        .outerjoin(LoanFeatures, LoanFeatures.loan_id == Loan.id)
+    )
+    if status is not None:
+        query = query.where(Loan.loan_status == status)
+    if min_credit_score is not None:
+        query = query.where(Borrower.credit_score >= min_credit_score)
+    if max_credit_score is not None:
+        query = query.where(Borrower.credit_score <= max_credit_score)
+    if risk_segment is not None:
+        query = query.where(LoanFeatures.risk_segment == risk_segment)
+
+    if sort == "id":
+        if cursor is not None:
+            query = query.where(Loan.id > _parse_cursor(cursor, sort)[0])
+        query = query.order_by(Loan.id)
+    else:
+        # Same expression as ix_borrowers_credit_score_id (a bound sentinel would not match it);
+        # the leading >= gives SQLite a range to seek, the row value alone is only filtered
+        score = func.coalesce(Borrower.credit_score, literal_column(str(NULL_CREDIT_SCORE)))
+        if cursor is not None:
+            values = _parse_cursor(cursor, sort)
+            query = query.where(score >= values[0], tuple_(score, Borrower.id, Loan.id) > values)
+        query = query.order_by(score, Borrower.id, Loan.id)
+
+    if cursor is None and skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def _borrowers_page(rows, response: Response, sort: str, limit: int) -> list:
+    results = []
+    for loan_id, borrower_id, full_name, amount, loan_status, credit_score, segment, probability in rows:
+        results.append({
+            "id": int(borrower_id),
+            "loan_id": int(loan_id),
+            "name": str(full_name),
+            "loan_amount": float(amount) if amount is not None else 0.0,
+            "status": str(loan_status),
+            "credit_score": int(credit_score) if credit_score is not None else 0,
+            # Precomputed by the risk_scoring job
+            "risk_segment": segment or "Not scored",
+            "default_probability": probability
+        })
+
+    if len(rows) == limit and rows:
+        last = rows[-1]
+        score = last[5] if last[5] is not None else NULL_CREDIT_SCORE
+        next_cursor = str(last[0]) if sort == "id" else f"{score}:{last[1]}:{last[0]}"
+        response.headers["X-Next-Cursor"] = next_cursor
+    return results
+
+def _loan_details_query(loan_id: int):
+    # One joined row instead of loading the Loan and lazy-loading its borrower
+    return (
+        select(Loan.id, Loan.amount, Loan.loan_status, Borrower.full_name)
+        .join(Borrower, Borrower.id == Loan.borrower_id)
+        .where(Loan.id == loan_id)
+    )
+
+def _loan_details(row) -> dict:
+    if row is None:
+        raise HTTPException(status_code=404, detail="Loan not found")
+    loan_id, amount, loan_status, full_name = row
+    return {"id": loan_id, "amount": amount, "status": loan_status, "borrower": full_name}
+
+def _read_loan_features(loan_ids) -> tuple:
+    with SessionLocal() as db:
+        return read_features(db, loan_ids)
+
+async def _loan_features(loan_ids) -> tuple:
+    # Served from memory once the store is loaded; the database otherwise
+    if feature_store is not None and feature_store.ready:
+        with metrics.timer("feature_lookup"):
+            return feature_store.lookup(loan_ids)
+    return await run_in_threadpool(_read_loan_features, loan_ids)
+
+@app.get("/loans/{loan_id}/risk")
+async def get_loan_risk(loan_id: int, background_tasks: BackgroundTasks):
+    """Scores an existing loan from its stored features; no request payload needed."""
+    loaded = require_model()
+    if feature_store is not None and feature_store.ready:
+        with metrics.timer("feature_lookup"):
+            X = feature_store.get(loan_id)
+    else:
+        X, found = await run_in_threadpool(_read_loan_features, [loan_id])
+        X = X if found[0] else None
+    if X is None:
+        raise HTTPException(status_code=404, detail="Loan features not found")
+    with metrics.timer("model") as timer:
+        prob = float((await _predict(loaded, X))[0])
+    _queue_shadow(background_tasks, X, [prob], (time.perf_counter() - timer.start) * 1000)
+    with metrics.timer("recommend"):
+        return {"loan_id": loan_id, **rec_engine.get_recommendation(prob)}
+
+@app.post("/loans/risk")
+async def get_loans_risk(request: LoanRiskRequest, background_tasks: BackgroundTasks):
+    """
+    Bulk variant of /loans/{loan_id}/risk: one result per requested id, in
+    order; ids without features get {"loan_id": id, "error": ...} instead.
+    """
+    loaded = require_model()
+    X, found = await _loan_features(request.loan_ids)
+    recs = iter(await run_in_threadpool(score_features, X, loaded, background_tasks) if len(X) else ())
+    results = [
+        {"loan_id": loan_id, **next(recs)} if hit else {"loan_id": loan_id, "error": "Loan features not found"}
+        for loan_id, hit in zip(request.loan_ids, found.tolist())
+    ]
+    # Plain JSON types already: json.dumps is several times faster than the
+    # default response encoding for thousands of results
+    return Response(content=json.dumps(results), media_type="application/json")
+
+@app.put("/admin/loans/{loan_id}/status", dependencies=[Depends(require_admin)])
+def update_loan_status(loan_id: int, update: LoanStatusUpdate, db: Session = Depends(get_db)):
+    """Moves a loan to a new status; the dashboard aggregates follow in the same transaction."""
+    loan = db.get(Loan, loan_id)
+    if loan is None:
+        raise HTTPException(status_code=404, detail="Loan not found")
+    record_status_change(db, loan, update.loan_status)
+    db.commit()
+    return {"id": loan.id, "status": loan.loan_status}
+
+@app.get("/feature-store/stats")
+def get_feature_store_stats():
+    if feature_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **feature_store.stats()}
+
+@app.post("/admin/feature-store/reload", dependencies=[Depends(require_admin)])
+def reload_feature_store():
+    """Full reload, e.g. after loans/borrowers columns changed (those do not bump updated_at)."""
+    if feature_store is None:
+        raise HTTPException(status_code=409, detail="Feature store is disabled")
+    return {"loans": feature_store.load()}
+
+if async_engine is None:
+    @app.get("/loans/{loan_id}")
+    def get_loan_details(loan_id: int, db: Session = Depends(get_db)):
+        return _loan_details(db.execute(_loan_details_query(loan_id)).first())
+
+    @app.get("/borrowers")
+    def get_borrowers(
+        response: Response,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        sort: str = "id",
+        status: Optional[str] = None,
+        min_credit_score: Optional[int] = None,
+        max_credit_score: Optional[int] = None,
+        risk_segment: Optional[str] = None,
+        db: Session = Depends(get_db)
+    ):
+        """
+        Keyset-paginated loan/borrower listing. Pass the X-Next-Cursor header of the
+        previous page as ?cursor= to fetch the next one; page cost does not grow with
+        depth. sort=id orders by loan id, sort=credit_score by (credit score, borrower
+        id, loan id). skip is still honoured for callers without a cursor.
+        """
+        query = _borrowers_query(cursor, sort, status, min_credit_score, max_credit_score, risk_segment, skip, limit)
+        try:
+            return _borrowers_page(db.execute(query).all(), response, sort, limit)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=str(e))
+else:
+    # CREDITPATH_DB_ASYNC=1: the same endpoints on the aiosqlite engine, so
+    # they never occupy a threadpool worker while SQLite is busy
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    @app.get("/loans/{loan_id}")
+    async def get_loan_details(loan_id: int, db: AsyncSession = Depends(get_async_db)):
+        return _loan_details((await db.execute(_loan_details_query(loan_id))).first())
+
+    @app.get("/borrowers")
+    async def get_borrowers(
+        response: Response,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        sort: str = "id",
+        status: Optional[str] = None,
+        min_credit_score: Optional[int] = None,
+        max_credit_score: Optional[int] = None,
+        risk_segment: Optional[str] = None,
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        """Async variant of the keyset-paginated listing above."""
+        query = _borrowers_query(cursor, sort, status, min_credit_score, max_credit_score, risk_segment, skip, limit)
+        try:
+            return _borrowers_page((await db.execute(query)).all(), response, sort, limit)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     import uvicorn
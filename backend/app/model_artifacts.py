@@ -0,0 +1,89 @@
+import json
+import os
+import numpy as np
+from scoring import FEATURE_COLUMNS
+
+# Pickle-free model formats for multi-worker serving.
+# - LogisticRegression: [intercept, coef...] as a float64 .npy, opened with
+#   np.load(mmap_mode="r") so every worker maps the same page-cache pages.
+# - XGBoost: the booster's native UBJSON model, loaded without unpickling
+#   the sklearn wrapper.
+META_FILE = "model_meta.json"
+LR_FILE = "lr_coef.npy"
+XGB_FILE = "model.ubj"
+
+class SharedLogisticModel:
+    """Binary logistic regression backed by a read-only memory-mapped weight vector."""
+
+    def __init__(self, weights: np.ndarray):
+        self.weights = weights
+        self.intercept_ = weights[:1]
+        self.coef_ = weights[1:].reshape(1, -1)
+
+    def fast_predictor(self):
+        from scipy.special import expit
+        coef_t = self.coef_.T
+        intercept = self.intercept_
+
+        def predict(X):
+            return expit((X @ coef_t + intercept).ravel())
+        return predict
+
+    def predict_proba(self, X):
+        p = self.fast_predictor()(np.asarray(X, dtype=np.float64))
+        return np.column_stack([1 - p, p])
+
+class SharedBoosterModel:
+    """XGBoost booster loaded from its native model file."""
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def get_booster(self):
+        return self.booster
+
+    def fast_predictor(self):
+        booster = self.booster
+
+        def predict(X):
+            return booster.inplace_predict(X)
+        return predict
+
+    def predict_proba(self, X):
+        p = self.booster.inplace_predict(np.asarray(X, dtype=np.float64))
+        return np.column_stack([1 - p, p])
+
+def export_shared_model(model, out_dir: str) -> str:
+    """
+    Writes model in a pickle-free format to out_dir and returns the model kind.
+    Supports binary LogisticRegression and XGBClassifier.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if hasattr(model, "get_booster"):
+        kind = "xgboost"
+        model.get_booster().save_model(os.path.join(out_dir, XGB_FILE))
+    elif type(model).__name__ == "LogisticRegression" and model.coef_.shape[0] == 1:
+        kind = "logistic_regression"
+        weights = np.concatenate([model.intercept_, model.coef_.ravel()]).astype(np.float64)
+        np.save(os.path.join(out_dir, LR_FILE), weights)
+    else:
+        raise ValueError(f"Unsupported model type for shared export: {type(model).__name__}")
+
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump({"kind": kind, "features": FEATURE_COLUMNS}, f, indent=2)
+    return kind
+
+def load_shared_model(model_dir: str):
+    with open(os.path.join(model_dir, META_FILE)) as f:
+        meta = json.load(f)
+    if meta["features"] != FEATURE_COLUMNS:
+        raise ValueError(f"Model feature order {meta['features']} does not match {FEATURE_COLUMNS}")
+
+    if meta["kind"] == "logistic_regression":
+        return SharedLogisticModel(np.load(os.path.join(model_dir, LR_FILE), mmap_mode="r"))
+    if meta["kind"] == "xgboost":
+        import xgboost as xgb
+        booster = xgb.Booster()
+        booster.load_model(os.path.join(model_dir, XGB_FILE))
+        return SharedBoosterModel(booster)
+    raise ValueError(f"Unknown model kind: {meta['kind']}")
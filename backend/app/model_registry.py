@@ -0,0 +1,299 @@
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+import joblib
+import numpy as np
+from compiled_model import export_compiled_model, load_compiled_model
+from model_artifacts import export_shared_model, load_shared_model
+from scoring import FEATURE_COLUMNS, build_fast_predictor, has_fast_path
+
+# Versioned model registry on disk:
+#   <registry>/v0001/model.pkl        joblib artifact
+#   <registry>/v0001/shared/          pickle-free export (when supported)
+#   <registry>/v0001/compiled/        NumPy-only compiled export (when supported)
+#   <registry>/v0001/metadata.json    version, kind, features, metrics, training hash, ...
+#   <registry>/CURRENT                active version, replaced atomically
+MODEL_FILE = "model.pkl"
+SHARED_DIR = "shared"
+COMPILED_DIR = "compiled"
+METADATA_FILE = "metadata.json"
+CURRENT_FILE = "CURRENT"
+# Version names are used as directory names; anything else never reaches a path join
+VERSION_PATTERN = re.compile(r"^v\d{4,}$")
+
+def check_version(version: str) -> str:
+    if not isinstance(version, str) or not VERSION_PATTERN.match(version):
+        raise ValueError(f"Invalid model version: {version!r}")
+    return version
+
+def _write_atomic(path: str, text: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def list_versions(registry_dir: str) -> list:
+    """Metadata of every registered version, oldest first."""
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = []
+    for name in sorted(os.listdir(registry_dir)):
+        meta_path = os.path.join(registry_dir, name, METADATA_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                versions.append(json.load(f))
+    return versions
+
+def current_version(registry_dir: str):
+    path = os.path.join(registry_dir, CURRENT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().strip() or None
+
+def set_current(registry_dir: str, version: str):
+    check_version(version)
+    if not os.path.exists(os.path.join(registry_dir, version, METADATA_FILE)):
+        raise ValueError(f"Unknown model version: {version}")
+    _write_atomic(os.path.join(registry_dir, CURRENT_FILE), version + "\n")
+
+def register_model(model, registry_dir: str, metrics: dict = None, training_hash: str = None,
+                   params: dict = None, parent: str = None, activate: bool = True) -> str:
+    """
+    Stores model as the next version (v0001, v0002, ...) with its metadata and
+    returns the version. activate=True points CURRENT at it, which running APIs
+    with a model watch pick up without a restart.
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+    existing = [int(m["version"][1:]) for m in list_versions(registry_dir)]
+    version = f"v{max(existing, default=0) + 1:04d}"
+    tmp_dir = os.path.join(registry_dir, f".{version}.tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    joblib.dump(model, os.path.join(tmp_dir, MODEL_FILE))
+    try:
+        kind = export_shared_model(model, os.path.join(tmp_dir, SHARED_DIR))
+    except ValueError:
+        kind = type(model).__name__
+    try:
+        export_compiled_model(model, os.path.join(tmp_dir, COMPILED_DIR))
+    except ValueError:
+        pass
+    metadata = {
+        "version": version,
+        "created_at": datetime.datetime.utcnow().isoformat(),
+        "kind": kind,
+        "model_class": type(model).__name__,
+        "features": FEATURE_COLUMNS,
+        "metrics": metrics or {},
+        "training_hash": training_hash,
+        "params": params or {},
+        "parent": parent,
+    }
+    with open(os.path.join(tmp_dir, METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2, default=str)
+    os.replace(tmp_dir, os.path.join(registry_dir, version))
+
+    if activate:
+        set_current(registry_dir, version)
+    return version
+
+class LoadedModel:
+    """An immutable, ready-to-score model version: the model, its fast predictor and metadata."""
+
+    def __init__(self, version: str, model, metadata: dict = None):
+        self.version = version
+        self.model = model
+        self.metadata = metadata or {}
+        self.predict = build_fast_predictor(model)
+        self.fast_path = has_fast_path(model)
+        self.loaded_at = datetime.datetime.utcnow()
+
+    def info(self) -> dict:
+        return {"version": self.version, "loaded_at": self.loaded_at.isoformat(), **self.metadata}
+
+def load_version(registry_dir: str, version: str, model_format: str = "pickle") -> LoadedModel:
+    """
+    Loads a registered version; "shared" and "compiled" prefer the pickle-free
+    or compiled export when there is one.
+    """
+    check_version(version)
+    version_dir = os.path.join(registry_dir, version)
+    with open(os.path.join(version_dir, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    if metadata["features"] != FEATURE_COLUMNS:
+        raise ValueError(f"Model feature order {metadata['features']} does not match {FEATURE_COLUMNS}")
+    if model_format == "shared" and os.path.isdir(os.path.join(version_dir, SHARED_DIR)):
+        model = load_shared_model(os.path.join(version_dir, SHARED_DIR))
+    elif model_format == "compiled" and os.path.isdir(os.path.join(version_dir, COMPILED_DIR)):
+        model = load_compiled_model(os.path.join(version_dir, COMPILED_DIR))
+    else:
+        model = joblib.load(os.path.join(version_dir, MODEL_FILE))
+    loaded = LoadedModel(version, model, metadata)
+    # Fail before the swap, not on the first request
+    loaded.predict(np.zeros((1, len(FEATURE_COLUMNS))))
+    return loaded
+
+class ShadowStats:
+    """Latency and score agreement of a shadow model against the serving model."""
+
+    def __init__(self, window: int = 10000):
+        self.lock = threading.Lock()
+        self.rows = 0
+        self.calls = 0
+        self.errors = 0
+        self.primary_ms = deque(maxlen=window)
+        self.shadow_ms = deque(maxlen=window)
+        self.abs_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+
+    def record(self, primary_ms: float, shadow_ms: float, primary, shadow):
+        diff = np.abs(np.asarray(primary, dtype=np.float64) - np.asarray(shadow, dtype=np.float64))
+        with self.lock:
+            self.calls += 1
+            self.rows += len(diff)
+            self.primary_ms.append(primary_ms)
+            self.shadow_ms.append(shadow_ms)
+            self.abs_diff_sum += float(diff.sum())
+            self.max_abs_diff = max(self.max_abs_diff, float(diff.max(initial=0.0)))
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            def pct(values):
+                if not values:
+                    return {"p50": None, "p99": None}
+                p50, p99 = np.percentile(np.fromiter(values, dtype=np.float64), [50, 99])
+                return {"p50": float(p50), "p99": float(p99)}
+            return {
+                "calls": self.calls,
+                "rows": self.rows,
+                "errors": self.errors,
+                "primary_latency_ms": pct(self.primary_ms),
+                "shadow_latency_ms": pct(self.shadow_ms),
+                "mean_abs_diff": self.abs_diff_sum / self.rows if self.rows else None,
+                "max_abs_diff": self.max_abs_diff,
+            }
+
+class ModelHolder:
+    """
+    The serving model behind one attribute. Requests read `holder.current` once
+    and keep that LoadedModel for their whole lifetime, so a swap never affects
+    in-flight requests and the scoring path takes no lock. Loading happens
+    before the swap (off the event loop); the swap itself is one reference
+    assignment.
+    """
+
+    def __init__(self, registry_dir: str, model_format: str = "pickle"):
+        self.registry_dir = registry_dir
+        self.model_format = model_format
+        self.current = None
+        self.shadow = None
+        self.shadow_sample_rate = 1.0
+        self.shadow_stats = ShadowStats()
+        self.last_error = None
+        self.swaps = 0
+        self._lock = threading.Lock()
+        self._shadow_counter = 0
+
+    def swap(self, loaded: LoadedModel):
+        with self._lock:
+            previous, self.current = self.current, loaded
+            self.swaps += 1
+        return previous
+
+    def load(self, version: str = None) -> LoadedModel:
+        """Loads version (default: the registry's CURRENT) and swaps it in. Raises on failure."""
+        version = version or current_version(self.registry_dir)
+        if version is None:
+            raise ValueError(f"No current model version in {self.registry_dir}")
+        try:
+            loaded = load_version(self.registry_dir, version, self.model_format)
+        except Exception as e:
+            self.last_error = f"{version}: {e}"
+            raise
+        self.swap(loaded)
+        self.last_error = None
+        return loaded
+
+    def set_shadow(self, version: str = None, sample_rate: float = 1.0):
+        """Shadow-scores `version` on a sample of live traffic; None stops shadowing."""
+        loaded = load_version(self.registry_dir, version, self.model_format) if version else None
+        with self._lock:
+            self.shadow = loaded
+            self.shadow_sample_rate = sample_rate
+            self.shadow_stats = ShadowStats()
+        return loaded
+
+    def shadow_due(self) -> bool:
+        if self.shadow is None:
+            return False
+        with self._lock:
+            self._shadow_counter += 1
+            return (self._shadow_counter * self.shadow_sample_rate) % 1.0 < self.shadow_sample_rate
+
+    def run_shadow(self, X, primary_probs, primary_ms: float):
+        """Scores X with the shadow model and records latency and score differences."""
+        shadow, stats = self.shadow, self.shadow_stats
+        if shadow is None:
+            return
+        try:
+            start = time.perf_counter()
+            probs = shadow.predict(X)
+            stats.record(primary_ms, (time.perf_counter() - start) * 1000, primary_probs, probs)
+        except Exception:
+            with stats.lock:
+                stats.errors += 1
+
+    def info(self) -> dict:
+        return {
+            "current": self.current.info() if self.current else None,
+            "shadow": ({**self.shadow.info(), "sample_rate": self.shadow_sample_rate}
+                       if self.shadow else None),
+            "swaps": self.swaps,
+            "last_error": self.last_error,
+            "registry_current": current_version(self.registry_dir),
+        }
+
+class ModelWatcher:
+    """
+    Polls the registry's CURRENT file every interval seconds and loads the
+    version it names when that differs from the serving one (e.g. after
+    register_model(..., activate=True) in a training job).
+    """
+
+    def __init__(self, holder: ModelHolder, interval: float = 5.0):
+        self.holder = holder
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self) -> bool:
+        version = current_version(self.holder.registry_dir)
+        current = self.holder.current
+        if version is None or (current is not None and current.version == version):
+            return False
+        if self.holder.last_error and self.holder.last_error.startswith(f"{version}:"):
+            return False  # already failed, wait for a new version
+        try:
+            self.holder.load(version)
+            print(f"Model {version} loaded from registry")
+            return True
+        except Exception as e:
+            print(f"Failed to load model {version}: {e}")
+            return False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
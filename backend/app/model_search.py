@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import numpy as np
+import joblib
+from joblib import Parallel, delayed
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.metrics import roc_auc_score
+
+DEFAULT_CACHE_DIR = "CreditPathAI/backend/app/artifacts/search_cache"
+DEFAULT_FOLDS = 5
+
+# Hyperparameter grids per model family. Every candidate is fitted single-threaded
+# so that the parallelism comes from running (candidate, fold) tasks side by side.
+SEARCH_SPACES = {
+    "logistic_regression": {"C": [0.01, 0.1, 1.0, 10.0]},
+    "xgboost": {"max_depth": [3, 5], "n_estimators": [100, 300], "learning_rate": [0.05, 0.1]},
+    "lightgbm": {"num_leaves": [15, 31], "n_estimators": [100, 300], "learning_rate": [0.05, 0.1]},
+}
+
+def make_estimator(family: str, params: dict, seed: int = 42, n_jobs: int = 1):
+    """Unfitted candidate; n_jobs threads per fit (1 for the CV folds, which run side by side)."""
+    if family == "logistic_regression":
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(max_iter=1000, **params)
+    if family == "xgboost":
+        import xgboost as xgb
+        return xgb.XGBClassifier(eval_metric="logloss", n_jobs=n_jobs, random_state=seed, **params)
+    if family == "lightgbm":
+        import lightgbm as lgb
+        return lgb.LGBMClassifier(n_jobs=n_jobs, random_state=seed, verbose=-1, **params)
+    raise ValueError(f"Unknown model family: {family}")
+
+def data_fingerprint(X, y) -> str:
+    """Content hash of the training matrix and labels (shape, dtype and bytes)."""
+    digest = hashlib.sha256()
+    for arr in (np.ascontiguousarray(X), np.ascontiguousarray(y)):
+        digest.update(f"{arr.shape}{arr.dtype}".encode())
+        digest.update(arr.tobytes())
+    return digest.hexdigest()
+
+def fold_cache_key(data_hash: str, family: str, params: dict, fold: int, n_splits: int, seed: int) -> str:
+    payload = json.dumps([data_hash, family, params, fold, n_splits, seed], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _fit_fold(family, params, X, y, train_idx, test_idx, seed, cache_path):
+    model = make_estimator(family, params, seed).fit(X[train_idx], y[train_idx])
+    auc = float(roc_auc_score(y[test_idx], model.predict_proba(X[test_idx])[:, 1]))
+    result = {"auc": auc, "model": model}
+    if cache_path is not None:
+        # Written under a temporary name so concurrent or interrupted runs never
+        # leave a partial cache entry behind
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        joblib.dump(result, tmp_path)
+        os.replace(tmp_path, cache_path)
+    return auc
+
+def run_search(X, y, families=None, n_splits: int = DEFAULT_FOLDS, n_jobs: int = -1,
+               cache_dir=DEFAULT_CACHE_DIR, seed: int = 42, search_spaces=None):
+    """
+    Stratified k-fold CV over every (family, params) candidate of the search
+    spaces. All (candidate, fold) fits run in a joblib process pool of n_jobs
+    workers. Each fitted fold is cached in cache_dir under a hash of the data,
+    family, params and fold, so reruns only fit what is missing.
+
+    Returns one dict per candidate, best mean AUC first:
+    {"family", "params", "mean_auc", "std_auc", "fold_aucs", "cached_folds"}.
+    """
+    search_spaces = search_spaces or SEARCH_SPACES
+    families = families or list(search_spaces)
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.int64)
+    data_hash = data_fingerprint(X, y)
+    folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(X, y))
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    candidates = [(family, params) for family in families for params in ParameterGrid(search_spaces[family])]
+    fold_aucs = {}
+    cached = set()
+    pending = []
+    for c, (family, params) in enumerate(candidates):
+        for f, (train_idx, test_idx) in enumerate(folds):
+            cache_path = None
+            if cache_dir is not None:
+                key = fold_cache_key(data_hash, family, params, f, n_splits, seed)
+                cache_path = os.path.join(cache_dir, f"{key}.joblib")
+                if os.path.exists(cache_path):
+                    fold_aucs[c, f] = joblib.load(cache_path)["auc"]
+                    cached.add((c, f))
+                    continue
+            pending.append((c, f, family, params, train_idx, test_idx, cache_path))
+
+    if pending:
+        aucs = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_fold)(family, params, X, y, train_idx, test_idx, seed, cache_path)
+            for _, _, family, params, train_idx, test_idx, cache_path in pending
+        )
+        for (c, f, *_), auc in zip(pending, aucs):
+            fold_aucs[c, f] = auc
+
+    results = []
+    for c, (family, params) in enumerate(candidates):
+        aucs = [fold_aucs[c, f] for f in range(n_splits)]
+        results.append({
+            "family": family,
+            "params": dict(params),
+            "mean_auc": float(np.mean(aucs)),
+            "std_auc": float(np.std(aucs)),
+            "fold_aucs": aucs,
+            "cached_folds": sum((c, f) in cached for f in range(n_splits)),
+        })
+    results.sort(key=lambda r: r["mean_auc"], reverse=True)
+    return results
@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 import datetime
 from database import Base
 
+# Sort key of borrowers without a credit score (before every real score), so
+# keyset pagination never compares against NULL
+NULL_CREDIT_SCORE = -1
+
 class Borrower(Base):
     __tablename__ = "borrowers"
 
@@ -15,12 +19,15 @@ class Borrower(Base):
     
     loans = relationship("Loan", back_populates="borrower")
 
+    # Keyset pagination of /borrowers sorted by credit score
+    __table_args__ = (Index("ix_borrowers_credit_score_id", func.coalesce(credit_score, NULL_CREDIT_SCORE), "id"),)
+
 
 class Loan(Base):
     __tablename__ = "loans"
 
     id = Column(Integer, primary_key=True, index=True)
-    borrower_id = Column(Integer, ForeignKey("borrowers.id"))
+    borrower_id = Column(Integer, ForeignKey("borrowers.id"), index=True)
     amount = Column(Float)
     term_months = Column(Integer)
     interest_rate = Column(Float)
@@ -33,14 +40,24 @@ class Loan(Base):
     repayments = relationship("Repayment", back_populates="loan")
     features = relationship("LoanFeatures", uselist=False, back_populates="loan")
 
+    # Keyset pagination of /borrowers filtered by status
+    __table_args__ = (Index("ix_loans_status_id", "loan_status", "id"),)
+
 
 class Repayment(Base):
     __tablename__ = "repayments"
     
     id = Column(Integer, primary_key=True, index=True)
-    loan_id = Column(Integer, ForeignKey("loans.id"))
+    loan_id = Column(Integer, ForeignKey("loans.id"), index=True)
     payment_date = Column(DateTime)
     payment_amount = Column(Float)
+
+    # Stamped by the ingest upsert on insert and on every correction; drives
+    # the rebuild of corrected loans in update_features_incremental
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, index=True)
+    # loan_id the repayment had before a correction moved it to another loan,
+    # kept until update_features_incremental has rebuilt that loan
+    previous_loan_id = Column(Integer)
     
     loan = relationship("Loan", back_populates="repayments")
 
@@ -49,7 +66,7 @@ class LoanFeatures(Base):
     __tablename__ = "loan_features"
     
     id = Column(Integer, primary_key=True, index=True)
-    loan_id = Column(Integer, ForeignKey("loans.id"))
+    loan_id = Column(Integer, ForeignKey("loans.id"), index=True, unique=True)
     
     # Calculated Features
     repayment_velocity = Column(Float)
@@ -62,5 +79,60 @@ class LoanFeatures(Base):
     default_probability = Column(Float)
     risk_segment = Column(String) # Low, Medium, High
     recommended_action = Column(String)
+    scored_at = Column(DateTime)
+
+    # Bumped whenever the features change; drives incremental rescoring
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, index=True)
     
     loan = relationship("Loan", back_populates="features")
+
+    __table_args__ = (Index("ix_loan_features_segment_loan", "risk_segment", "loan_id"),)
+
+
+class JobWatermark(Base):
+    __tablename__ = "job_watermarks"
+
+    job_name = Column(String, primary_key=True)
+    last_run_at = Column(DateTime)
+    last_repayment_id = Column(Integer, default=0)
+    last_repayment_updated_at = Column(DateTime)
+
+
+class LoanStatusAggregate(Base):
+    """Per-status loan count/volume, maintained incrementally for /dashboard/stats."""
+    __tablename__ = "loan_status_aggregates"
+
+    loan_status = Column(String, primary_key=True)
+    loan_count = Column(Integer, default=0)
+    total_amount = Column(Float, default=0.0)
+
+
+class IngestCheckpoint(Base):
+    """
+    One row per ingested CSV file. rows_loaded/byte_offset advance with every
+    committed chunk, so an interrupted load resumes where it stopped and a
+    completed, unchanged file is skipped.
+    """
+    __tablename__ = "ingest_checkpoints"
+
+    file_name = Column(String, primary_key=True)
+    file_size = Column(Integer)
+    file_mtime = Column(Float)
+    rows_loaded = Column(Integer, default=0)
+    byte_offset = Column(Integer, default=0)
+    completed_at = Column(DateTime)
+
+
+class LoanRepaymentState(Base):
+    """
+    Running per-loan repayment aggregates (count, sum, Welford mean/M2, last
+    payment) so features can be updated from new repayments alone.
+    """
+    __tablename__ = "loan_repayment_state"
+
+    loan_id = Column(Integer, ForeignKey("loans.id"), primary_key=True)
+    payment_count = Column(Integer, default=0)
+    payment_sum = Column(Float, default=0.0)
+    payment_mean = Column(Float, default=0.0)
+    payment_m2 = Column(Float, default=0.0)
+    last_payment_date = Column(DateTime)
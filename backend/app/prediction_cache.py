@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+
+class PredictionCache:
+    """
+    Bounded LRU cache of /predict responses with a per-entry TTL.
+
+    Keys are the request's feature values (rounded to `decimals` places when
+    set, so near-identical requests share an entry) plus a namespace such as the
+    serving model version. When the model version changes the whole cache is
+    dropped, so a swapped-in model never serves scores of the previous one.
+    max_entries=0 disables caching.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0, decimals: int = None):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._model_version = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def key(self, namespace, values) -> tuple:
+        if self.decimals is not None:
+            values = tuple(round(float(v), self.decimals) for v in values)
+        else:
+            values = tuple(values)
+        return (namespace, values)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def _check_model(self, model_version):
+        # Called with the lock held
+        if model_version != self._model_version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._model_version = model_version
+
+    def get(self, key, model_version=None):
+        """Cached value for key, or None on a miss (also when expired or the model changed)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._check_model(model_version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value, model_version=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_model(model_version)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "decimals": self.decimals,
+                "model_version": self._model_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
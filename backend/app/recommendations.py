@@ -1,37 +1,98 @@
+import bisect
+import json
+import os
+import numpy as np
+
+# Segments in ascending order of risk. A probability p falls in the first
+# segment whose threshold is greater than p (the last segment has none), so
+# with these defaults: p < 0.2 Low, 0.2 <= p < 0.6 Medium, p >= 0.6 High.
+DEFAULT_CONFIG = {
+    "segments": ["Low Risk", "Medium Risk", "High Risk"],
+    "thresholds": [0.2, 0.6],
+    "actions": {
+        "Low Risk": [
+            "Send gentle SMS reminder",
+            "Automated email nudge",
+            "Offer loyalty discount for early payment"
+        ],
+        "Medium Risk": [
+            "Offer flexible repayment plan",
+            "SMS/Email Warning",
+            "Schedule automated robo-call"
+        ],
+        "High Risk": [
+            "Assign to recovery agent",
+            "Offer significant settlement waiver",
+            "Legal notice preparation"
+        ]
+    }
+}
+
+# JSON file with the same keys as DEFAULT_CONFIG, e.g. to move the thresholds
+CONFIG_ENV = "CREDITPATH_RECOMMENDATION_CONFIG"
+
+def load_recommendation_config(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
 
 class RecommendationEngine:
-    def __init__(self):
-        self.actions = {
-            "Low Risk": [
-                "Send gentle SMS reminder",
-                "Automated email nudge",
-                "Offer loyalty discount for early payment"
-            ],
-            "Medium Risk": [
-                "Offer flexible repayment plan",
-                "SMS/Email Warning",
-                "Schedule automated robo-call"
-            ],
-            "High Risk": [
-                "Assign to recovery agent",
-                "Offer significant settlement waiver",
-                "Legal notice preparation"
-            ]
-        }
+    """
+    Maps default probabilities to a risk segment and its collection actions.
+    get_recommendation scores one probability; segment_codes / get_recommendations
+    handle whole arrays with one np.digitize call. Action lists are shared tuples.
+    """
+
+    def __init__(self, config: dict = None):
+        if config is None:
+            path = os.getenv(CONFIG_ENV)
+            config = load_recommendation_config(path) if path else DEFAULT_CONFIG
+        segments = list(config["segments"])
+        thresholds = [float(t) for t in config["thresholds"]]
+        if len(thresholds) != len(segments) - 1:
+            raise ValueError(f"{len(segments)} segments need {len(segments) - 1} thresholds, got {len(thresholds)}")
+        if any(a >= b for a, b in zip(thresholds, thresholds[1:])):
+            raise ValueError(f"Thresholds must be strictly increasing: {thresholds}")
+
+        self.segments = tuple(segments)
+        self.thresholds = tuple(thresholds)
+        self.actions = {s: tuple(config.get("actions", {}).get(s, ())) for s in segments}
+        self._threshold_array = np.array(thresholds, dtype=np.float64)
+        self._segment_array = np.array(segments, dtype=object)
+        self._primary_action_array = np.array([self.actions[s][0] if self.actions[s] else None for s in segments],
+                                              dtype=object)
 
     def segment_borrower(self, default_prob: float) -> str:
-        if default_prob < 0.2:
-            return "Low Risk"
-        elif default_prob < 0.6:
-            return "Medium Risk"
-        else:
-            return "High Risk"
+        return self.segments[bisect.bisect_right(self.thresholds, default_prob)]
 
     def get_recommendation(self, default_prob: float) -> dict:
         segment = self.segment_borrower(default_prob)
-        recommended_actions = self.actions.get(segment, [])
         return {
             "risk_segment": segment,
-            "recommended_actions": recommended_actions,
+            "recommended_actions": self.actions[segment],
             "default_probability": round(default_prob, 4)
         }
+
+    def segment_codes(self, default_probs) -> np.ndarray:
+        """Index into self.segments for every probability (NaN lands in the riskiest segment, as above)."""
+        return np.digitize(np.asarray(default_probs, dtype=np.float64), self._threshold_array)
+
+    def segment_names(self, codes) -> np.ndarray:
+        return self._segment_array[codes]
+
+    def primary_actions(self, codes) -> np.ndarray:
+        """First recommended action per segment code (None for segments without actions)."""
+        return self._primary_action_array[codes]
+
+    def get_recommendations(self, default_probs) -> list:
+        """get_recommendation for an array of probabilities."""
+        probs = np.asarray(default_probs, dtype=np.float64)
+        codes = self.segment_codes(probs)
+        segments, actions = self.segments, self.actions
+        return [
+            {
+                "risk_segment": segments[code],
+                "recommended_actions": actions[segments[code]],
+                "default_probability": round(prob, 4)
+            }
+            for code, prob in zip(codes.tolist(), probs.tolist())
+        ]
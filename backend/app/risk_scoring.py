@@ -0,0 +1,133 @@
+import argparse
+import datetime
+import os
+import numpy as np
+from sqlalchemy import select, update, bindparam, func, or_
+from sqlalchemy.orm import Session
+from database import SessionLocal, engine, Base
+from models import Loan, Borrower, Repayment, LoanFeatures, JobWatermark
+from recommendations import RecommendationEngine
+from scoring import FEATURE_COLUMNS, build_fast_predictor, score_matrix
+
+JOB_NAME = "risk_scoring"
+DEFAULT_CHUNK_SIZE = 10000
+
+# Model inputs in FEATURE_COLUMNS order, pulled straight from the three tables
+FEATURE_SOURCES = {
+    "repayment_velocity": LoanFeatures.repayment_velocity,
+    "credit_utilization_ratio": LoanFeatures.credit_utilization_ratio,
+    "delinquency_freq": LoanFeatures.delinquency_freq,
+    "payment_consistency_score": LoanFeatures.payment_consistency_score,
+    "amount": Loan.amount,
+    "interest_rate": Loan.interest_rate,
+    "annual_income": Borrower.annual_income,
+    "credit_score": Borrower.credit_score,
+}
+
+def feature_matrix_query(key=LoanFeatures.id):
+    """Column-projected select of (key, loan_features.updated_at, *FEATURE_COLUMNS)."""
+    return (
+        select(key, LoanFeatures.updated_at, *[FEATURE_SOURCES[name] for name in FEATURE_COLUMNS])
+        .join(Loan, Loan.id == LoanFeatures.loan_id)
+        .join(Borrower, Borrower.id == Loan.borrower_id)
+    )
+
+def _changed_feature_ids(db: Session, watermark: JobWatermark):
+    query = select(LoanFeatures.id)
+    if watermark.last_run_at is not None:
+        touched_loans = select(Repayment.loan_id).where(Repayment.id > (watermark.last_repayment_id or 0))
+        query = query.where(or_(
+            LoanFeatures.updated_at > watermark.last_run_at,
+            LoanFeatures.scored_at.is_(None),
+            LoanFeatures.loan_id.in_(touched_loans),
+        ))
+    return [row[0] for row in db.execute(query.order_by(LoanFeatures.id))]
+
+def score_loans(db: Session, predict, incremental: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Bulk-scores loan_features rows and writes default_probability, risk_segment
+    and recommended_action back. With incremental=True only rows whose features
+    changed (updated_at), whose loans received new repayments, or that were never
+    scored since the last run's watermark are rescored. Returns the number of rows scored.
+    """
+    rec_engine = RecommendationEngine()
+    watermark = db.get(JobWatermark, JOB_NAME)
+    if watermark is None:
+        watermark = JobWatermark(job_name=JOB_NAME, last_repayment_id=0)
+        db.add(watermark)
+    if not incremental:
+        watermark.last_run_at = None
+
+    run_started = datetime.datetime.utcnow()
+    max_repayment_id = db.execute(select(func.max(Repayment.id))).scalar() or 0
+    feature_ids = _changed_feature_ids(db, watermark)
+
+    # Rows whose features changed after they were read are skipped (updated_at
+    # check) and picked up by the next run; updated_at is assigned to itself so
+    # the onupdate hook does not mark scored rows as changed.
+    stmt = (
+        update(LoanFeatures)
+        .where(LoanFeatures.id == bindparam("_id"), LoanFeatures.updated_at == bindparam("_updated_at"))
+        .values(
+            default_probability=bindparam("_prob"),
+            risk_segment=bindparam("_segment"),
+            recommended_action=bindparam("_action"),
+            scored_at=bindparam("_scored_at"),
+            updated_at=LoanFeatures.updated_at,
+        )
+    )
+
+    scored = 0
+    for start in range(0, len(feature_ids), chunk_size):
+        ids = feature_ids[start:start + chunk_size]
+        if ids[-1] - ids[0] + 1 == len(ids):
+            # Contiguous block (always the case on full runs): range scan instead of a large IN list
+            chunk_filter = LoanFeatures.id.between(ids[0], ids[-1])
+        else:
+            chunk_filter = LoanFeatures.id.in_(ids)
+        rows = db.execute(feature_matrix_query().where(chunk_filter)).all()
+        if not rows:
+            continue
+        X = np.array([row[2:] for row in rows], dtype=np.float64)
+        probs = score_matrix(predict, X)
+
+        codes = rec_engine.segment_codes(probs)
+        params = [
+            {
+                "_id": row[0],
+                "_prob": prob,
+                "_segment": segment,
+                "_action": action,
+                "_scored_at": run_started,
+                "_updated_at": row[1],
+            }
+            for row, prob, segment, action in zip(
+                rows, probs.tolist(), rec_engine.segment_names(codes).tolist(), rec_engine.primary_actions(codes).tolist()
+            )
+        ]
+        db.connection().execute(stmt, params)
+        scored += len(rows)
+
+    watermark.last_run_at = run_started
+    watermark.last_repayment_id = max_repayment_id
+    db.commit()
+    return scored
+
+def run_scoring_job(full: bool = False):
+    import joblib
+    Base.metadata.create_all(bind=engine)
+    model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts/best_model.pkl")
+    predict = build_fast_predictor(joblib.load(model_path))
+
+    db = SessionLocal()
+    try:
+        scored = score_loans(db, predict, incremental=not full)
+        print(f"Scored {scored} loans ({'full' if full else 'incremental'} run).")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true", help="Rescore every loan, ignoring the watermark")
+    args = parser.parse_args()
+    run_scoring_job(full=args.full)
@@ -0,0 +1,98 @@
+import threading
+import warnings
+import numpy as np
+
+# Fixed feature order the model was trained on (see train.py)
+FEATURE_COLUMNS = [
+    "repayment_velocity", "credit_utilization_ratio",
+    "delinquency_freq", "payment_consistency_score",
+    "amount", "interest_rate", "annual_income", "credit_score"
+]
+
+DEFAULT_CHUNK_SIZE = 10000
+
+def rows_to_matrix(rows) -> np.ndarray:
+    """
+    Builds one contiguous (n_rows, n_features) float64 matrix from validated
+    request objects (or dicts), in FEATURE_COLUMNS order.
+    """
+    n = len(rows)
+    X = np.empty((n, len(FEATURE_COLUMNS)), dtype=np.float64)
+    if n == 0:
+        return X
+    if isinstance(rows[0], dict):
+        for j, name in enumerate(FEATURE_COLUMNS):
+            X[:, j] = [row[name] for row in rows]
+    else:
+        for j, name in enumerate(FEATURE_COLUMNS):
+            X[:, j] = [getattr(row, name) for row in rows]
+    return X
+
+_buffers = threading.local()
+
+def request_to_vector(request) -> np.ndarray:
+    """
+    Copies a single request's features into a preallocated (1, n_features)
+    float64 buffer (one per thread) without going through a DataFrame.
+    The buffer is reused by the next call on the same thread.
+    """
+    X = getattr(_buffers, "row", None)
+    if X is None:
+        X = _buffers.row = np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float64)
+    row = X[0]
+    for j, name in enumerate(FEATURE_COLUMNS):
+        row[j] = getattr(request, name)
+    return X
+
+def has_fast_path(model) -> bool:
+    """True when build_fast_predictor(model) avoids the predict_proba fallback."""
+    return (hasattr(model, "fast_predictor") or hasattr(model, "get_booster")
+            or (type(model).__name__ == "LogisticRegression" and model.coef_.shape[0] == 1))
+
+def build_fast_predictor(model):
+    """
+    Returns a callable mapping an (n, n_features) matrix to default
+    probabilities using the model's native fast path:
+    - XGBoost: the booster's inplace_predict (no DMatrix / DataFrame)
+    - binary LogisticRegression: X @ coef.T + intercept followed by expit,
+      the same arithmetic sklearn's predict_proba performs
+    Any other estimator falls back to predict_proba. Pickle-free models from
+    model_artifacts provide their own fast_predictor().
+    Probabilities are identical to model.predict_proba(X)[:, 1].
+    """
+    if hasattr(model, "fast_predictor"):
+        return model.fast_predictor()
+
+    if hasattr(model, "get_booster"):
+        booster = model.get_booster()
+
+        def predict(X):
+            return booster.inplace_predict(X)
+        return predict
+
+    if type(model).__name__ == "LogisticRegression" and model.coef_.shape[0] == 1:
+        from scipy.special import expit
+        coef_t = np.ascontiguousarray(model.coef_.T)
+        intercept = model.intercept_
+
+        def predict(X):
+            return expit((X @ coef_t + intercept).ravel())
+        return predict
+
+    def predict(X):
+        with warnings.catch_warnings():
+            # Models fitted on a DataFrame warn about missing feature names on ndarray input
+            warnings.simplefilter("ignore", UserWarning)
+            return model.predict_proba(X)[:, 1]
+    return predict
+
+def score_matrix(predict, X: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    """
+    Returns the default probability for every row of X, calling the
+    predictor (see build_fast_predictor) once per chunk of rows.
+    """
+    probs = np.empty(X.shape[0], dtype=np.float64)
+    for start in range(0, X.shape[0], chunk_size):
+        end = start + chunk_size
+        probs[start:end] = predict(X[start:end])
+    return probs
@@ -0,0 +1,40 @@
+import argparse
+import os
+import joblib
+from compiled_model import export_compiled_model
+from model_artifacts import export_shared_model, META_FILE
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_FULL_PATH = os.path.join(BASE_DIR, "artifacts/best_model.pkl")
+SHARED_MODEL_DIR = os.path.join(BASE_DIR, "artifacts/shared")
+COMPILED_MODEL_DIR = os.path.join(BASE_DIR, "artifacts/compiled")
+EXPORTS = {"shared": (export_shared_model, SHARED_MODEL_DIR), "compiled": (export_compiled_model, COMPILED_MODEL_DIR)}
+
+def ensure_exported_model(model_format: str = "shared"):
+    """Exports best_model.pkl in model_format if the export is missing or older than the pickle."""
+    export, out_dir = EXPORTS[model_format]
+    meta_path = os.path.join(out_dir, META_FILE)
+    if os.path.exists(meta_path) and os.path.getmtime(meta_path) >= os.path.getmtime(MODEL_FULL_PATH):
+        return
+    kind = export(joblib.load(MODEL_FULL_PATH), out_dir)
+    print(f"Exported {kind} model to {out_dir}")
+
+def serve(workers: int, host: str, port: int, model_format: str = "shared"):
+    """
+    Multi-worker serving mode: the parent exports the model once, then every
+    uvicorn worker loads the pickle-free ("shared") or NumPy-only ("compiled")
+    artifact instead of unpickling its own copy.
+    """
+    import uvicorn
+    ensure_exported_model(model_format)
+    os.environ["CREDITPATH_MODEL_FORMAT"] = model_format
+    uvicorn.run("main:app", host=host, port=port, workers=workers, app_dir=BASE_DIR)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--model-format", choices=list(EXPORTS), default="shared")
+    args = parser.parse_args()
+    serve(args.workers, args.host, args.port, args.model_format)
@@ -1,24 +1,30 @@
+import argparse
 import pandas as pd
 import numpy as np
 import mlflow
 import mlflow.sklearn
-import mlflow.xgboost
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, roc_auc_score, confusion_matrix
-import xgboost as xgb
+from sklearn.metrics import roc_auc_score
 import os
 import joblib
+from compiled_model import export_compiled_model
+from model_artifacts import export_shared_model
+from incremental_training import DEFAULT_BATCH_ROWS, train_incremental
+from model_registry import register_model
+from model_search import DEFAULT_CACHE_DIR, DEFAULT_FOLDS, SEARCH_SPACES, data_fingerprint, make_estimator, run_search
+from training_data import latest_export_path, load_training_data
 
-def train_models():
+REGISTRY_DIR = "CreditPathAI/backend/app/artifacts/registry"
+
+def train_models(families=None, folds=DEFAULT_FOLDS, n_jobs=-1, cache_dir=DEFAULT_CACHE_DIR, data_path=None):
     print("Loading training data...")
-    data_path = "CreditPathAI/data/processed/training_data.csv"
-    if not os.path.exists(data_path):
+    # Newest of the Parquet (features.py default) and CSV exports unless given
+    data_path = data_path or latest_export_path()
+    if data_path is None or not os.path.exists(data_path):
         print("Training data not found!")
         return
+    print(f"Training data: {data_path}")
         
-    df = pd.read_csv(data_path)
-    
     # Feature Selection
     features = [
         "repayment_velocity", "credit_utilization_ratio", 
@@ -26,6 +32,9 @@ def train_models():
         "amount", "interest_rate", "annual_income", "credit_score"
     ]
     target = "default_probability" # Currently 0/1 float
+
+    # Only the model columns are read
+    df = load_training_data(data_path, features + [target])
     
     # Drop rows with NaNs if any
     df = df.dropna(subset=features + [target])
@@ -37,56 +46,84 @@ def train_models():
     
     mlflow.set_tracking_uri("file:./mlruns")
     mlflow.set_experiment("CreditPathAI_Risk_Model")
-    
-    best_model = None
-    best_auc = 0
-    best_model_name = ""
-    
-    # 1. Baseline: Logistic Regression
-    print("Training Logistic Regression...")
-    with mlflow.start_run(run_name="Logistic_Regression"):
-        lr = LogisticRegression(max_iter=1000)
-        lr.fit(X_train, y_train)
-        
-        y_pred = lr.predict(X_test)
-        y_prob = lr.predict_proba(X_test)[:, 1]
-        
-        auc = roc_auc_score(y_test, y_prob)
-        print(f"LR AUC: {auc}")
-        
-        mlflow.log_metric("auc", auc)
-        mlflow.sklearn.log_model(lr, "model")
-        
-        if auc > best_auc:
-            best_auc = auc
-            best_model = lr
-            best_model_name = "Logistic_Regression"
 
-    # 2. XGBoost
-    print("Training XGBoost...")
-    with mlflow.start_run(run_name="XGBoost"):
-        xg_clf = xgb.XGBClassifier(use_label_encoder=False, eval_metric='logloss')
-        xg_clf.fit(X_train, y_train)
-        
-        y_pred = xg_clf.predict(X_test)
-        y_prob = xg_clf.predict_proba(X_test)[:, 1]
-        
-        auc = roc_auc_score(y_test, y_prob)
-        print(f"XGB AUC: {auc}")
-        
-        mlflow.log_metric("auc", auc)
-        # mlflow.xgboost.log_model(xg_clf, "model")
-        
-        if auc > best_auc:
-            best_auc = auc
-            best_model = xg_clf
-            best_model_name = "XGBoost"
+    # k-fold CV + grid search over all model families on the training split;
+    # the holdout split is only used to report the refitted winner
+    print(f"Searching {', '.join(families or SEARCH_SPACES)} with {folds}-fold CV (n_jobs={n_jobs})...")
+    results = run_search(X_train.to_numpy(), y_train.to_numpy(), families=families, n_splits=folds,
+                         n_jobs=n_jobs, cache_dir=cache_dir)
+
+    with mlflow.start_run(run_name="Model_Search"):
+        mlflow.log_params({"folds": folds, "n_jobs": n_jobs, "candidates": len(results)})
+        for trial in results:
+            with mlflow.start_run(run_name=trial["family"], nested=True):
+                mlflow.log_param("family", trial["family"])
+                mlflow.log_params(trial["params"])
+                mlflow.log_metric("cv_auc_mean", trial["mean_auc"])
+                mlflow.log_metric("cv_auc_std", trial["std_auc"])
+                for fold, auc in enumerate(trial["fold_aucs"]):
+                    mlflow.log_metric("cv_auc", auc, step=fold)
+                mlflow.set_tag("cached_folds", trial["cached_folds"])
+            print(f"{trial['family']} {trial['params']}: CV AUC {trial['mean_auc']:.4f} "
+                  f"(+/- {trial['std_auc']:.4f}, {trial['cached_folds']}/{folds} folds cached)")
+
+        best = results[0]
+        best_model_name = best["family"]
+        # The single final refit gets all n_jobs threads; the saved model then
+        # scores single-threaded like the CV candidates
+        best_model = make_estimator(best["family"], best["params"], n_jobs=n_jobs).fit(X_train, y_train)
+        best_model.set_params(n_jobs=1)
+        y_prob = best_model.predict_proba(X_test)[:, 1]
+        best_auc = roc_auc_score(y_test, y_prob)
+        mlflow.log_param("best_family", best_model_name)
+        mlflow.log_params({f"best_{k}": v for k, v in best["params"].items()})
+        mlflow.log_metric("holdout_auc", best_auc)
+        mlflow.sklearn.log_model(best_model, "model")
             
     # Save Best Model Locally
-    print(f"Best Model: {best_model_name} with AUC: {best_auc}")
+    print(f"Best Model: {best_model_name} {best['params']} with holdout AUC: {best_auc}")
     os.makedirs("CreditPathAI/backend/app/artifacts", exist_ok=True)
     joblib.dump(best_model, "CreditPathAI/backend/app/artifacts/best_model.pkl")
-    print("Model saved.")
+    # Pickle-free copy for multi-worker serving (serve.py)
+    try:
+        export_shared_model(best_model, "CreditPathAI/backend/app/artifacts/shared")
+    except ValueError as e:
+        print(f"Shared export skipped: {e}")
+    # NumPy-only compiled copy (CREDITPATH_MODEL_FORMAT=compiled)
+    try:
+        export_compiled_model(best_model, "CreditPathAI/backend/app/artifacts/compiled")
+    except ValueError as e:
+        print(f"Compiled export skipped: {e}")
+    # Versioned copy; APIs watching the registry swap to it without a restart
+    version = register_model(
+        best_model, REGISTRY_DIR,
+        metrics={"holdout_auc": float(best_auc), "cv_auc_mean": best["mean_auc"], "cv_auc_std": best["std_auc"]},
+        training_hash=data_fingerprint(X_train.to_numpy(), y_train.to_numpy()),
+        params={"family": best_model_name, **best["params"]},
+    )
+    print(f"Model saved and registered as {version}.")
 
 if __name__ == "__main__":
-    train_models()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--families", nargs="+", choices=list(SEARCH_SPACES), help="Model families to search (default: all)")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes (-1 = all cores)")
+    parser.add_argument("--input", help="Training export to read (default: the newer of the Parquet and CSV exports)")
+    parser.add_argument("--no-cache", action="store_true", help="Refit every fold instead of reusing cached ones")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Stream the training export out of core instead of loading it (see incremental_training.py)")
+    parser.add_argument("--family", choices=["auto", "xgboost", "linear"], default="auto",
+                        help="Model family with --incremental (auto = family of the current model)")
+    parser.add_argument("--month", help="With --incremental: only train on this issue month (YYYY-MM)")
+    parser.add_argument("--from-scratch", action="store_true", help="With --incremental: do not warm-start")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS)
+    args = parser.parse_args()
+    if args.incremental:
+        train_incremental(
+            args.input or latest_export_path(), family=args.family,
+            warm_start=not args.from_scratch, batch_rows=args.batch_rows,
+            filters=[("issue_month", "=", args.month)] if args.month else None, registry_dir=REGISTRY_DIR,
+        )
+    else:
+        train_models(families=args.families, folds=args.folds, n_jobs=args.n_jobs,
+                     cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR, data_path=args.input)
@@ -0,0 +1,166 @@
+import os
+import shutil
+import pandas as pd
+
+# Training export written by features.calculate_features(_streaming) and read
+# by train.py. The default is a zstd-compressed Parquet dataset partitioned by
+# issue month (issue_month=YYYY-MM/part-0.parquet); CSV is kept as an option.
+PARQUET_DIR = "CreditPathAI/data/processed/training_data"
+CSV_PATH = "CreditPathAI/data/processed/training_data.csv"
+EXPORT_FORMATS = ("parquet", "csv")
+PARTITION_COLUMN = "issue_month"
+PARQUET_COMPRESSION = "zstd"
+ROW_GROUP_ROWS = 128 * 1024
+MAX_BUFFERED_ROWS = 256 * 1024
+
+# Duplicate join keys of the loan/borrower/features merge (equal to loan_id
+# and borrower_id) are left out of the columnar export
+DROPPED_COLUMNS = ["id", "id_borrower"]
+
+def _arrow_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("loan_id", pa.int64()),
+        ("borrower_id", pa.int64()),
+        ("amount", pa.float64()),
+        ("term_months", pa.int32()),
+        ("interest_rate", pa.float64()),
+        ("installment", pa.float64()),
+        ("grade", pa.dictionary(pa.int8(), pa.string())),
+        ("issue_date", pa.timestamp("us")),
+        ("loan_status", pa.dictionary(pa.int8(), pa.string())),
+        ("full_name", pa.string()),
+        ("credit_score", pa.int32()),
+        ("annual_income", pa.float64()),
+        ("employment_years", pa.int32()),
+        ("home_ownership", pa.dictionary(pa.int8(), pa.string())),
+        ("repayment_velocity", pa.float64()),
+        ("credit_utilization_ratio", pa.float64()),
+        ("delinquency_freq", pa.int32()),
+        ("debt_to_income_ratio", pa.float64()),
+        ("payment_consistency_score", pa.float64()),
+        ("default_probability", pa.float64()),
+        ("risk_segment", pa.dictionary(pa.int8(), pa.string())),
+        ("recommended_action", pa.dictionary(pa.int8(), pa.string())),
+        (PARTITION_COLUMN, pa.string()),
+    ])
+
+def to_arrow_table(export_df):
+    """
+    Typed Arrow table of a training-export frame (see features._training_export_frame).
+    Columns outside the export schema are dropped.
+    """
+    import pyarrow as pa
+    df = export_df.drop(columns=[c for c in DROPPED_COLUMNS if c in export_df.columns])
+    issue_date = pd.to_datetime(df["issue_date"])
+    df = df.assign(issue_date=issue_date, **{PARTITION_COLUMN: issue_date.dt.strftime("%Y-%m")})
+    fields = [field for field in _arrow_schema() if field.name in df.columns]
+    return pa.Table.from_pandas(df[[f.name for f in fields]], schema=pa.schema(fields), preserve_index=False)
+
+class TrainingDataWriter:
+    """
+    Appends training-export chunks to a CSV file or a partitioned Parquet
+    dataset. Output goes to a temporary sibling path that replaces `path` on
+    close(), so readers never see a half-written export.
+
+    Parquet output keeps one file per issue month. Rows are buffered per
+    partition and written as row groups of up to row_group_rows; when more than
+    max_buffered_rows are pending the largest partition is flushed early, which
+    bounds memory independently of the number of partitions. Rows without an
+    issue date have no partition and are left out (counted in dropped_rows).
+    """
+
+    def __init__(self, path: str, export_format: str = "parquet",
+                 row_group_rows: int = ROW_GROUP_ROWS, max_buffered_rows: int = MAX_BUFFERED_ROWS):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown training export format: {export_format}")
+        self.path = path
+        self.export_format = export_format
+        self.tmp_path = path + ".tmp"
+        self.row_group_rows = row_group_rows
+        self.max_buffered_rows = max_buffered_rows
+        self.chunks = 0
+        self.dropped_rows = 0
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._remove(self.tmp_path)
+        self._csv = open(self.tmp_path, "w", newline="") if export_format == "csv" else None
+        self._writers = {}
+        self._pending = {}
+        self._pending_rows = 0
+
+    @staticmethod
+    def _remove(path):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def _flush(self, partition):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.concat_tables(self._pending.pop(partition))
+        self._pending_rows -= table.num_rows
+        writer = self._writers.get(partition)
+        if writer is None:
+            part_dir = os.path.join(self.tmp_path, f"{PARTITION_COLUMN}={partition}")
+            os.makedirs(part_dir, exist_ok=True)
+            writer = pq.ParquetWriter(os.path.join(part_dir, "part-0.parquet"), table.schema,
+                                      compression=PARQUET_COMPRESSION)
+            self._writers[partition] = writer
+        writer.write_table(table, row_group_size=self.row_group_rows)
+
+    def write(self, export_df):
+        if self._csv is not None:
+            export_df.to_csv(self._csv, header=self.chunks == 0, index=False)
+        else:
+            import pyarrow.compute as pc
+            table = to_arrow_table(export_df)
+            months = table[PARTITION_COLUMN]
+            table = table.drop_columns([PARTITION_COLUMN])
+            self.dropped_rows += months.null_count
+            for month in pc.unique(months).drop_null().to_pylist():
+                part = table.filter(pc.equal(months, month))
+                self._pending.setdefault(month, []).append(part)
+                self._pending_rows += part.num_rows
+                if sum(t.num_rows for t in self._pending[month]) >= self.row_group_rows:
+                    self._flush(month)
+            while self._pending_rows > self.max_buffered_rows:
+                self._flush(max(self._pending, key=lambda m: sum(t.num_rows for t in self._pending[m])))
+        self.chunks += 1
+
+    def close(self):
+        if self._csv is not None:
+            self._csv.close()
+        else:
+            for partition in list(self._pending):
+                self._flush(partition)
+            for writer in self._writers.values():
+                writer.close()
+            os.makedirs(self.tmp_path, exist_ok=True)
+            if self.dropped_rows:
+                print(f"Dropped {self.dropped_rows} rows without {PARTITION_COLUMN} (null issue_date) from {self.path}.")
+        self._remove(self.path)
+        os.replace(self.tmp_path, self.path)
+
+def default_export_path(export_format: str) -> str:
+    return PARQUET_DIR if export_format == "parquet" else CSV_PATH
+
+def latest_export_path(paths=(PARQUET_DIR, CSV_PATH)):
+    """The most recently written of the existing training exports, or None."""
+    existing = [p for p in paths if os.path.exists(p)]
+    return max(existing, key=os.path.getmtime) if existing else None
+
+def load_training_data(path: str, columns, filters=None) -> pd.DataFrame:
+    """
+    Reads only `columns` of a training export. Parquet datasets (directories or
+    files) are opened memory-mapped and projected at the column-chunk level;
+    `filters` (pyarrow filter expressions, e.g. [("issue_month", ">=", "2024-01")])
+    prune whole partitions. CSV exports are parsed with usecols.
+    """
+    if os.path.isdir(path) or path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=list(columns), filters=filters, memory_map=True)
+        return table.to_pandas()
+    return pd.read_csv(path, usecols=list(columns))
@@ -0,0 +1,66 @@
+"""
+GET /borrowers page latency at increasing depth: OFFSET (?skip=) versus keyset (?cursor=).
+
+Usage:
+    python backend/benchmarks/bench_borrowers_pagination.py [--loans 5000000] [--limit 50] [--repeat 20]
+
+Builds a throwaway SQLite database with --loans loans and calls the endpoint
+function directly (no HTTP) so the numbers are query + row-building cost.
+Keyset latency should stay flat while OFFSET grows linearly with depth.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from fastapi.responses import Response
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from common import populate_loans_db, percentiles, timed
+from database import Base
+import main as api
+
+DEPTHS = (0.0, 0.1, 0.5, 0.9, 0.999)
+
+def page_latency_ms(db, repeat, **params):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        api.get_borrowers(response=Response(), db=db, **params)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples, (50,))["p50"]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=5_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        _, populate_s = timed(populate_loans_db, engine, args.loans)
+        print(f"Populated {args.loans:,} loans in {populate_s:.1f}s")
+        db = sessionmaker(bind=engine)()
+
+        # Cursors for the credit_score sort at each depth, read once from the data
+        ordered = db.execute(
+            api.select(api.Borrower.credit_score, api.Borrower.id, api.Loan.id)
+            .join(api.Loan, api.Loan.borrower_id == api.Borrower.id)
+            .order_by(api.Borrower.credit_score, api.Borrower.id, api.Loan.id)
+        ).all()
+
+        print(f"{'depth':>10} {'offset_ms':>10} {'keyset_id_ms':>13} {'keyset_score_ms':>16}")
+        for depth in DEPTHS:
+            skip = int(args.loans * depth)
+            offset_ms = page_latency_ms(db, args.repeat, skip=skip, limit=args.limit)
+            keyset_ms = page_latency_ms(db, args.repeat, cursor=str(skip), limit=args.limit)
+            score_cursor = ":".join(str(v) for v in ordered[skip]) if depth else None
+            score_ms = page_latency_ms(db, args.repeat, cursor=score_cursor, sort="credit_score", limit=args.limit)
+            print(f"{skip:>10,} {offset_ms:10.2f} {keyset_ms:13.2f} {score_ms:16.2f}")
+        db.close()
+
+if __name__ == "__main__":
+    main()
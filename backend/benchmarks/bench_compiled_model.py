@@ -0,0 +1,115 @@
+"""
+Compiled (NumPy-only) model evaluation versus the libraries: scoring
+throughput per batch size, agreement, and the cold start of a process that
+loads the model and scores one row.
+
+Usage:
+    python backend/benchmarks/bench_compiled_model.py [--rows 20000] [--trees 300] [--depth 5]
+
+Fits an XGBClassifier and a LogisticRegression on synthetic data, then times
+predict_proba, the native fast path of scoring.build_fast_predictor
+(booster.inplace_predict / BLAS + expit) and the compiled evaluator. Cold
+start runs in fresh interpreters: joblib.load of the pickle versus
+load_compiled_model, reporting wall time, peak RSS and which heavy modules
+got imported.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import xgboost as xgb
+from sklearn.linear_model import LogisticRegression
+
+from common import APP_DIR
+from compiled_model import compile_model, export_compiled_model
+from scoring import FEATURE_COLUMNS, build_fast_predictor
+
+COLD_START = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {app_dir!r})
+import numpy as np
+from scoring import build_fast_predictor
+if {compiled!r}:
+    from compiled_model import load_compiled_model
+    model = load_compiled_model({path!r})
+else:
+    import joblib
+    model = joblib.load({path!r})
+p = build_fast_predictor(model)(np.zeros((1, 8)))
+seconds = time.perf_counter() - start
+heavy = [m for m in ("xgboost", "sklearn", "scipy", "pandas") if m in sys.modules]
+# VmHWM, not ru_maxrss: Linux carries ru_maxrss over from the forking parent
+with open("/proc/self/status") as f:
+    peak_kib = next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+print(seconds, peak_kib / 1024, ",".join(heavy) or "-")
+"""
+
+def make_data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, len(FEATURE_COLUMNS))) * [1, 1, 3, 100, 1e4, 0.05, 3e4, 50]
+    y = (X[:, 0] + X[:, 2] / 3 + X[:, 7] / 50 + rng.normal(size=n) > 0).astype(int)
+    return X, y
+
+def rows_per_s(predict, X, batch, min_seconds=0.5):
+    calls, rows, start = 0, 0, time.perf_counter()
+    while time.perf_counter() - start < min_seconds or calls < 3:
+        offset = (calls * batch) % max(1, len(X) - batch)
+        predict(X[offset:offset + batch])
+        calls += 1
+        rows += batch
+    return rows / (time.perf_counter() - start)
+
+def cold_start(path, compiled, repeat=3):
+    code = COLD_START.format(app_dir=os.path.abspath(APP_DIR), path=path, compiled=compiled)
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        seconds, rss, heavy = out.stdout.split()
+        runs.append((float(seconds), float(rss), heavy))
+    return min(runs)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--depth", type=int, default=5)
+    args = parser.parse_args()
+
+    X, y = make_data(args.rows)
+    X_test, _ = make_data(args.rows, seed=1)
+    models = {
+        f"xgboost {args.trees}x{args.depth}": xgb.XGBClassifier(n_estimators=args.trees, max_depth=args.depth,
+                                                                learning_rate=0.05, n_jobs=1).fit(X, y),
+        "logistic_regression": LogisticRegression(max_iter=1000).fit(X, y),
+    }
+
+    print(f"{'model':<22} {'path':<14} {'batch':>6} {'rows/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, model in models.items():
+            compiled = compile_model(model)
+            diff = np.abs(compiled.predict_proba(X_test)[:, 1] - model.predict_proba(X_test)[:, 1]).max()
+            paths = {"predict_proba": lambda X, m=model: m.predict_proba(X)[:, 1],
+                     "native": build_fast_predictor(model),
+                     "compiled": compiled.fast_predictor()}
+            for batch in (1, 64, 10000):
+                for path, predict in paths.items():
+                    print(f"{name:<22} {path:<14} {batch:>6} {rows_per_s(predict, X_test, batch):12,.0f}")
+            print(f"{name:<22} max |compiled - predict_proba| = {diff:.2e}\n")
+
+            pickle_path = os.path.join(tmp, f"{name.split()[0]}.pkl")
+            compiled_dir = os.path.join(tmp, f"{name.split()[0]}_compiled")
+            joblib.dump(model, pickle_path)
+            export_compiled_model(model, compiled_dir)
+            for label, path, is_compiled in (("pickle", pickle_path, False), ("compiled", compiled_dir, True)):
+                seconds, rss, heavy = cold_start(path, is_compiled)
+                print(f"cold start {name:<22} {label:<9} {seconds * 1000:7.0f}ms  peak {rss:6.0f} MiB  imports: {heavy}")
+            print()
+
+if __name__ == "__main__":
+    main()
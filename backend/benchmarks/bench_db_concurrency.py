@@ -0,0 +1,144 @@
+"""
+Concurrent GET /loans/{id} and GET /borrowers against SQLite: the previous
+engine (create_engine defaults, rollback journal) versus database.make_engine
+(WAL, busy_timeout, mmap/cache PRAGMAs, sized pool).
+
+Usage:
+    python backend/benchmarks/bench_db_concurrency.py [--loans 200000] [--seconds 5] [--concurrency 32] [--write-every-ms 20] [--write-rows 5000]
+
+Builds a throwaway database, then drives the ASGI app in-process
+(httpx.ASGITransport) for --seconds per configuration while a writer thread
+rescores --write-rows loan_features rows every --write-every-ms (like the
+risk_scoring job running next to the API). Reports requests/sec, latency
+percentiles, failed requests and writer transactions that hit "database is
+locked". With CREDITPATH_DB_ASYNC=1 (needs aiosqlite) the async endpoints are
+measured on a make_async_engine engine as well.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+
+import httpx
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from common import percentiles, populate_loans_db, timed
+from database import Base, make_async_engine, make_engine
+from models import LoanFeatures
+import main as api
+
+def writer(engine, num_loans, rows, every_ms, stop, counts):
+    rng = random.Random(0)
+    while not stop.wait(every_ms / 1000):
+        start_id = rng.randint(1, max(1, num_loans - rows))
+        try:
+            with engine.begin() as conn:
+                conn.execute(update(LoanFeatures)
+                             .where(LoanFeatures.loan_id.between(start_id, start_id + rows - 1))
+                             .values(default_probability=rng.random()))
+            counts["ok"] += 1
+        except OperationalError:
+            counts["locked"] += 1
+
+async def drive(client, seconds, concurrency, num_loans):
+    latencies, failures = [], 0
+    deadline = time.perf_counter() + seconds
+    rng = random.Random(1)
+
+    async def worker():
+        nonlocal failures
+        while time.perf_counter() < deadline:
+            if rng.random() < 0.5:
+                url = f"/loans/{rng.randint(1, num_loans)}"
+            else:
+                url = f"/borrowers?limit=20&cursor={rng.randint(0, num_loans - 20)}"
+            start = time.perf_counter()
+            response = await client.get(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+            failures += response.status_code != 200
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return len(latencies) / (time.perf_counter() - start), percentiles(latencies, (50, 99)), failures
+
+async def run_config(args, write_engine):
+    stop = threading.Event()
+    counts = {"ok": 0, "locked": 0}
+    thread = None
+    if args.write_every_ms:
+        thread = threading.Thread(target=writer, args=(write_engine, args.loans, args.write_rows, args.write_every_ms, stop, counts))
+        thread.start()
+    try:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return (*await drive(client, args.seconds, args.concurrency, args.loans), counts)
+    finally:
+        stop.set()
+        if thread is not None:
+            thread.join()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=200_000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--write-every-ms", type=float, default=20.0, help="0 = read-only")
+    parser.add_argument("--write-rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seed_engine = create_engine(url)
+        Base.metadata.create_all(bind=seed_engine)
+        _, populate_s = timed(populate_loans_db, seed_engine, args.loans)
+        seed_engine.dispose()
+        print(f"Populated {args.loans:,} loans in {populate_s:.1f}s")
+
+        # The previous engine is measured first: once a connection switches the
+        # file to WAL it stays in WAL mode
+        configs = [
+            ("default", lambda: create_engine(url, connect_args={"check_same_thread": False})),
+            ("tuned", lambda: make_engine(url)),
+        ]
+        for label, factory in configs:
+            engine = factory()
+            SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+            def override():
+                db = SessionLocal()
+                try:
+                    yield db
+                finally:
+                    db.close()
+
+            api.app.dependency_overrides[api.get_db] = override
+            rps, lat, failures, writes = asyncio.run(run_config(args, engine))
+            print(f"{label:<8} {rps:8,.0f} req/s  p50={lat['p50']:6.2f}ms  p99={lat['p99']:7.2f}ms  "
+                  f"failed={failures}  writes ok={writes['ok']} locked={writes['locked']}")
+            api.app.dependency_overrides.clear()
+            engine.dispose()
+
+        if api.async_engine is not None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker
+            async_engine = make_async_engine(url)
+            AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+            async def async_override():
+                async with AsyncSessionLocal() as db:
+                    yield db
+
+            api.app.dependency_overrides[api.get_async_db] = async_override
+            write_engine = make_engine(url)
+            rps, lat, failures, writes = asyncio.run(run_config(args, write_engine))
+            print(f"{'async':<8} {rps:8,.0f} req/s  p50={lat['p50']:6.2f}ms  p99={lat['p99']:7.2f}ms  "
+                  f"failed={failures}  writes ok={writes['ok']} locked={writes['locked']}")
+            write_engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Scoring existing loans by id: /loans/{loan_id}/risk and POST /loans/risk
+served from the online feature store versus reading the features from
+SQLite per request, plus the store's load/refresh cost and memory compared
+with holding the same loans as ORM objects.
+
+Usage:
+    python backend/benchmarks/bench_feature_store.py [--loans 200000] [--requests 5000] [--bulk 1000]
+
+Requests go through the ASGI app in-process (httpx.ASGITransport), one at a
+time, against a throwaway database filled by common.populate_loans_db.
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import httpx
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from common import percentiles, populate_loans_db, timed
+from database import Base, make_engine
+from feature_store import OnlineFeatureStore
+from models import Loan, LoanFeatures
+import main as api
+
+async def drive(make_request, requests):
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+        start = time.perf_counter()
+        for i in range(requests):
+            t0 = time.perf_counter()
+            (await make_request(client, i)).raise_for_status()
+            latencies.append((time.perf_counter() - t0) * 1000)
+        return requests / (time.perf_counter() - start), percentiles(latencies)
+
+def orm_footprint_mib(Session, num_loans):
+    tracemalloc.start()
+    with Session() as db:
+        rows = (db.query(LoanFeatures)
+                .options(joinedload(LoanFeatures.loan).joinedload(Loan.borrower))
+                .limit(num_loans).all())
+        current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(rows), current / 2**20
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--bulk", type=int, default=1000, help="Loan ids per POST /loans/risk")
+    parser.add_argument("--orm-loans", type=int, default=50_000, help="Loans loaded as ORM objects for the memory comparison")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        populate_loans_db(engine, args.loans)
+        # Features written an hour ago, so the load is past the refresh overlap window
+        now = datetime.datetime.utcnow()
+        with engine.begin() as conn:
+            conn.execute(update(LoanFeatures).values(updated_at=now - datetime.timedelta(hours=1)))
+        Session = sessionmaker(bind=engine)
+        api.SessionLocal = Session
+
+        store = OnlineFeatureStore(Session)
+        loans, load_s = timed(store.load)
+        store_mib = store.stats()["memory_bytes"] / 2**20
+        print(f"load: {loans:,} loans in {load_s:.2f}s, {store_mib:.1f} MiB "
+              f"({store.stats()['memory_bytes'] / loans:.0f} bytes/loan)")
+        n_orm, orm_mib = orm_footprint_mib(Session, min(args.orm_loans, args.loans))
+        print(f"ORM objects (LoanFeatures+Loan+Borrower): {n_orm:,} loans, {orm_mib:.1f} MiB "
+              f"({orm_mib * 2**20 / n_orm:.0f} bytes/loan)")
+
+        # Incremental refresh after 1% of the feature rows changed
+        _, idle_s = timed(store.refresh)
+        changed_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=10)
+        with engine.begin() as conn:
+            conn.execute(update(LoanFeatures).where(LoanFeatures.loan_id % 100 == 0).values(updated_at=changed_at))
+        refreshed, refresh_s = timed(store.refresh)
+        print(f"refresh: nothing changed {idle_s * 1000:.1f}ms; {refreshed:,} rows changed {refresh_s * 1000:.1f}ms")
+
+        rng = random.Random(0)
+        ids = [rng.randint(1, args.loans) for _ in range(args.requests)]
+        bulk_ids = [[rng.randint(1, args.loans) for _ in range(args.bulk)] for _ in range(max(1, args.requests // 50))]
+        single = lambda client, i: client.get(f"/loans/{ids[i]}/risk")
+        bulk = lambda client, i: client.post("/loans/risk", json={"loan_ids": bulk_ids[i]})
+
+        print(f"\n{'source':<9} {'endpoint':<24} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for label, source in (("database", None), ("store", store)):
+            api.feature_store = source
+            for name, request, n in (("/loans/{id}/risk", single, len(ids)),
+                                     (f"/loans/risk x{args.bulk}", bulk, len(bulk_ids))):
+                rps, p = asyncio.run(drive(request, n))
+                print(f"{label:<9} {name:<24} {rps:8,.0f} {p['p50']:8.3f} {p['p99']:8.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compare the columnar feature engine with the original per-loan iterrows loop.
+
+Usage:
+    python backend/benchmarks/bench_features.py [--sizes 10000 100000 1000000] [--legacy-max 10000]
+
+The legacy path is O(loans x repayments), so by default it only runs at sizes
+up to --legacy-max; at those sizes the two outputs are also checked for equality.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import make_loan_frames, timed
+from features import compute_loan_features, _compute_loan_features_iterrows
+
+NOW = pd.Timestamp("2025-01-01")
+
+def _check_equal(fast_df, legacy_df):
+    for col in fast_df.columns:
+        if col == "credit_utilization_ratio":
+            continue  # random mock column
+        a, b = fast_df[col].to_numpy(), legacy_df[col].to_numpy()
+        if a.dtype.kind in "fi":
+            assert np.allclose(a, b.astype(a.dtype)), f"Mismatch in {col}"
+        else:
+            assert (a == b).all(), f"Mismatch in {col}"
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'loans':>10} {'repayments':>12} {'vectorized_s':>14} {'iterrows_s':>12} {'speedup':>9}")
+    for n in args.sizes:
+        loans_df, repayments_df = make_loan_frames(n, now=NOW)
+        fast_df, fast_s = timed(compute_loan_features, loans_df, repayments_df, now=NOW)
+
+        if n <= args.legacy_max:
+            legacy_df, legacy_s = timed(_compute_loan_features_iterrows, loans_df, repayments_df, now=NOW)
+            _check_equal(fast_df, legacy_df)
+            legacy_col, speedup = f"{legacy_s:12.3f}", f"{legacy_s / fast_s:8.1f}x"
+        else:
+            legacy_col, speedup = f"{'skipped':>12}", f"{'-':>9}"
+
+        print(f"{n:>10} {len(repayments_df):>12} {fast_s:14.3f} {legacy_col} {speedup}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Peak memory of the in-memory calculate_features versus the streaming variant.
+
+Usage:
+    python backend/benchmarks/bench_features_memory.py [--sizes 100000 400000] [--chunk-sizes 10000 50000]
+
+Each size gets a throwaway SQLite database (one borrower per loan, ~10
+repayments per loan). Peak Python heap (tracemalloc, which includes numpy and
+pandas buffers) is reported per run; the streaming peak should stay flat as
+the tables grow and scale with the chunk size instead.
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+from sqlalchemy import create_engine
+
+from common import populate_loans_db, timed
+from database import Base
+from features import calculate_features, calculate_features_streaming
+
+def profiled(fn, *args, **kwargs):
+    tracemalloc.start()
+    _, seconds = timed(fn, *args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20, seconds
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 400_000])
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--skip-in-memory", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'loans':>10} {'mode':>18} {'peak_mib':>10} {'seconds':>9}")
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(bind=engine)
+            populate_loans_db(engine, n, with_features=False, with_repayments=True)
+            export_path = os.path.join(tmp, "processed", "training_data.csv")
+
+            if not args.skip_in_memory:
+                peak, seconds = profiled(calculate_features, bind=engine, export_path=export_path)
+                print(f"{n:>10} {'in-memory':>18} {peak:10.1f} {seconds:9.2f}")
+            for chunk_size in args.chunk_sizes:
+                peak, seconds = profiled(
+                    calculate_features_streaming, bind=engine, chunk_size=chunk_size, export_path=export_path
+                )
+                print(f"{n:>10} {f'stream/{chunk_size}':>18} {peak:10.1f} {seconds:9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Synthetic data generation: the original generate_synthetic_data (iterrows +
+per-installment loop) versus generate_sharded_data (vectorized, sharded).
+
+Usage:
+    python backend/benchmarks/bench_generate_data.py [--legacy-samples 20000] [--samples 1000000] [--shard-size 250000] [--n-jobs 1]
+
+Both write CSVs into a temporary directory. Reports wall time, repayment rows
+per second and the peak RSS of the process doing the generation.
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import common  # noqa: F401 (puts backend/app on sys.path)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data"))
+from generate_data import generate_sharded_data, generate_synthetic_data
+
+def peak_rss_mib():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+def count_rows(output_dir, prefix):
+    total = 0
+    for name in os.listdir(output_dir):
+        if name.startswith(prefix):
+            with open(os.path.join(output_dir, name), "rb") as f:
+                total += sum(1 for _ in f) - 1
+    return total
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--legacy-samples", type=int, default=20000)
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--shard-size", type=int, default=250000)
+    parser.add_argument("--n-jobs", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_dir = os.path.join(tmp, "legacy")
+        start = time.perf_counter()
+        generate_synthetic_data(args.legacy_samples, legacy_dir)
+        legacy_s = time.perf_counter() - start
+        legacy_rows = count_rows(legacy_dir, "repayments")
+        legacy_rss = peak_rss_mib()
+
+        sharded_dir = os.path.join(tmp, "sharded")
+        start = time.perf_counter()
+        rows = generate_sharded_data(args.samples, sharded_dir, args.shard_size, args.n_jobs, as_of="2025-01-01")
+        sharded_s = time.perf_counter() - start
+
+        print(f"{'generator':<10} {'loans':>10} {'repayments':>12} {'seconds':>8} {'repayments/s':>13} {'peak MiB':>9}")
+        print(f"{'legacy':<10} {args.legacy_samples:>10,} {legacy_rows:>12,} {legacy_s:8.1f} "
+              f"{legacy_rows / legacy_s:13,.0f} {legacy_rss:9.0f}")
+        print(f"{'sharded':<10} {args.samples:>10,} {rows:>12,} {sharded_s:8.1f} "
+              f"{rows / sharded_s:13,.0f} {peak_rss_mib():9.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Incremental feature maintenance versus a full recompute.
+
+Usage:
+    python backend/benchmarks/bench_incremental_features.py [--loans 200000] [--deltas 100 1000 10000 100000]
+
+Builds a throwaway SQLite database, establishes the running repayment state,
+then appends repayment deltas of increasing size and times
+features.update_features_incremental for each. A full recompute (read all
+tables + compute_loan_features) is timed for reference.
+"""
+import argparse
+import datetime
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, insert, select, func
+
+from common import populate_loans_db, timed
+from database import Base
+from features import compute_loan_features, update_features_incremental
+from models import Loan, Repayment
+
+def full_recompute(engine):
+    with engine.connect() as conn:
+        loans_df = pd.read_sql(select(Loan), conn)
+        repayments_df = pd.read_sql(select(Repayment), conn)
+    return compute_loan_features(loans_df, repayments_df)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=200_000)
+    parser.add_argument("--deltas", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        populate_loans_db(engine, args.loans, with_features=False, with_repayments=True)
+
+        with engine.connect() as conn:
+            total = conn.execute(select(func.count(Repayment.id))).scalar()
+            _, init_s = timed(update_features_incremental, conn)
+            print(f"{args.loans:,} loans, {total:,} repayments; initial state build {init_s:.2f}s")
+            _, full_s = timed(full_recompute, engine)
+            print(f"full recompute (read + compute_loan_features): {full_s:.2f}s")
+
+            rng = np.random.default_rng(0)
+            next_id = total + 1
+            for size in args.deltas:
+                conn.execute(insert(Repayment), [
+                    {"id": next_id + k, "loan_id": int(l), "payment_amount": float(a),
+                     "payment_date": datetime.datetime(2025, 1, 1)}
+                    for k, (l, a) in enumerate(zip(rng.integers(1, args.loans + 1, size), rng.uniform(50, 1500, size)))
+                ])
+                conn.commit()
+                next_id += size
+                loans_updated, delta_s = timed(update_features_incremental, conn)
+                print(f"delta {size:>8,} repayments -> {loans_updated:>8,} loans updated in {delta_s:7.3f}s "
+                      f"({delta_s / size * 1e6:6.1f}us per repayment)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Out-of-core and warm-started training versus the in-memory refit.
+
+Usage:
+    python backend/benchmarks/bench_incremental_training.py [--rows 2000000] [--months 24] [--batch-rows 250000]
+
+Writes a synthetic partitioned Parquet training export (with a learnable
+target), then runs each training mode in a fresh process and reports wall
+time, peak RSS (ru_maxrss) and holdout AUC:
+  - xgb in-memory: load every row, XGBClassifier.fit (the previous train.py path)
+  - xgb external: ExtMemQuantileDMatrix over streamed batches, from scratch
+  - xgb warm start: 20 extra rounds on the newest month only
+  - sgd external / sgd warm start: the same for the streamed linear model
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from common import timed
+from scoring import FEATURE_COLUMNS
+from training_data import TrainingDataWriter, load_training_data
+
+def write_dataset(path, rows, months, chunk_rows=250_000, seed=0):
+    rng = np.random.default_rng(seed)
+    month_starts = pd.date_range("2023-01-01", periods=months, freq="MS")
+    writer = TrainingDataWriter(path, "parquet")
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+        X = rng.normal(size=(n, len(FEATURE_COLUMNS)))
+        logits = 1.2 * X[:, 0] - X[:, 2] + 0.6 * X[:, 4] * X[:, 5] + 0.5 * np.abs(X[:, 7]) - 1.5
+        df = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+        # Integer-typed export columns on realistic scales
+        df["delinquency_freq"] = np.round(np.clip(X[:, 2] * 3 + 6, 0, None))
+        df["credit_score"] = np.round(700 + X[:, 7] * 50)
+        df["amount"] = np.round(15000 + X[:, 4] * 5000, 2)
+        df["loan_id"] = np.arange(start + 1, start + n + 1)
+        df["default_probability"] = (rng.random(n) < 1 / (1 + np.exp(-logits))).astype(float)
+        # Rows arrive in issue-date order, like loans do
+        df["issue_date"] = month_starts[(np.arange(start, start + n) * months) // rows]
+        writer.write(df)
+    writer.close()
+    return month_starts[-1].strftime("%Y-%m")
+
+def run_mode(mode, data_path, model_path, batch_rows, last_month):
+    from incremental_training import _predictor, holdout_auc, train_incremental
+
+    if mode == "xgb_in_memory":
+        import xgboost as xgb
+        df = load_training_data(data_path, FEATURE_COLUMNS + ["default_probability", "loan_id"])
+        train = df[df["loan_id"] % 10 != 0]
+        model = xgb.XGBClassifier(n_estimators=100, max_depth=5, learning_rate=0.1, tree_method="hist")
+        model.fit(train[FEATURE_COLUMNS].to_numpy(), train["default_probability"].to_numpy())
+        auc = holdout_auc(data_path, _predictor(model), batch_rows)
+    else:
+        family = "xgboost" if mode.startswith("xgb") else "linear"
+        warm = mode.endswith("warm_start")
+        _, auc = train_incremental(
+            data_path, family, warm_start=warm, model_path=model_path,
+            shared_dir=os.path.join(os.path.dirname(model_path), "shared"),
+            compiled_dir=os.path.join(os.path.dirname(model_path), "compiled"), batch_rows=batch_rows,
+            filters=[("issue_month", "=", last_month)] if warm else None, num_boost_round=20 if warm else 100,
+        )
+    return auc
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--batch-rows", type=int, default=250_000)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    parser.add_argument("--model", help=argparse.SUPPRESS)
+    parser.add_argument("--last-month", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: one training mode, result as the last stdout line
+        auc, seconds = timed(run_mode, args.mode, args.data, args.model, args.batch_rows, args.last_month)
+        peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(json.dumps({"seconds": seconds, "peak_mib": peak_mib, "auc": auc}))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, "training_data")
+        last_month = write_dataset(data_path, args.rows, args.months)
+        model_path = os.path.join(tmp, "artifacts", "best_model.pkl")
+        print(f"{args.rows:,} rows over {args.months} months, batch_rows={args.batch_rows:,}")
+        print(f"{'mode':>16} {'seconds':>9} {'peak_rss_mib':>13} {'holdout_auc':>12}")
+        for mode in ("xgb_in_memory", "xgb_external", "xgb_warm_start", "sgd_external", "sgd_warm_start"):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode, "--data", data_path,
+                 "--model", model_path, "--batch-rows", str(args.batch_rows), "--last-month", last_month],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(out)
+            auc = f"{result['auc']:.4f}" if result["auc"] is not None else "-"
+            print(f"{mode:>16} {result['seconds']:9.2f} {result['peak_mib']:13.0f} {auc:>12}")
+
+if __name__ == "__main__":
+    main()
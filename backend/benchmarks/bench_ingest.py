@@ -0,0 +1,92 @@
+"""
+Ingestion throughput: ingest.ingest_data (streaming Core executemany bulk loader)
+versus the original ORM path (one object per row, add_all + commit per 1000 rows).
+
+Usage:
+    python backend/benchmarks/bench_ingest.py [--loans 100000] [--legacy-max 20000] [--delta-rows 50000]
+
+After the full load a daily repayments delta (new rows plus re-delivered
+ones) is applied to show that deltas cost time proportional to their size.
+"""
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from common import make_loan_frames, timed
+from database import Base
+from ingest import ingest_data
+from models import Borrower, Loan, Repayment
+
+def write_csvs(data_dir, num_loans):
+    loans_df, repayments_df = make_loan_frames(num_loans)
+    os.makedirs(data_dir, exist_ok=True)
+    loans_df[["borrower_id", "credit_score", "annual_income"]].rename(columns={"borrower_id": "id"}).assign(
+        full_name=lambda d: "Borrower_" + d["id"].astype(str), employment_years=5, home_ownership="RENT"
+    ).to_csv(os.path.join(data_dir, "borrowers.csv"), index=False)
+    loans_df[["id", "borrower_id", "amount", "term_months", "interest_rate", "issue_date", "loan_status"]].assign(
+        grade="A", installment=100.0
+    ).to_csv(os.path.join(data_dir, "loans.csv"), index=False)
+    repayments_df.to_csv(os.path.join(data_dir, "repayments.csv"), index=False)
+    return len(loans_df) * 2 + len(repayments_df)
+
+def legacy_ingest(engine, data_dir):
+    """The pre-bulk-loader implementation, kept here as the baseline."""
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    borrowers_df = pd.read_csv(os.path.join(data_dir, "borrowers.csv"))
+    db.add_all([Borrower(**row) for row in borrowers_df.to_dict(orient="records")])
+    db.commit()
+    loans_df = pd.read_csv(os.path.join(data_dir, "loans.csv"))
+    loans_df["issue_date"] = pd.to_datetime(loans_df["issue_date"])
+    db.add_all([Loan(**row) for row in loans_df.to_dict(orient="records")])
+    db.commit()
+    repayments_df = pd.read_csv(os.path.join(data_dir, "repayments.csv"))
+    repayments_df["payment_date"] = pd.to_datetime(repayments_df["payment_date"])
+    for i in range(0, len(repayments_df), 1000):
+        chunk = repayments_df.iloc[i:i + 1000]
+        db.add_all([Repayment(**row) for row in chunk.to_dict(orient="records")])
+        db.commit()
+    db.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=100_000)
+    parser.add_argument("--legacy-max", type=int, default=20_000)
+    parser.add_argument("--delta-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "raw")
+        total_rows = write_csvs(data_dir, args.loans)
+        print(f"{args.loans:,} loans -> {total_rows:,} rows across 3 files")
+
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bulk.db')}")
+        stats, bulk_s = timed(ingest_data, data_dir, bind=engine)
+        assert sum(s["rows"] for s in stats.values()) == total_rows
+        assert inspect(engine).get_indexes("repayments"), "indexes were not rebuilt"
+        print(f"bulk loader: {bulk_s:8.2f}s  {total_rows / bulk_s:12,.0f} rows/sec")
+
+        repayments = pd.read_csv(os.path.join(data_dir, "repayments.csv"))
+        redelivered = repayments.tail(args.delta_rows // 10)
+        new_rows = repayments.sample(args.delta_rows, replace=True, random_state=0).assign(
+            id=range(len(repayments) + 1, len(repayments) + args.delta_rows + 1)
+        )
+        pd.concat([redelivered, new_rows]).to_csv(os.path.join(data_dir, "repayments_delta.csv"), index=False)
+        stats, delta_s = timed(ingest_data, data_dir, bind=engine)
+        written = stats["repayments_delta.csv"]["rows_written"]
+        print(f"daily delta: {delta_s:8.2f}s  {len(redelivered) + len(new_rows):,} rows read, {written:,} written")
+
+        if args.loans <= args.legacy_max:
+            legacy_engine = create_engine(f"sqlite:///{os.path.join(tmp, 'legacy.db')}")
+            os.remove(os.path.join(data_dir, "repayments_delta.csv"))
+            _, legacy_s = timed(legacy_ingest, legacy_engine, data_dir)
+            print(f"ORM path:    {legacy_s:8.2f}s  {total_rows / legacy_s:12,.0f} rows/sec  ({legacy_s / bulk_s:.1f}x slower)")
+        else:
+            print("ORM path:    skipped (--legacy-max)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Overhead of the request/stage instrumentation on /predict: the app without
+InstrumentationMiddleware, with it (the default), and with the slow-request
+sampling profiler enabled as well.
+
+Usage:
+    python backend/benchmarks/bench_instrumentation.py [--requests 20000] [--repeat 3]
+
+Drives the ASGI app in-process (httpx.ASGITransport), one request at a time,
+with distinct payloads so every call reaches the model. Reports the best
+requests/sec of --repeat runs and p50/p99 latency, then prints the stage
+histogram sums from /metrics to show where /predict time goes.
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+import httpx
+from starlette.middleware import Middleware
+
+from common import percentiles
+from instrumentation import InstrumentationMiddleware, SlowRequestProfiler
+from prediction_cache import PredictionCache
+import main as api
+
+def payloads(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "repayment_velocity": rng.uniform(0, 1), "credit_utilization_ratio": rng.uniform(0, 1),
+        "delinquency_freq": rng.randint(0, 12), "payment_consistency_score": rng.uniform(0, 1000),
+        "amount": float(rng.randint(1000, 40000)), "interest_rate": rng.uniform(0.05, 0.25),
+        "annual_income": rng.lognormvariate(11, 0.5), "credit_score": float(rng.randint(580, 850)),
+    } for _ in range(n)]
+
+def set_middleware(profiler=None, enabled=True):
+    # add_middleware refuses once the app has served a request, so swap the
+    # entry in user_middleware and rebuild the stack directly
+    middleware = [m for m in api.app.user_middleware if m.cls is not InstrumentationMiddleware]
+    if enabled:
+        middleware.insert(0, Middleware(InstrumentationMiddleware, metrics=api.metrics, profiler=profiler))
+    api.app.user_middleware = middleware
+    api.app.middleware_stack = api.app.build_middleware_stack()
+
+async def drive(rows):
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+        start = time.perf_counter()
+        for row in rows:
+            t0 = time.perf_counter()
+            (await client.post("/predict", json=row)).raise_for_status()
+            latencies.append((time.perf_counter() - t0) * 1000)
+        return len(rows) / (time.perf_counter() - start), percentiles(latencies)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    api.prediction_cache = PredictionCache(max_entries=0)
+    rows = payloads(args.requests)
+    with tempfile.TemporaryDirectory() as profile_dir:
+        configs = (
+            ("no middleware", lambda: set_middleware(enabled=False)),
+            ("metrics", lambda: set_middleware()),
+            ("metrics+profiler", lambda: set_middleware(SlowRequestProfiler(1000, profile_dir, interval_ms=5))),
+        )
+        for label, configure in configs:
+            configure()
+            runs = [asyncio.run(drive(rows)) for _ in range(args.repeat)]
+            rps, p = max(runs, key=lambda r: r[0])
+            print(f"{label:<18} {rps:8,.0f} req/s  p50={p['p50']:.3f}ms p99={p['p99']:.3f}ms")
+
+    print("\n/predict stage time (mean per call):")
+    for (stage,), (_, total, count) in sorted(api.metrics.stage_latency._series.items()):
+        print(f"  {stage:<18} {total / count * 1e6:8.1f}us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Wall-clock scaling of model_search.run_search with the number of worker processes.
+
+Usage:
+    python backend/benchmarks/bench_model_search.py [--rows 20000] [--folds 5] [--n-jobs 1 2 4 8]
+
+Runs the full default search (LR, XGBoost, LightGBM grids x folds) on a
+synthetic training matrix without the fold cache for each worker count, then
+once more against a warm cache. Speedups are relative to n_jobs=1 and can only
+approach the worker count on a machine with at least that many cores.
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from common import timed
+from model_search import SEARCH_SPACES, run_search
+from sklearn.model_selection import ParameterGrid
+
+def make_data(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, 8))
+    logits = X[:, 0] - 0.8 * X[:, 2] + 0.5 * X[:, 4] * X[:, 5] + rng.normal(scale=1.0, size=rows)
+    return X, (logits > 1.0).astype(int)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    X, y = make_data(args.rows)
+    candidates = sum(len(ParameterGrid(space)) for space in SEARCH_SPACES.values())
+    print(f"{candidates} candidates x {args.folds} folds = {candidates * args.folds} fits "
+          f"on {args.rows:,} rows; {os.cpu_count()} CPU(s) available")
+    print(f"{'n_jobs':>7} {'seconds':>9} {'speedup':>8}")
+
+    baseline = None
+    for n_jobs in args.n_jobs:
+        _, seconds = timed(run_search, X, y, n_splits=args.folds, n_jobs=n_jobs, cache_dir=None)
+        baseline = baseline or seconds
+        print(f"{n_jobs:>7} {seconds:9.2f} {baseline / seconds:7.2f}x")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        _, cold = timed(run_search, X, y, n_splits=args.folds, n_jobs=args.n_jobs[-1], cache_dir=cache_dir)
+        results, warm = timed(run_search, X, y, n_splits=args.folds, n_jobs=args.n_jobs[-1], cache_dir=cache_dir)
+        assert all(r["cached_folds"] == args.folds for r in results)
+        print(f"cache: cold run {cold:.2f}s, rerun {warm:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Worker startup cost of the pickle artifact versus the pickle-free shared export.
+
+Usage:
+    python backend/benchmarks/bench_model_startup.py [--workers 4]
+
+Spawns fresh interpreter processes (like uvicorn workers) that load the model
+either with joblib.load(best_model.pkl) or model_artifacts.load_shared_model, and
+reports load time (including the imports the load pulls in), RSS growth and
+private (unshared) memory growth per process, read from /proc/self/smaps_rollup.
+Covers the shipped artifact and a synthetic XGBoost model.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from common import APP_DIR
+from model_artifacts import export_shared_model
+from scoring import FEATURE_COLUMNS
+
+CHILD = r"""
+import json, sys, time
+sys.path.insert(0, {app_dir!r})
+
+def mem():
+    values = {{}}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Private_Clean:", "Private_Dirty:"):
+                values[parts[0][:-1]] = int(parts[1])
+    return values["Rss"], values["Private_Clean"] + values["Private_Dirty"]
+
+import numpy as np
+rss0, priv0 = mem()
+start = time.perf_counter()
+if {fmt!r} == "pickle":
+    import joblib
+    model = joblib.load({path!r})
+else:
+    from model_artifacts import load_shared_model
+    model = load_shared_model({path!r})
+model.predict_proba(np.zeros((1, 8)))
+elapsed = time.perf_counter() - start
+rss1, priv1 = mem()
+print(json.dumps({{"load_s": elapsed, "rss_kb": rss1 - rss0, "private_kb": priv1 - priv0}}))
+"""
+
+def spawn(fmt, path, workers):
+    code = CHILD.format(app_dir=APP_DIR, fmt=fmt, path=path)
+    procs = [subprocess.Popen([sys.executable, "-W", "ignore", "-c", code], stdout=subprocess.PIPE, text=True)
+             for _ in range(workers)]
+    results = [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+    return {k: float(np.mean([r[k] for r in results])) for k in results[0]}
+
+def compare(name, pickle_path, shared_dir, workers):
+    for fmt, path in (("pickle", pickle_path), ("shared", shared_dir)):
+        r = spawn(fmt, path, workers)
+        print(f"{name:<20} {fmt:<7} load={r['load_s'] * 1000:8.1f}ms  "
+              f"rss=+{r['rss_kb'] / 1024:7.1f}MB  private=+{r['private_kb'] / 1024:7.1f}MB  (mean of {workers} workers)")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = os.path.join(APP_DIR, "artifacts", "best_model.pkl")
+        shared_dir = os.path.join(tmp, "artifact_shared")
+        export_shared_model(joblib.load(artifact), shared_dir)
+        compare("artifact", artifact, shared_dir, args.workers)
+
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(20000, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+        y = (X["repayment_velocity"] + rng.normal(size=len(X)) > 0).astype(int)
+        model = xgb.XGBClassifier(n_estimators=300, max_depth=6, eval_metric="logloss").fit(X, y)
+        xgb_pickle = os.path.join(tmp, "xgb.pkl")
+        joblib.dump(model, xgb_pickle)
+        xgb_shared = os.path.join(tmp, "xgb_shared")
+        export_shared_model(model, xgb_shared)
+        compare("xgboost(300 trees)", xgb_pickle, xgb_shared, args.workers)
+
+if __name__ == "__main__":
+    main()
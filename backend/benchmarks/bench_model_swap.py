@@ -0,0 +1,106 @@
+"""
+/predict throughput while models are hot-swapped through the admin endpoint.
+
+Usage:
+    python backend/benchmarks/bench_model_swap.py [--seconds 5] [--concurrency 32] [--swap-every-ms 200]
+
+Registers two synthetic XGBoost versions in a temporary registry, then drives
+the ASGI app in-process (httpx.ASGITransport) for --seconds at a fixed
+concurrency, first without swaps and then while a separate client alternates
+the serving version with POST /admin/model/reload. Reports requests/sec,
+latency percentiles, swap count and failed requests, and the same again with
+shadow scoring of the other version on all traffic.
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+import httpx
+import numpy as np
+import xgboost as xgb
+
+from common import percentiles
+from model_registry import ModelHolder, register_model
+from scoring import FEATURE_COLUMNS
+import main as api
+
+PAYLOAD = {
+    "repayment_velocity": 0.8, "credit_utilization_ratio": 0.3, "delinquency_freq": 0,
+    "payment_consistency_score": 500.0, "amount": 10000.0, "interest_rate": 0.1,
+    "annual_income": 60000.0, "credit_score": 750.0
+}
+
+def make_model(seed, trees=300):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(5000, len(FEATURE_COLUMNS)))
+    y = (X[:, 0] - X[:, 2] + rng.normal(size=5000) > 0).astype(int)
+    return xgb.XGBClassifier(n_estimators=trees, max_depth=6, eval_metric="logloss").fit(X, y)
+
+async def drive(client, seconds, concurrency, swap_every_ms, versions):
+    latencies, failures, swaps = [], 0, 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal failures
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.post("/predict", json=PAYLOAD)
+            latencies.append((time.perf_counter() - start) * 1000)
+            failures += response.status_code != 200
+            # In-process requests can complete without suspending; yield so
+            # the other workers and the swapper's timer get to run
+            await asyncio.sleep(0)
+
+    async def swapper():
+        nonlocal swaps
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(swap_every_ms / 1000)
+            response = await client.post("/admin/model/reload", params={"version": versions[swaps % 2]})
+            response.raise_for_status()
+            swaps += 1
+
+    tasks = [worker() for _ in range(concurrency)]
+    if swap_every_ms:
+        tasks.append(swapper())
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, percentiles(latencies, (50, 99)), swaps, failures
+
+async def run(args, versions):
+    transport = httpx.ASGITransport(app=api.app)
+    headers = {"X-Admin-Token": api.ADMIN_TOKEN}
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as client:
+        for label, swap_ms, shadow in (("steady", 0, False), ("hot swaps", args.swap_every_ms, False),
+                                       ("shadow 100%", 0, True)):
+            if shadow:
+                (await client.post("/admin/model/reload", params={"version": versions[0]})).raise_for_status()
+                (await client.post("/admin/model/shadow", params={"version": versions[1]})).raise_for_status()
+            rps, lat, swaps, failures = await drive(client, args.seconds, args.concurrency, swap_ms, versions)
+            print(f"{label:<12} {rps:9,.0f} req/s  p50={lat['p50']:6.2f}ms  p99={lat['p99']:6.2f}ms  "
+                  f"swaps={swaps:<4} failed={failures}")
+            if shadow:
+                stats = (await client.get("/admin/model/shadow")).json()
+                print(f"{'':<12} shadow calls={stats['calls']} primary p50={stats['primary_latency_ms']['p50']:.3f}ms "
+                      f"shadow p50={stats['shadow_latency_ms']['p50']:.3f}ms max|diff|={stats['max_abs_diff']:.3f}")
+                await client.delete("/admin/model/shadow")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--swap-every-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as registry:
+        versions = [register_model(make_model(seed), registry, activate=seed == 0) for seed in (0, 1)]
+        api.model_holder = ModelHolder(registry)
+        api.model_holder.load()
+        api.REGISTRY_DIR = registry
+        api.ADMIN_TOKEN = api.ADMIN_TOKEN or "bench"
+        api.micro_batcher = None
+        asyncio.run(run(args, versions))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+End-to-end benchmark of the ingest -> features -> train -> serve pipeline on
+SQLite, at one or more data scales, with a JSON results file and a
+comparison mode for regressions.
+
+Usage:
+    python backend/benchmarks/bench_pipeline.py run [--scales 10000 100000] [--output pipeline.json]
+        [--stages generate ingest features train serve] [--requests 2000] [--concurrency 16]
+        [--families logistic_regression] [--folds 3]
+    python backend/benchmarks/bench_pipeline.py compare BASELINE.json CANDIDATE.json [--threshold 0.10]
+
+For every scale (number of loans) a throwaway working directory is built and
+each stage runs in a fresh process from it, so the repo-relative paths the
+jobs use (CreditPathAI/data/..., CreditPathAI/backend/app/artifacts/...)
+resolve inside it and peak RSS (ru_maxrss) is per stage:
+  generate  data/generate_data.generate_sharded_data (raw CSVs)
+  ingest    ingest.ingest_data
+  features  features.calculate_features (+ Parquet training export)
+  train     train.train_models (CV search, registry)
+  serve     /predict, /borrowers and /dashboard/stats through the ASGI app
+            in-process (httpx.ASGITransport) against the database and the
+            registered model of the earlier stages
+
+`compare` prints every metric of both files side by side and flags changes
+worse than --threshold (throughput down, time/latency/RSS up); it exits with
+status 1 when there are regressions.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import APP_DIR, percentiles, timed
+
+REPO_ROOT = os.path.abspath(os.path.join(APP_DIR, "..", ".."))
+DATA_DIR = os.path.join(REPO_ROOT, "data")
+STAGES = ("generate", "ingest", "features", "train", "serve")
+RAW_DIR = "CreditPathAI/data/raw"
+DB_FILE = "bench.db"
+REGISTRY_DIR = "CreditPathAI/backend/app/artifacts/registry"
+
+def _engine():
+    from database import make_engine
+    return make_engine(f"sqlite:///{os.path.abspath(DB_FILE)}")
+
+def stage_generate(scale, args):
+    sys.path.insert(0, DATA_DIR)
+    from generate_data import generate_sharded_data
+    repayments, seconds = timed(generate_sharded_data, scale, RAW_DIR, n_jobs=1, as_of="2025-01-01")
+    return {"seconds": seconds, "rows": scale * 2 + repayments, "rows_per_s": (scale * 2 + repayments) / seconds}
+
+def stage_ingest(scale, args):
+    from ingest import ingest_data
+    stats, seconds = timed(ingest_data, RAW_DIR, bind=_engine())
+    rows = sum(s["rows"] for s in stats.values())
+    return {"seconds": seconds, "rows": rows, "rows_per_s": rows / seconds}
+
+def stage_features(scale, args):
+    from features import calculate_features
+    _, seconds = timed(calculate_features, bind=_engine())
+    return {"seconds": seconds, "rows": scale, "rows_per_s": scale / seconds}
+
+def stage_train(scale, args):
+    # train.py logs to a ./mlruns file store (here: inside the throwaway
+    # workdir), which MLflow 3 only accepts when opted in
+    os.environ.setdefault("MLFLOW_ALLOW_FILE_STORE", "true")
+    from train import train_models
+    _, seconds = timed(train_models, families=args.families, folds=args.folds, n_jobs=1, cache_dir=None)
+    return {"seconds": seconds, "rows": scale, "rows_per_s": scale / seconds}
+
+def _payloads(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "repayment_velocity": rng.uniform(0, 1), "credit_utilization_ratio": rng.uniform(0, 1),
+        "delinquency_freq": rng.randint(0, 12), "payment_consistency_score": rng.uniform(0, 1000),
+        "amount": float(rng.randint(1000, 40000)), "interest_rate": rng.uniform(0.05, 0.25),
+        "annual_income": rng.lognormvariate(11, 0.5), "credit_score": float(rng.randint(580, 850)),
+    } for _ in range(n)]
+
+async def _drive(client, make_request, requests, concurrency):
+    latencies, failures = [], 0
+    pending = iter(range(requests))
+
+    async def worker():
+        nonlocal failures
+        for i in pending:
+            start = time.perf_counter()
+            response = await make_request(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+            failures += response.status_code != 200
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    return {"req_per_s": requests / elapsed, **{f"{k}_ms": v for k, v in percentiles(latencies, (50, 95, 99)).items()},
+            "failures": failures}
+
+def stage_serve(scale, args):
+    # Before main is imported: the app's engine and model registry of this run
+    os.environ["CREDITPATH_DATABASE_URL"] = f"sqlite:///{os.path.abspath(DB_FILE)}"
+    os.environ["CREDITPATH_MODEL_REGISTRY"] = os.path.abspath(REGISTRY_DIR)
+    import httpx
+    import main as api
+
+    payloads = _payloads(args.requests)
+    rng = random.Random(1)
+    cursors = [rng.randint(0, max(0, scale - 20)) for _ in range(args.requests)]
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            endpoints = {
+                "/predict": lambda i: client.post("/predict", json=payloads[i]),
+                "/borrowers": lambda i: client.get("/borrowers", params={"limit": 20, "cursor": cursors[i]}),
+                "/dashboard/stats": lambda i: client.get("/dashboard/stats"),
+            }
+            return {path: await _drive(client, request, args.requests, args.concurrency)
+                    for path, request in endpoints.items()}
+
+    return {"endpoints": asyncio.run(run())}
+
+STAGE_FUNCTIONS = {
+    "generate": stage_generate, "ingest": stage_ingest, "features": stage_features,
+    "train": stage_train, "serve": stage_serve,
+}
+
+def run_stage_in_child(stage, scale, workdir, args):
+    cmd = [sys.executable, os.path.abspath(__file__), "run", "--stage", stage, "--scales", str(scale),
+           "--requests", str(args.requests), "--concurrency", str(args.concurrency), "--folds", str(args.folds)]
+    if args.families:
+        cmd += ["--families", *args.families]
+    out = subprocess.run(cmd, cwd=workdir, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"Stage {stage} failed at scale {scale}:\n{out.stderr[-3000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def _flatten(stage, result):
+    """{metric: value} rows keyed like "serve /predict" for the results file and comparisons."""
+    if "endpoints" in result:
+        rows = {f"{stage} {path}": dict(metrics) for path, metrics in result["endpoints"].items()}
+        for metrics in rows.values():
+            metrics["peak_rss_mib"] = result["peak_rss_mib"]
+        return rows
+    return {stage: result}
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    results = {
+        "meta": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "stages": args.stages,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": {},
+    }
+    for scale in args.scales:
+        scale_results = {}
+        with tempfile.TemporaryDirectory() as workdir:
+            for stage in args.stages:
+                result = run_stage_in_child(stage, scale, workdir, args)
+                for name, metrics in _flatten(stage, result).items():
+                    scale_results[name] = metrics
+                    summary = ", ".join(f"{k}={v:,.2f}" if isinstance(v, float) else f"{k}={v}"
+                                        for k, v in metrics.items())
+                    print(f"[{scale:,} loans] {name}: {summary}", flush=True)
+        results["results"][str(scale)] = scale_results
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+def metric_direction(name: str):
+    """+1 if higher is better, -1 if lower is better, None for informational metrics."""
+    if name.endswith("_per_s"):
+        return 1
+    if name == "seconds" or name.endswith("_ms") or name.endswith("_mib") or name == "failures":
+        return -1
+    return None
+
+def compare_results(baseline: dict, candidate: dict, threshold: float = 0.10) -> list:
+    """
+    One row per metric present in both files: (scale, stage, metric, baseline,
+    candidate, relative change, regression flag). A regression is a change in
+    the bad direction larger than threshold (relative).
+    """
+    rows = []
+    for scale, stages in baseline["results"].items():
+        for stage, metrics in stages.items():
+            other = candidate["results"].get(scale, {}).get(stage)
+            if other is None:
+                continue
+            for metric, base in metrics.items():
+                direction = metric_direction(metric)
+                new = other.get(metric)
+                if direction is None or new is None or not isinstance(base, (int, float)):
+                    continue
+                change = (new - base) / base if base else (0.0 if new == base else float("inf"))
+                regression = -direction * change > threshold
+                if metric == "failures":
+                    regression = new > base
+                rows.append((scale, stage, metric, base, new, change, regression))
+    return rows
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    rows = compare_results(baseline, candidate, args.threshold)
+    print(f"{'scale':>9} {'stage':<24} {'metric':<14} {'baseline':>12} {'candidate':>12} {'change':>8}")
+    for scale, stage, metric, base, new, change, regression in rows:
+        flag = "  REGRESSION" if regression else ""
+        print(f"{scale:>9} {stage:<24} {metric:<14} {base:12,.2f} {new:12,.2f} {change:+8.1%}{flag}")
+    regressions = sum(row[-1] for row in rows)
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%} in {len(rows)} metrics")
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000])
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    run_parser.add_argument("--output", default="pipeline_results.json")
+    run_parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint in the serve stage")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--families", nargs="+", default=["logistic_regression"])
+    run_parser.add_argument("--folds", type=int, default=3)
+    run_parser.add_argument("--stage", choices=STAGES, help=argparse.SUPPRESS)
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        sys.exit(compare(args))
+    if args.stage:
+        # Child process: one stage, result as the last stdout line
+        result = STAGE_FUNCTIONS[args.stage](args.scales[0], args)
+        result["peak_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(json.dumps(result))
+        return
+    run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Throughput of /predict/batch (JSON array and NDJSON) against per-row /predict calls.
+
+Usage:
+    python backend/benchmarks/bench_predict_batch.py [--rows 50000] [--single-rows 500] [--target 10000]
+
+Runs in-process through FastAPI's TestClient, so numbers include request
+validation and JSON (de)serialization but no network.
+"""
+import argparse
+import json
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from common import timed
+from scoring import FEATURE_COLUMNS, rows_to_matrix, score_matrix
+import main as api
+
+def make_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    cols = {
+        "repayment_velocity": rng.uniform(0, 1.2, n),
+        "credit_utilization_ratio": rng.uniform(0.1, 0.9, n),
+        "delinquency_freq": rng.integers(0, 30, n),
+        "payment_consistency_score": rng.uniform(0, 800, n),
+        "amount": rng.integers(1000, 40000, n).astype(float),
+        "interest_rate": rng.uniform(0.05, 0.25, n),
+        "annual_income": rng.lognormal(11, 0.5, n),
+        "credit_score": rng.integers(580, 850, n).astype(float),
+    }
+    return [{name: cols[name][i].item() for name in FEATURE_COLUMNS} for i in range(n)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--single-rows", type=int, default=500)
+    parser.add_argument("--target", type=float, default=10_000, help="rows/sec target for /predict/batch")
+    args = parser.parse_args()
+
+    client = TestClient(api.app)
+    rows = make_rows(args.rows)
+
+    _, single_s = timed(lambda: [client.post("/predict", json=r) for r in rows[:args.single_rows]])
+    response, batch_s = timed(client.post, "/predict/batch", json=rows)
+    assert response.status_code == 200 and len(response.json()) == args.rows
+
+    body = "".join(json.dumps(r) + "\n" for r in rows)
+    response, ndjson_s = timed(client.post, "/predict/batch/ndjson", content=body)
+    assert response.status_code == 200
+
+    X = rows_to_matrix(rows)
+    _, core_s = timed(score_matrix, api.current_predict, X)
+
+    batch_rps = args.rows / batch_s
+    print(f"/predict (per row):     {args.single_rows / single_s:12,.0f} rows/sec")
+    print(f"/predict/batch (JSON):  {batch_rps:12,.0f} rows/sec")
+    print(f"/predict/batch/ndjson:  {args.rows / ndjson_s:12,.0f} rows/sec")
+    print(f"score_matrix only:      {args.rows / core_s:12,.0f} rows/sec")
+    status = "PASS" if batch_rps >= args.target else "FAIL"
+    print(f"Target {args.target:,.0f} rows/sec: {status}")
+
+if __name__ == "__main__":
+    main()
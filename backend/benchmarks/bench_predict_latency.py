@@ -0,0 +1,77 @@
+"""
+p50/p99 latency of single-row scoring: the original DataFrame path
+(pd.DataFrame([request.dict()])[features] -> predict_proba) versus the
+native fast path (request_to_vector -> build_fast_predictor).
+
+Usage:
+    python backend/benchmarks/bench_predict_latency.py [--iterations 5000]
+
+Measures the artifact in backend/app/artifacts/best_model.pkl plus a small
+XGBoost model trained on synthetic data, so both native paths are covered.
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from common import percentiles
+from scoring import FEATURE_COLUMNS, build_fast_predictor, request_to_vector
+import main as api
+
+class Request:
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+    def dict(self):
+        return dict(self.__dict__)
+
+def _latencies(fn, requests):
+    samples = []
+    for req in requests:
+        start = time.perf_counter()
+        fn(req)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+def bench_model(name, model, requests):
+    predict = build_fast_predictor(model)
+
+    def dataframe_path(req):
+        X = pd.DataFrame([req.dict()])[FEATURE_COLUMNS]
+        return model.predict_proba(X)[0][1]
+
+    def fast_path(req):
+        return predict(request_to_vector(req))[0]
+
+    for req in requests[:20]:
+        assert dataframe_path(req) == fast_path(req)
+
+    old = percentiles(_latencies(dataframe_path, requests))
+    new = percentiles(_latencies(fast_path, requests))
+    print(f"{name:<22} dataframe p50={old['p50']:8.1f}us p99={old['p99']:8.1f}us | "
+          f"fast p50={new['p50']:7.1f}us p99={new['p99']:7.1f}us | "
+          f"p50 speedup {old['p50'] / new['p50']:.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(args.iterations, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    requests = [Request(r) for r in X.to_dict(orient="records")]
+
+    if api.model_holder.current is not None:
+        artifact = api.model_holder.current.model
+        bench_model(type(artifact).__name__ + " (artifact)", artifact, requests)
+
+    y = (X["repayment_velocity"] + rng.normal(size=len(X)) > 0).astype(int)
+    xgb_model = xgb.XGBClassifier(n_estimators=100, max_depth=4, eval_metric="logloss").fit(X, y)
+    bench_model("XGBClassifier", xgb_model, requests)
+
+if __name__ == "__main__":
+    main()
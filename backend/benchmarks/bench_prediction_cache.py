@@ -0,0 +1,101 @@
+"""
+Cost of a repeated /predict request with and without the prediction cache.
+
+Usage:
+    python backend/benchmarks/bench_prediction_cache.py [--iterations 20000] [--borrowers 500] [--requests 5000]
+
+Two measurements against a synthetic XGBoost model:
+- handler work per request: request_to_vector -> predict -> get_recommendation
+  versus a cache key + lookup (p50/p99 in microseconds);
+- end to end through the ASGI app in-process (httpx.ASGITransport), replaying
+  --requests calls drawn from --borrowers distinct feature rows, cache off/on.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+import xgboost as xgb
+
+from common import percentiles
+from model_registry import LoadedModel, ModelHolder
+from prediction_cache import PredictionCache
+from scoring import FEATURE_COLUMNS, request_to_vector
+import main as api
+
+def make_model(seed=0, trees=300):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(5000, len(FEATURE_COLUMNS)))
+    y = (X[:, 0] - X[:, 2] + rng.normal(size=5000) > 0).astype(int)
+    return xgb.XGBClassifier(n_estimators=trees, max_depth=6, eval_metric="logloss").fit(X, y)
+
+def make_payloads(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return [{
+        "repayment_velocity": float(rng.uniform(0, 1)), "credit_utilization_ratio": float(rng.uniform(0, 1)),
+        "delinquency_freq": int(rng.integers(0, 12)), "payment_consistency_score": float(rng.uniform(0, 1000)),
+        "amount": float(rng.integers(1000, 40000)), "interest_rate": float(rng.uniform(0.05, 0.25)),
+        "annual_income": float(rng.lognormal(11, 0.5)), "credit_score": float(rng.integers(580, 850)),
+    } for _ in range(n)]
+
+def bench_handler(loaded, iterations):
+    request = api.PredictionRequest(**make_payloads(1)[0])
+    cache = PredictionCache(max_entries=1000)
+
+    def uncached():
+        prob = float(loaded.predict(request_to_vector(request))[0])
+        return api.rec_engine.get_recommendation(prob)
+
+    cache.put(cache.key("predict", [getattr(request, c) for c in FEATURE_COLUMNS]), uncached(), loaded.version)
+
+    def cached():
+        return cache.get(cache.key("predict", [getattr(request, c) for c in FEATURE_COLUMNS]), loaded.version)
+
+    assert cached() == uncached()
+    for name, fn in (("model call", uncached), ("cache hit", cached)):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1e6)
+        p = percentiles(samples)
+        print(f"{name:<11} p50={p['p50']:7.1f}us p99={p['p99']:7.1f}us")
+
+async def replay(payloads, order):
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+        start = time.perf_counter()
+        for i in order:
+            t0 = time.perf_counter()
+            response = await client.post("/predict", json=payloads[i])
+            latencies.append((time.perf_counter() - t0) * 1000)
+            response.raise_for_status()
+        return len(order) / (time.perf_counter() - start), percentiles(latencies)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--borrowers", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    holder = ModelHolder(registry_dir="")
+    holder.swap(LoadedModel("bench", make_model()))
+    api.model_holder = holder
+    print("Handler work per repeated request:")
+    bench_handler(holder.current, args.iterations)
+
+    payloads = make_payloads(args.borrowers)
+    order = np.random.default_rng(2).integers(0, args.borrowers, args.requests)
+    print(f"\nEnd to end: {args.requests} /predict calls over {args.borrowers} borrowers")
+    for name, size in (("cache off", 0), ("cache on", 10000)):
+        api.prediction_cache = PredictionCache(max_entries=size)
+        rps, p = asyncio.run(replay(payloads, order))
+        stats = api.prediction_cache.stats()
+        print(f"{name:<10} {rps:7.0f} req/s p50={p['p50']:.3f}ms p99={p['p99']:.3f}ms "
+              f"hit_ratio={stats['hit_ratio']:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+SQL statements and latency per request for the loan/borrower endpoints,
+counted with database.QueryCounter. /loans/{id} is also compared with the
+previous ORM access (load the Loan, then lazy-load loan.borrower).
+
+Usage:
+    python backend/benchmarks/bench_query_counts.py [--loans 100000] [--repeat 2000]
+
+Calls the endpoint functions directly (no HTTP) on a throwaway SQLite
+database, so the numbers are query + row-building cost. A change in the
+statement counts printed here is a query-count regression.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from fastapi.responses import Response
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from common import percentiles, populate_loans_db
+from database import Base, QueryCounter
+from models import Loan
+import main as api
+
+def lazy_loan_details(loan_id, db):
+    loan = db.query(Loan).filter(Loan.id == loan_id).first()
+    return {"id": loan.id, "amount": loan.amount, "status": loan.loan_status, "borrower": loan.borrower.full_name}
+
+def measure(name, fn, SessionLocal, repeat):
+    samples = []
+    with QueryCounter() as queries:
+        for _ in range(repeat):
+            # A fresh session per call, like get_db, so nothing is served from the identity map
+            db = SessionLocal()
+            start = time.perf_counter()
+            fn(db)
+            samples.append((time.perf_counter() - start) * 1e6)
+            db.close()
+    p = percentiles(samples, (50, 99))
+    print(f"{name:<28} {queries.count / repeat:5.1f} statements/request  "
+          f"p50={p['p50']:7.1f}us p99={p['p99']:7.1f}us")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        populate_loans_db(engine, args.loans)
+        SessionLocal = sessionmaker(bind=engine)
+        rng = random.Random(0)
+
+        measure("/loans/{id} lazy borrower", lambda db: lazy_loan_details(rng.randint(1, args.loans), db),
+                SessionLocal, args.repeat)
+        measure("/loans/{id} column query", lambda db: api.get_loan_details(rng.randint(1, args.loans), db=db),
+                SessionLocal, args.repeat)
+        for limit in (20, 100):
+            measure(f"/borrowers limit={limit}",
+                    lambda db: api.get_borrowers(response=Response(), limit=limit,
+                                                 cursor=str(rng.randint(0, args.loans - limit)), db=db),
+                    SessionLocal, args.repeat)
+
+if __name__ == "__main__":
+    main()
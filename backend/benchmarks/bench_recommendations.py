@@ -0,0 +1,43 @@
+"""
+Segmenting scored loans: RecommendationEngine.get_recommendation per
+probability (the original per-row loop) versus one segment_codes call
+(np.digitize) plus segment_names / primary_actions lookups.
+
+Usage:
+    python backend/benchmarks/bench_recommendations.py [--rows 3000000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+import common  # noqa: F401 (puts backend/app on sys.path)
+from recommendations import RecommendationEngine
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    args = parser.parse_args()
+
+    engine = RecommendationEngine()
+    probs = np.random.default_rng(0).uniform(size=args.rows)
+
+    start = time.perf_counter()
+    loop_segments = [engine.get_recommendation(float(p))["risk_segment"] for p in probs]
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    codes = engine.segment_codes(probs)
+    codes_s = time.perf_counter() - start
+    segments = engine.segment_names(codes)
+    actions = engine.primary_actions(codes)
+    vector_s = time.perf_counter() - start
+
+    assert list(segments) == loop_segments and len(actions) == args.rows
+    print(f"{args.rows} probabilities")
+    print(f"per-row get_recommendation  {loop_s * 1000:9.1f} ms")
+    print(f"segment_codes (digitize)    {codes_s * 1000:9.1f} ms  ({loop_s / codes_s:.0f}x)")
+    print(f"+ segment/action lookups    {vector_s * 1000:9.1f} ms  ({loop_s / vector_s:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Full versus incremental rescoring with risk_scoring.score_loans.
+
+Usage:
+    python backend/benchmarks/bench_risk_scoring.py [--loans 1000000] [--changed 0.01]
+
+Builds a throwaway SQLite database with --loans loans/borrowers/loan_features,
+runs a full scoring pass, marks a --changed fraction of feature rows as updated
+(plus new repayments for a few more loans) and times the incremental pass.
+"""
+import argparse
+import datetime
+import os
+import tempfile
+
+import joblib
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from common import APP_DIR, populate_loans_db, timed
+from database import Base
+from models import Repayment
+from risk_scoring import score_loans
+from scoring import build_fast_predictor
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loans", type=int, default=1_000_000)
+    parser.add_argument("--changed", type=float, default=0.01)
+    args = parser.parse_args()
+
+    predict = build_fast_predictor(joblib.load(os.path.join(APP_DIR, "artifacts", "best_model.pkl")))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        _, populate_s = timed(populate_loans_db, engine, args.loans)
+        print(f"Populated {args.loans:,} loans in {populate_s:.1f}s")
+
+        db = sessionmaker(bind=engine)()
+        full_rows, full_s = timed(score_loans, db, predict, incremental=False)
+
+        step = max(1, int(round(1 / args.changed)))
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE loan_features SET delinquency_freq = delinquency_freq + 1, updated_at = :now "
+                              "WHERE id % :step = 0"), {"now": datetime.datetime.utcnow(), "step": step})
+            conn.execute(insert(Repayment), [
+                {"loan_id": int(i), "payment_amount": 100.0, "payment_date": datetime.datetime.utcnow()}
+                for i in range(1, args.loans + 1, step * 10)
+            ])
+
+        incr_rows, incr_s = timed(score_loans, db, predict, incremental=True)
+        noop_rows, noop_s = timed(score_loans, db, predict, incremental=True)
+        db.close()
+
+    print(f"full        {full_rows:>10,} rows  {full_s:8.2f}s  {full_rows / full_s:12,.0f} rows/sec")
+    print(f"incremental {incr_rows:>10,} rows  {incr_s:8.2f}s  ({full_s / incr_s:.1f}x faster than full)")
+    print(f"no-op       {noop_rows:>10,} rows  {noop_s:8.2f}s")
+
+if __name__ == "__main__":
+    main()
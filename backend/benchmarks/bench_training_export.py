@@ -0,0 +1,79 @@
+"""
+CSV versus partitioned Parquet for the training export.
+
+Usage:
+    python backend/benchmarks/bench_training_export.py [--sizes 100000 1000000]
+
+Builds an export frame shaped like features._training_export_frame (loan +
+borrower + feature columns), writes it in both formats and reports on-disk
+size, write time, and the time train.py spends loading its 9 model columns
+(full CSV parse as before, CSV with usecols, Parquet projection).
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from common import make_loan_frames, timed
+from features import compute_loan_features
+from training_data import TrainingDataWriter, load_training_data
+
+NOW = pd.Timestamp("2025-01-01")
+MODEL_COLUMNS = [
+    "repayment_velocity", "credit_utilization_ratio", "delinquency_freq", "payment_consistency_score",
+    "amount", "interest_rate", "annual_income", "credit_score", "default_probability",
+]
+
+def make_export_frame(n):
+    loans_df, repayments_df = make_loan_frames(n, now=NOW)
+    rng = np.random.default_rng(1)
+    loans_df = loans_df.assign(
+        installment=loans_df["amount"] / loans_df["term_months"],
+        grade=rng.choice(list("ABCDEFG"), n),
+        id_borrower=loans_df["borrower_id"],
+        full_name="Borrower_" + loans_df["borrower_id"].astype(str),
+        employment_years=rng.integers(0, 30, n),
+        home_ownership=rng.choice(["RENT", "OWN", "MORTGAGE"], n),
+    )
+    features_df = compute_loan_features(loans_df, repayments_df, now=NOW)
+    return loans_df.merge(features_df, left_on="id", right_on="loan_id")
+
+def disk_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+def write_export(df, path, export_format, chunk_size=50_000):
+    writer = TrainingDataWriter(path, export_format)
+    for start in range(0, len(df), chunk_size):
+        writer.write(df.iloc[start:start + chunk_size])
+    writer.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'format':>8} {'size_mib':>9} {'write_s':>8} {'load_s':>8}  load")
+    for n in args.sizes:
+        df = make_export_frame(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path, parquet_path = os.path.join(tmp, "training_data.csv"), os.path.join(tmp, "training_data")
+            _, csv_write = timed(write_export, df, csv_path, "csv")
+            _, parquet_write = timed(write_export, df, parquet_path, "parquet")
+
+            _, csv_full = timed(lambda: pd.read_csv(csv_path)[MODEL_COLUMNS])
+            _, csv_usecols = timed(load_training_data, csv_path, MODEL_COLUMNS)
+            loaded, parquet_load = timed(load_training_data, parquet_path, MODEL_COLUMNS)
+            assert len(loaded) == n
+
+            csv_mib, parquet_mib = disk_size(csv_path) / 2**20, disk_size(parquet_path) / 2**20
+            print(f"{n:>9} {'csv':>8} {csv_mib:9.1f} {csv_write:8.2f} {csv_full:8.2f}  full parse (previous train.py)")
+            print(f"{n:>9} {'csv':>8} {csv_mib:9.1f} {csv_write:8.2f} {csv_usecols:8.2f}  usecols")
+            print(f"{n:>9} {'parquet':>8} {parquet_mib:9.1f} {parquet_write:8.2f} {parquet_load:8.2f}  "
+                  f"projected, memory-mapped ({len(os.listdir(parquet_path))} month partitions)")
+
+if __name__ == "__main__":
+    main()
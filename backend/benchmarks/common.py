@@ -0,0 +1,104 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks are run directly, e.g. `python backend/benchmarks/bench_features.py`,
+and import the app modules the same way the API does (flat imports from backend/app).
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+LOAN_STATUSES = ["Current", "Fully Paid", "Charged Off", "Late (31-120 days)"]
+STATUS_PROBS = [0.6, 0.25, 0.1, 0.05]
+
+def make_loan_frames(num_loans, seed=42, now=None, start_id=1, with_repayments=True):
+    """
+    Build in-memory loans (joined with borrower columns) and repayments frames
+    shaped like the tables read by features.calculate_features.
+    """
+    rng = np.random.default_rng(seed)
+    if now is None:
+        now = pd.Timestamp("2025-01-01")
+
+    ids = np.arange(start_id, start_id + num_loans)
+    loans_df = pd.DataFrame({
+        "id": ids,
+        "borrower_id": ids,
+        "amount": rng.integers(1000, 40000, num_loans).astype(float),
+        "term_months": rng.choice([36, 60], num_loans),
+        "interest_rate": rng.uniform(0.05, 0.25, num_loans),
+        "issue_date": now - pd.to_timedelta(rng.integers(100, 1000, num_loans), unit="D"),
+        "loan_status": rng.choice(LOAN_STATUSES, num_loans, p=STATUS_PROBS),
+        "credit_score": rng.integers(580, 850, num_loans),
+        "annual_income": rng.lognormal(mean=11, sigma=0.5, size=num_loans),
+    })
+
+    if not with_repayments:
+        return loans_df, None
+
+    counts = rng.integers(0, 20, num_loans)
+    loan_ids = np.repeat(ids, counts)
+    repayments_df = pd.DataFrame({
+        "id": np.arange(1, len(loan_ids) + 1),
+        "loan_id": loan_ids,
+        "payment_date": now - pd.to_timedelta(rng.integers(0, 900, len(loan_ids)), unit="D"),
+        "payment_amount": np.round(rng.uniform(50, 1500, len(loan_ids)), 2),
+    })
+    return loans_df, repayments_df
+
+def populate_loans_db(engine, num_loans, chunk_size=200_000, with_features=True, with_repayments=False):
+    """
+    Fill borrowers, loans and (optionally) loan_features / repayments of an empty
+    database with num_loans synthetic loans, one borrower per loan, in
+    bounded-memory chunks.
+    """
+    from sqlalchemy import insert
+    from models import Borrower, Loan, LoanFeatures, Repayment
+
+    next_repayment_id = 1
+    for start in range(1, num_loans + 1, chunk_size):
+        n = min(chunk_size, num_loans - start + 1)
+        loans_df, repayments_df = make_loan_frames(n, seed=start, start_id=start, with_repayments=with_repayments)
+        rng = np.random.default_rng(start)
+        ids = loans_df["id"].tolist()
+        with engine.begin() as conn:
+            conn.execute(insert(Borrower), [
+                {"id": i, "full_name": f"Borrower_{i}", "credit_score": c, "annual_income": a}
+                for i, c, a in zip(ids, loans_df["credit_score"].tolist(), loans_df["annual_income"].tolist())
+            ])
+            conn.execute(insert(Loan), [
+                {"id": i, "borrower_id": i, "amount": a, "interest_rate": r, "loan_status": s, "issue_date": d}
+                for i, a, r, s, d in zip(ids, loans_df["amount"].tolist(), loans_df["interest_rate"].tolist(),
+                                         loans_df["loan_status"].tolist(), loans_df["issue_date"].dt.to_pydatetime())
+            ])
+            if with_features:
+                conn.execute(insert(LoanFeatures), [
+                    {"loan_id": i, "repayment_velocity": v, "credit_utilization_ratio": u,
+                     "delinquency_freq": d, "payment_consistency_score": c}
+                    for i, v, u, d, c in zip(ids, rng.uniform(0, 1, n).tolist(), rng.uniform(0.1, 0.9, n).tolist(),
+                                             rng.integers(0, 30, n).tolist(), rng.uniform(0, 500, n).tolist())
+                ])
+            if with_repayments and len(repayments_df):
+                conn.execute(insert(Repayment), [
+                    {"id": next_repayment_id + k, "loan_id": l, "payment_date": d, "payment_amount": a}
+                    for k, (l, d, a) in enumerate(zip(repayments_df["loan_id"].tolist(),
+                                                      repayments_df["payment_date"].dt.to_pydatetime(),
+                                                      repayments_df["payment_amount"].tolist()))
+                ])
+                next_repayment_id += len(repayments_df)
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def percentiles(samples, qs=(50, 99)):
+    arr = np.asarray(samples, dtype=np.float64)
+    return {f"p{q}": float(np.percentile(arr, q)) for q in qs}
@@ -0,0 +1,78 @@
+"""
+Load-test harness for /predict with and without the micro-batcher.
+
+Usage:
+    python backend/benchmarks/loadtest_predict.py [--concurrency 1 8 32 128] [--requests 2000]
+    python backend/benchmarks/loadtest_predict.py --url http://localhost:8001  # against a running server
+
+In-process mode drives the ASGI app directly through httpx.ASGITransport and
+toggles main.micro_batcher between runs, printing the throughput / latency
+curve for each concurrency level. Against a running server the batcher is
+configured with CREDITPATH_MICROBATCH* environment variables instead.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from common import percentiles
+from batching import MicroBatcher
+import main as api
+
+PAYLOAD = {
+    "repayment_velocity": 0.8, "credit_utilization_ratio": 0.3, "delinquency_freq": 0,
+    "payment_consistency_score": 500.0, "amount": 10000.0, "interest_rate": 0.1,
+    "annual_income": 60000.0, "credit_score": 750.0
+}
+
+async def run_level(client, concurrency, total):
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.post("/predict", json=PAYLOAD)
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return total / elapsed, percentiles(latencies, (50, 99))
+
+async def run(args, label):
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://test")
+    async with client:
+        for concurrency in args.concurrency:
+            rps, lat = await run_level(client, concurrency, args.requests)
+            print(f"{label:<14} c={concurrency:<5} {rps:10,.0f} req/s  p50={lat['p50']:7.2f}ms  p99={lat['p99']:7.2f}ms")
+        if not args.url and api.micro_batcher is not None:
+            stats = api.micro_batcher.stats()
+            print(f"{'':<14} batches={stats['batches_total']} mean_batch={stats['mean_batch_size']:.1f} max_batch={stats['max_batch_seen']}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--max-rows", type=int, default=64)
+    parser.add_argument("--wait-ms", type=float, default=2.0)
+    parser.add_argument("--url", default=None)
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run(args, "server"))
+        return
+
+    api.micro_batcher = None
+    asyncio.run(run(args, "direct"))
+    api.micro_batcher = MicroBatcher(api.current_predict, max_batch_size=args.max_rows, max_wait_ms=args.wait_ms,
+                                     inline=api.current_fast_path)
+    asyncio.run(run(args, "micro-batched"))
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,34 @@
 from fastapi.testclient import TestClient
 import sys
 import os
+import json
+import asyncio
+import time
+import datetime
+import subprocess
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
 # Add app to path
 sys.path.append(os.path.join(os.getcwd(), "CreditPathAI/backend/app"))
 
+import main
 from main import app
+from batching import MicroBatcher
+from prediction_cache import PredictionCache
+from database import Base, QueryCounter, get_db
+from models import Borrower, Loan, LoanFeatures
+from model_registry import LoadedModel
 
 client = TestClient(app)
 
 def test_read_root():
-    response = client.get("/")
-    assert response.status_code == 200
-    assert response.json() == {"message": "Welcome to CreditPathAI API"}
+    response = client.get("/", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == "/app/index.html"
 
 def test_predict_endpoint():
     # Sample data
@@ -34,6 +50,432 @@ def test_predict_endpoint():
     assert "recommended_actions" in data
     print(f"Prediction Response: {data}")
 
+def test_predict_batch_matches_single():
+    rows = [
+        {"repayment_velocity": 0.8, "credit_utilization_ratio": 0.3, "delinquency_freq": 0,
+         "payment_consistency_score": 500.0, "amount": 10000.0, "interest_rate": 0.1,
+         "annual_income": 60000.0, "credit_score": 750.0},
+        {"repayment_velocity": 0.1, "credit_utilization_ratio": 0.9, "delinquency_freq": 12,
+         "payment_consistency_score": 20.0, "amount": 35000.0, "interest_rate": 0.24,
+         "annual_income": 20000.0, "credit_score": 590.0},
+    ]
+    response = client.post("/predict/batch", json=rows)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 2
+    for row, rec in zip(rows, data):
+        assert rec == client.post("/predict", json=row).json()
+
+def test_predict_batch_ndjson():
+    row = {"repayment_velocity": 0.8, "credit_utilization_ratio": 0.3, "delinquency_freq": 0,
+           "payment_consistency_score": 500.0, "amount": 10000.0, "interest_rate": 0.1,
+           "annual_income": 60000.0, "credit_score": 750.0}
+    body = "\n".join([json.dumps(row), '{"amount": "x"}', json.dumps(row)]) + "\n"
+    response = client.post("/predict/batch/ndjson", content=body,
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 3
+    assert "risk_segment" in lines[0] and lines[0] == lines[2]
+    assert lines[1]["line"] == 2 and "error" in lines[1]
+
+def test_predict_with_micro_batcher(monkeypatch):
+    # A cache hit would never reach the batcher
+    monkeypatch.setattr(main, "prediction_cache", PredictionCache(max_entries=0))
+    payload = {"repayment_velocity": 0.8, "credit_utilization_ratio": 0.3, "delinquency_freq": 0,
+               "payment_consistency_score": 500.0, "amount": 10000.0, "interest_rate": 0.1,
+               "annual_income": 60000.0, "credit_score": 750.0}
+    expected = client.post("/predict", json=payload).json()
+
+    original = main.micro_batcher
+    main.micro_batcher = MicroBatcher(main.current_predict, max_batch_size=8, max_wait_ms=1)
+    try:
+        response = client.post("/predict", json=payload)
+        stats = client.get("/predict/batcher/stats").json()
+    finally:
+        main.micro_batcher = original
+
+    assert response.json() == expected
+    assert stats["enabled"] and stats["rows_total"] == 1
+
+@pytest.fixture
+def seeded_db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    TestSession = sessionmaker(bind=engine)
+    db = TestSession()
+    statuses = ["Current", "Fully Paid", "Charged Off"]
+    for i in range(1, 31):
+        db.add(Borrower(id=i, full_name=f"Borrower_{i}", credit_score=600 + (i * 7) % 50, annual_income=50000.0))
+        db.add(Loan(id=i, borrower_id=i, amount=1000.0 * i, interest_rate=0.1, loan_status=statuses[i % 3],
+                    issue_date=datetime.datetime(2024, 1, 1)))
+        if i % 2 == 0:
+            db.add(LoanFeatures(loan_id=i, risk_segment="High Risk" if i % 4 == 0 else "Low Risk"))
+    db.commit()
+    db.close()
+
+    def override():
+        session = TestSession()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override
+    yield TestSession
+    app.dependency_overrides.pop(get_db, None)
+
+def fetch_all_pages(params):
+    rows, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/borrowers", params=query)
+        assert response.status_code == 200
+        rows.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return rows
+
+def test_borrowers_keyset_pagination(seeded_db):
+    rows = fetch_all_pages({"limit": 7})
+    assert [r["loan_id"] for r in rows] == list(range(1, 31))
+    assert rows[1]["risk_segment"] == "Low Risk" and rows[0]["risk_segment"] == "Not scored"
+
+    by_score = fetch_all_pages({"limit": 4, "sort": "credit_score"})
+    assert len(by_score) == 30
+    keys = [(r["credit_score"], r["id"], r["loan_id"]) for r in by_score]
+    assert keys == sorted(keys)
+
+def test_borrowers_pagination_by_credit_score_with_nulls(seeded_db):
+    # 7 unscored borrowers and 2 with a score of 0 span several pages of 4
+    with seeded_db() as db:
+        for borrower in db.query(Borrower).filter(Borrower.id.between(3, 11)):
+            borrower.credit_score = 0 if borrower.id > 9 else None
+        db.commit()
+
+    rows = fetch_all_pages({"limit": 4, "sort": "credit_score"})
+    assert sorted(r["loan_id"] for r in rows) == list(range(1, 31))
+    assert [r["loan_id"] for r in rows[:9]] == list(range(3, 12))
+    assert [r["credit_score"] for r in rows[:9]] == [0] * 9
+    keys = [(r["credit_score"], r["id"], r["loan_id"]) for r in rows[9:]]
+    assert keys == sorted(keys)
+
+def test_borrowers_filters(seeded_db):
+    rows = fetch_all_pages({"limit": 3, "status": "Charged Off", "min_credit_score": 620})
+    assert rows and all(r["status"] == "Charged Off" and r["credit_score"] >= 620 for r in rows)
+
+    rows = fetch_all_pages({"limit": 5, "risk_segment": "High Risk"})
+    assert [r["loan_id"] for r in rows] == list(range(4, 31, 4))
+
+    assert client.get("/borrowers", params={"cursor": "abc"}).status_code == 400
+
+def test_endpoint_query_counts(seeded_db):
+    # One statement per request, independent of the page size (no per-row lazy loads)
+    with QueryCounter() as queries:
+        response = client.get("/loans/4")
+    assert response.json() == {"id": 4, "amount": 4000.0, "status": "Fully Paid", "borrower": "Borrower_4"}
+    assert queries.count == 1
+    assert client.get("/loans/999").status_code == 404
+
+    for limit in (1, 25):
+        with QueryCounter() as queries:
+            assert len(client.get("/borrowers", params={"limit": limit}).json()) == limit
+        assert queries.count == 1, queries.statements
+
+ASYNC_APP_CLIENT = """
+import json, sys
+sys.path.insert(0, {app_dir!r})
+from fastapi.testclient import TestClient
+import main
+assert main.async_engine is not None
+client = TestClient(main.app)
+
+def pages(params):
+    rows, cursor = [], None
+    while True:
+        response = client.get("/borrowers", params=dict(params, **({{"cursor": cursor}} if cursor else {{}})))
+        assert response.status_code == 200, response.text
+        rows.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return rows
+
+print(json.dumps({{
+    "loan": client.get("/loans/4").json(),
+    "missing": client.get("/loans/999").status_code,
+    "by_id": pages({{"limit": 7}}),
+    "by_score": pages({{"limit": 4, "sort": "credit_score"}}),
+    "filtered": pages({{"limit": 3, "status": "Charged Off", "min_credit_score": 620}}),
+}}))
+"""
+
+def test_async_db_endpoints_match_sync(seeded_db, tmp_path):
+    # CREDITPATH_DB_ASYNC is read at import time, so the async app runs in its own interpreter
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("greenlet")
+    app_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app")
+    env = dict(os.environ, CREDITPATH_DB_ASYNC="1", CREDITPATH_DATABASE_URL=f"sqlite:///{tmp_path / 'api.db'}")
+    out = subprocess.run([sys.executable, "-c", ASYNC_APP_CLIENT.format(app_dir=app_dir)],
+                         env=env, capture_output=True, text=True, timeout=120)
+    assert out.returncode == 0, out.stderr
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    assert result["loan"] == client.get("/loans/4").json()
+    assert result["missing"] == 404
+    assert result["by_id"] == fetch_all_pages({"limit": 7})
+    assert result["by_score"] == fetch_all_pages({"limit": 4, "sort": "credit_score"})
+    assert result["filtered"] == fetch_all_pages({"limit": 3, "status": "Charged Off", "min_credit_score": 620})
+
+def test_metrics_endpoint(seeded_db):
+    payload = {"repayment_velocity": 0.3, "credit_utilization_ratio": 0.3, "delinquency_freq": 2,
+               "payment_consistency_score": 400.0, "amount": 12000.0, "interest_rate": 0.1,
+               "annual_income": 60000.0, "credit_score": 700.0}
+    client.post("/predict", json=payload)
+    client.get("/loans/4")
+    text = client.get("/metrics").text
+
+    assert 'creditpath_http_requests_total{method="GET",route="/loans/{loan_id}",status="200"}' in text
+    assert 'creditpath_http_request_duration_seconds_count{method="POST",route="/predict"}' in text
+    assert 'creditpath_db_queries_per_request_bucket{route="/loans/{loan_id}",le="1.0"}' in text
+    assert 'creditpath_db_queries_total{route="/loans/{loan_id}"}' in text
+    assert 'creditpath_stage_duration_seconds_count{stage="cache_lookup"}' in text
+    assert 'creditpath_prediction_cache_events_total{cache="predict",event="misses"}' in text
+
+def test_loan_risk_endpoints(seeded_db, monkeypatch):
+    from feature_store import OnlineFeatureStore
+
+    db = seeded_db()
+    for features in db.query(LoanFeatures):
+        features.repayment_velocity = 0.5
+        features.credit_utilization_ratio = 0.4
+        features.delinquency_freq = features.loan_id % 5
+        features.payment_consistency_score = 300.0
+    db.commit()
+    db.close()
+
+    # Without the store the features are read from the database
+    monkeypatch.setattr(main, "SessionLocal", seeded_db)
+    monkeypatch.setattr(main, "feature_store", None)
+    from_db = client.get("/loans/4/risk").json()
+    assert from_db["loan_id"] == 4 and "risk_segment" in from_db
+    assert client.get("/loans/3/risk").status_code == 404
+
+    store = OnlineFeatureStore(seeded_db)
+    store.load()
+    monkeypatch.setattr(main, "feature_store", store)
+    with QueryCounter() as queries:
+        assert client.get("/loans/4/risk").json() == from_db
+        bulk = client.post("/loans/risk", json={"loan_ids": [4, 3, 6]}).json()
+    assert queries.count == 0, queries.statements
+    assert client.get("/loans/3/risk").status_code == 404
+
+    assert bulk[0] == from_db
+    assert bulk[1] == {"loan_id": 3, "error": "Loan features not found"}
+    assert bulk[2] == client.get("/loans/6/risk").json()
+    assert client.get("/feature-store/stats").json()["loans"] == 15
+
+class ProbaOnlyModel:
+    """
+    predict_proba only (like LightGBM): no native fast path. Scores credit_score / 1000
+    after delay seconds and records whether it ran on the event loop.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.on_loop = []
+
+    def predict_proba(self, X):
+        try:
+            asyncio.get_running_loop()
+            self.on_loop.append(True)
+        except RuntimeError:
+            self.on_loop.append(False)
+        time.sleep(self.delay)
+        p = X[:, -1] / 1000
+        return np.column_stack([1 - p, p])
+
+def test_slow_predictors_run_off_the_event_loop(seeded_db, monkeypatch):
+    primary, shadow = ProbaOnlyModel(), ProbaOnlyModel()
+    monkeypatch.setattr(main, "prediction_cache", PredictionCache(max_entries=0))
+    monkeypatch.setattr(main, "micro_batcher", None)
+    monkeypatch.setattr(main, "SessionLocal", seeded_db)
+    monkeypatch.setattr(main, "feature_store", None)
+    monkeypatch.setattr(main.model_holder, "current", LoadedModel("v-slow", primary))
+    monkeypatch.setattr(main.model_holder, "shadow", LoadedModel("v-slow-shadow", shadow))
+    monkeypatch.setattr(main.model_holder, "shadow_sample_rate", 1.0)
+    assert not main.model_holder.current.fast_path
+
+    payload = {"repayment_velocity": 0.8, "credit_utilization_ratio": 0.3, "delinquency_freq": 0,
+               "payment_consistency_score": 500.0, "amount": 10000.0, "interest_rate": 0.1,
+               "annual_income": 60000.0, "credit_score": 750.0}
+    assert client.post("/predict", json=payload).status_code == 200
+    assert client.get("/loans/4/risk").json()["loan_id"] == 4
+
+    # Every primary and shadow call ran in a worker thread
+    assert primary.on_loop == [False, False]
+    assert shadow.on_loop == [False, False]
+
+def test_concurrent_slow_predictions_keep_their_own_rows(monkeypatch):
+    import httpx
+
+    monkeypatch.setattr(main, "prediction_cache", PredictionCache(max_entries=0))
+    monkeypatch.setattr(main.model_holder, "current", LoadedModel("v-slow", ProbaOnlyModel(delay=0.01)))
+    monkeypatch.setattr(main.model_holder, "shadow", None)
+    payload = {"repayment_velocity": 0.8, "credit_utilization_ratio": 0.3, "delinquency_freq": 0,
+               "payment_consistency_score": 500.0, "amount": 10000.0, "interest_rate": 0.1,
+               "annual_income": 60000.0}
+    scores = [600 + 10 * i for i in range(20)]
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(http.post("/predict", json=dict(payload, credit_score=score))
+                                          for score in scores))
+
+    for batcher in (None, MicroBatcher(main.current_predict, max_batch_size=8, max_wait_ms=1,
+                                       inline=main.current_fast_path)):
+        monkeypatch.setattr(main, "micro_batcher", batcher)
+        responses = asyncio.run(run())
+        assert [r.json()["default_probability"] for r in responses] == [score / 1000 for score in scores]
+    assert not any(main.model_holder.current.model.on_loop)
+
+def test_dashboard_stats_cached_and_incremental(seeded_db):
+    from dashboard_stats import dashboard_cache, apply_loan_deltas, record_status_change
+
+    dashboard_cache.invalidate()
+    stats = client.get("/dashboard/stats").json()
+    assert stats["total_loans"] == 30
+    assert stats["total_volume"] == sum(1000.0 * i for i in range(1, 31))
+    assert stats["status_distribution"] == {"Current": 10, "Fully Paid": 10, "Charged Off": 10}
+
+    before = client.get("/dashboard/stats/cache").json()
+    with QueryCounter() as queries:
+        assert client.get("/dashboard/stats").json() == stats
+    assert queries.count == 0
+    assert client.get("/dashboard/stats/cache").json()["hits"] == before["hits"] + 1
+
+    db = seeded_db()
+    loan = db.get(Loan, 3)
+    record_status_change(db, loan, "Fully Paid")
+    apply_loan_deltas(db, {"Current": (2, 500.0)})
+    # Aggregates read before the commit must not be served after it
+    dashboard_cache.invalidate()
+    assert client.get("/dashboard/stats").json()["total_loans"] == 30
+    db.commit()
+    db.close()
+
+    stats = client.get("/dashboard/stats").json()
+    assert stats["total_loans"] == 32
+    assert stats["status_distribution"] == {"Current": 11, "Fully Paid": 11, "Charged Off": 10}
+    dashboard_cache.invalidate()
+
+def test_loan_status_change_updates_dashboard_aggregates(seeded_db, monkeypatch):
+    from dashboard_stats import dashboard_cache, record_status_change
+
+    dashboard_cache.invalidate()
+    # No aggregates yet: the first change rebuilds them, and the rebuild must
+    # see the change even from a session that does not autoflush (SessionLocal)
+    db = seeded_db(autoflush=False)
+    record_status_change(db, db.get(Loan, 2), "Current")
+    db.commit()
+    db.close()
+    assert client.get("/dashboard/stats").json()["status_distribution"] == {
+        "Current": 11, "Fully Paid": 10, "Charged Off": 9
+    }
+
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    admin = TestClient(app, headers={"X-Admin-Token": "secret"})
+    response = admin.put("/admin/loans/4/status", json={"loan_status": "Charged Off"})
+    assert response.json() == {"id": 4, "status": "Charged Off"}
+    assert client.get("/dashboard/stats").json()["status_distribution"] == {
+        "Current": 11, "Fully Paid": 9, "Charged Off": 10
+    }
+    assert admin.put("/admin/loans/99/status", json={"loan_status": "Current"}).status_code == 404
+    dashboard_cache.invalidate()
+
+def test_admin_model_reload_and_shadow(tmp_path, monkeypatch):
+    from model_registry import ModelHolder, current_version, register_model
+
+    registry = str(tmp_path / "registry")
+    serving = main.model_holder.current.model
+    v1 = register_model(serving, registry)
+    v2 = register_model(serving, registry, activate=False, metrics={"auc": 0.7})
+    holder = ModelHolder(registry)
+    holder.load()
+    monkeypatch.setattr(main, "model_holder", holder)
+    monkeypatch.setattr(main, "REGISTRY_DIR", registry)
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    admin = TestClient(app, headers={"X-Admin-Token": "secret"})
+    payload = {"repayment_velocity": 0.8, "credit_utilization_ratio": 0.3, "delinquency_freq": 0,
+               "payment_consistency_score": 500.0, "amount": 10000.0, "interest_rate": 0.1,
+               "annual_income": 60000.0, "credit_score": 750.0}
+    expected = client.post("/predict", json=payload).json()
+
+    assert [m["version"] for m in admin.get("/admin/models").json()] == [v1, v2]
+    response = admin.post("/admin/model/reload", params={"version": v2, "activate": True})
+    assert response.status_code == 200 and response.json()["version"] == v2
+    info = admin.get("/admin/model").json()
+    assert info["current"]["version"] == v2 and info["registry_current"] == v2
+    assert admin.post("/admin/model/reload", params={"version": "v0042"}).status_code == 400
+    assert admin.get("/admin/model").json()["current"]["version"] == v2
+
+    # A broken version is rejected before it becomes CURRENT
+    v3 = register_model(serving, registry, activate=False)
+    with open(os.path.join(registry, v3, "model.pkl"), "wb") as f:
+        f.write(b"not a pickle")
+    assert admin.post("/admin/model/reload", params={"version": v3, "activate": True}).status_code == 400
+    assert current_version(registry) == v2
+    assert admin.get("/admin/model").json()["current"]["version"] == v2
+
+    assert admin.post("/admin/model/shadow", params={"version": v1}).status_code == 200
+    assert client.post("/predict", json=payload).json() == expected
+    client.post("/predict/batch", json=[payload, payload])
+    stats = admin.get("/admin/model/shadow").json()
+    assert stats["shadow"]["version"] == v1 and stats["primary"] == v2
+    assert stats["calls"] == 2 and stats["rows"] == 3 and stats["max_abs_diff"] == 0.0
+    admin.delete("/admin/model/shadow")
+    assert admin.get("/admin/model").json()["shadow"] is None
+
+    # Version names never reach the filesystem unchecked
+    assert admin.post("/admin/model/reload", params={"version": "../../etc"}).status_code == 400
+    assert admin.post("/admin/model/shadow", params={"version": "v1/../v0001"}).status_code == 400
+
+    assert client.get("/admin/model").status_code == 403
+    assert client.get("/admin/model", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    # No token configured: admin endpoints are refused, not open
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    assert admin.get("/admin/model").status_code == 403
+    assert client.post("/admin/model/reload", params={"version": v1, "activate": True}).status_code == 403
+
+def test_prediction_cache(tmp_path, monkeypatch):
+    from model_registry import ModelHolder, register_model
+
+    registry = str(tmp_path / "registry")
+    serving = main.model_holder.current.model
+    register_model(serving, registry)
+    v2 = register_model(serving, registry, activate=False)
+    holder = ModelHolder(registry)
+    holder.load()
+    monkeypatch.setattr(main, "model_holder", holder)
+    monkeypatch.setattr(main, "prediction_cache", PredictionCache(max_entries=100, decimals=2))
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    admin = TestClient(app, headers={"X-Admin-Token": "secret"})
+    payload = {"repayment_velocity": 0.8, "credit_utilization_ratio": 0.3, "delinquency_freq": 0,
+               "payment_consistency_score": 500.0, "amount": 10000.0, "interest_rate": 0.1,
+               "annual_income": 60000.0, "credit_score": 750.0}
+
+    first = client.post("/predict", json=payload).json()
+    # Same request once rounded to 2 decimals
+    assert client.post("/predict", json={**payload, "repayment_velocity": 0.8001}).json() == first
+    stats = client.get("/predict/cache/stats").json()["predict"]
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+    # A model swap drops the cached scores
+    admin.post("/admin/model/reload", params={"version": v2})
+    assert client.post("/predict", json=payload).json() == first
+    stats = client.get("/predict/cache/stats").json()["predict"]
+    assert stats["misses"] == 2 and stats["invalidations"] == 1 and stats["model_version"] == v2
+
 def test_recommend_endpoint():
     payload = {"default_probability": 0.7}
     response = client.post("/recommend", json=payload)
@@ -41,6 +483,12 @@ def test_recommend_endpoint():
     data = response.json()
     assert data["risk_segment"] == "High Risk"
 
+    # Every probability gets its own answer, whatever was asked before
+    for probability in (0.199, 0.2012, 0.199):
+        data = client.post("/recommend", json={"default_probability": probability}).json()
+        assert data["default_probability"] == probability
+        assert data["risk_segment"] == main.rec_engine.get_recommendation(probability)["risk_segment"]
+
 if __name__ == "__main__":
     try:
         test_read_root()
@@ -0,0 +1,65 @@
+import sys
+import os
+import asyncio
+
+import numpy as np
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from batching import MicroBatcher
+
+def test_concurrent_requests_are_batched():
+    calls = []
+
+    def predict(X):
+        calls.append(len(X))
+        return X.sum(axis=1)
+
+    batcher = MicroBatcher(predict, max_batch_size=16, max_wait_ms=5)
+
+    async def run():
+        rows = [np.full(8, i, dtype=np.float64) for i in range(40)]
+        return await asyncio.gather(*(batcher.submit(row) for row in rows))
+
+    results = asyncio.run(run())
+
+    assert results == [8.0 * i for i in range(40)]
+    assert sum(calls) == 40
+    assert max(calls) <= 16
+    assert len(calls) < 40
+    stats = batcher.stats()
+    assert stats["rows_total"] == 40
+    assert stats["batches_total"] == len(calls)
+    assert stats["queue_depth"] == 0
+
+def test_predictor_errors_reach_every_caller():
+    def predict(X):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=1)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(np.zeros(8)) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+
+def test_slow_predictor_runs_in_executor():
+    on_loop = []
+
+    def predict(X):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return X.sum(axis=1)
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=1, inline=lambda: False)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(np.full(8, i, dtype=np.float64)) for i in range(6)))
+
+    assert asyncio.run(run()) == [8.0 * i for i in range(6)]
+    assert on_loop and not any(on_loop)
@@ -0,0 +1,56 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+import xgboost as xgb
+from sklearn.linear_model import LogisticRegression
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from compiled_model import compile_model, export_compiled_model, load_compiled_model
+from scoring import FEATURE_COLUMNS, build_fast_predictor
+
+def make_data(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    # Feature scales roughly like the real columns (ratios, counts, amounts, scores)
+    X = rng.normal(size=(n, len(FEATURE_COLUMNS))) * [1, 1, 3, 100, 1e4, 0.05, 3e4, 50]
+    y = (X[:, 0] + X[:, 2] / 3 + X[:, 7] / 50 + rng.normal(size=n) > 0).astype(int)
+    return X, y
+
+@pytest.mark.parametrize("params", [
+    {"max_depth": 3, "n_estimators": 50},
+    {"max_depth": 5, "n_estimators": 100, "learning_rate": 0.05},
+])
+def test_compiled_xgboost_matches_library(params):
+    X, y = make_data()
+    model = xgb.XGBClassifier(n_jobs=1, random_state=0, **params).fit(X, y)
+    compiled = compile_model(model)
+
+    X_test, _ = make_data(500, seed=1)
+    X_test[np.random.default_rng(2).random(X_test.shape) < 0.1] = np.nan
+    expected = model.predict_proba(X_test)[:, 1]
+    np.testing.assert_allclose(compiled.predict_proba(X_test)[:, 1], expected, rtol=0, atol=1e-6)
+    # Single rows take the same path as batches
+    np.testing.assert_allclose(build_fast_predictor(compiled)(X_test[:1]), expected[:1], rtol=0, atol=1e-6)
+
+def test_compiled_logistic_regression_matches_library():
+    X, y = make_data()
+    model = LogisticRegression(max_iter=1000).fit(X, y)
+    compiled = compile_model(model)
+    np.testing.assert_allclose(compiled.predict_proba(X)[:, 1], model.predict_proba(X)[:, 1], rtol=0, atol=1e-12)
+
+def test_export_round_trip(tmp_path):
+    X, y = make_data()
+    model = xgb.XGBClassifier(n_estimators=20, max_depth=4, n_jobs=1).fit(X, y)
+    assert export_compiled_model(model, str(tmp_path)) == "tree_ensemble"
+    loaded = load_compiled_model(str(tmp_path))
+    np.testing.assert_allclose(loaded.predict_proba(X)[:, 1], model.predict_proba(X)[:, 1], rtol=0, atol=1e-6)
+
+def test_unsupported_models_are_rejected():
+    X, y = make_data()
+    with pytest.raises(ValueError):
+        compile_model(xgb.XGBRegressor(n_estimators=5).fit(X, y))
+    with pytest.raises(ValueError):
+        compile_model(object())
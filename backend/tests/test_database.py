@@ -0,0 +1,29 @@
+import sys
+import os
+
+from sqlalchemy import text
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from database import make_engine
+
+def test_pragmas_applied_and_reads_not_blocked_by_writer(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER)"))
+        conn.execute(text("INSERT INTO t (v) VALUES (1)"))
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -64 * 1024
+
+    # With WAL a reader sees the last committed value while a write is open
+    writer = engine.connect()
+    tx = writer.begin()
+    writer.execute(text("UPDATE t SET v = 2"))
+    with engine.connect() as reader:
+        assert reader.execute(text("SELECT v FROM t")).scalar() == 1
+    tx.commit()
+    writer.close()
+    assert engine.pool.size() == 10
+    engine.dispose()
@@ -0,0 +1,99 @@
+import sys
+import os
+import datetime
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from database import Base, QueryCounter
+from models import Borrower, Loan, LoanFeatures
+from feature_store import OnlineFeatureStore, read_features
+
+BASE_TIME = datetime.datetime(2024, 6, 1)
+
+def add_loan(db, i, delinquency_freq, updated_at=None):
+    db.add(Borrower(id=i, full_name=f"B{i}", credit_score=600 + i, annual_income=1000.0 * i))
+    db.add(Loan(id=i, borrower_id=i, amount=100.0 * i, interest_rate=0.01 * i, loan_status="Current",
+                issue_date=datetime.datetime(2024, 1, 1)))
+    db.add(LoanFeatures(loan_id=i, repayment_velocity=0.1 * i, credit_utilization_ratio=0.5,
+                        delinquency_freq=delinquency_freq, payment_consistency_score=10.0 * i,
+                        updated_at=updated_at or BASE_TIME + datetime.timedelta(seconds=i)))
+
+def expected_row(i, delinquency_freq):
+    return [0.1 * i, 0.5, delinquency_freq, 10.0 * i, 100.0 * i, 0.01 * i, 1000.0 * i, 600 + i]
+
+def make_store(tmp_path, loan_ids):
+    engine = create_engine(f"sqlite:///{tmp_path / 'store.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        for i in loan_ids:
+            add_loan(db, i, i)
+        db.commit()
+    return Session, OnlineFeatureStore(Session, overlap_seconds=0, chunk_size=3)
+
+def test_load_and_lookup(tmp_path):
+    Session, store = make_store(tmp_path, [1, 2, 5, 7, 8])
+    assert not store.ready
+    assert store.load() == 5
+    assert store.ready
+
+    np.testing.assert_allclose(store.get(5), [expected_row(5, 5)])
+    assert store.get(3) is None and store.get(100) is None and store.get(-1) is None
+
+    X, found = store.lookup([8, 3, 1, 100])
+    assert found.tolist() == [True, False, True, False]
+    np.testing.assert_allclose(X, [expected_row(8, 8), expected_row(1, 1)])
+
+    # Lookups never touch the database
+    with QueryCounter() as queries:
+        store.lookup([1, 2])
+        store.get(7)
+    assert queries.count == 0
+
+    # The database path returns the same rows
+    with Session() as db:
+        X_db, found_db = read_features(db, [8, 3, 1, 100])
+    assert found_db.tolist() == found.tolist()
+    np.testing.assert_array_equal(X_db, X)
+
+def test_incremental_refresh(tmp_path):
+    # overlap_seconds=0 and timestamps in the past: the watermark is the last updated_at read
+    Session, store = make_store(tmp_path, [1, 2, 3])
+    store.load()
+    assert store.watermark == BASE_TIME + datetime.timedelta(seconds=3)
+    changed_at = BASE_TIME + datetime.timedelta(seconds=10)
+    with Session() as db:
+        features = db.query(LoanFeatures).filter_by(loan_id=2).one()
+        features.delinquency_freq = 9
+        features.updated_at = changed_at
+        add_loan(db, 40, 4, updated_at=changed_at)
+        db.commit()
+
+    assert store.refresh() == 2
+    assert store.size == 4
+    np.testing.assert_allclose(store.get(2), [expected_row(2, 9)])
+    np.testing.assert_allclose(store.get(40), [expected_row(40, 4)])
+    np.testing.assert_allclose(store.get(1), [expected_row(1, 1)])
+    assert store.stats()["refreshes"] == 1
+
+    assert store.watermark == changed_at
+    assert store.refresh() == 0
+    assert store.size == 4
+
+def test_recent_rows_are_read_again_within_overlap(tmp_path):
+    Session, store = make_store(tmp_path, [1])
+    store.overlap = datetime.timedelta(seconds=60)
+    store.load()
+    with Session() as db:
+        add_loan(db, 2, 2, updated_at=datetime.datetime.utcnow())
+        db.commit()
+
+    # A row stamped less than overlap_seconds ago keeps the watermark behind it
+    assert store.refresh() == 1
+    assert store.refresh() == 1
+    assert store.size == 2
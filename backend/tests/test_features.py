@@ -0,0 +1,265 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from features import compute_loan_features, _compute_loan_features_iterrows
+
+NOW = pd.Timestamp("2025-01-01")
+
+def make_frames():
+    loans_df = pd.DataFrame({
+        "id": [1, 2, 3, 4, 5],
+        "amount": [10000.0, 5000.0, 0.0, 20000.0, 8000.0],
+        "issue_date": pd.to_datetime(["2023-01-15", "2024-06-01", "2024-01-01", "2022-03-10", "2024-12-20"]),
+        "loan_status": ["Current", "Charged Off", "Fully Paid", "Late (31-120 days)", "Current"],
+    })
+    repayments_df = pd.DataFrame({
+        "loan_id": [2, 1, 1, 4, 1, 3, 4, 4],
+        "payment_amount": [210.5, 300.0, 310.25, 900.0, 295.1, 100.0, 880.0, 915.75],
+    })
+    return loans_df, repayments_df
+
+def test_vectorized_features_match_iterrows():
+    loans_df, repayments_df = make_frames()
+
+    np.random.seed(0)
+    legacy = _compute_loan_features_iterrows(loans_df, repayments_df, now=NOW)
+    np.random.seed(0)
+    fast = compute_loan_features(loans_df, repayments_df, now=NOW)
+
+    assert list(fast.columns) == list(legacy.columns)
+    for col in fast.columns:
+        if fast[col].dtype.kind in "fi":
+            np.testing.assert_allclose(fast[col].to_numpy(), legacy[col].to_numpy(dtype=float), err_msg=col)
+        else:
+            assert (fast[col] == legacy[col]).all(), col
+
+def test_loans_without_repayments():
+    loans_df, repayments_df = make_frames()
+    fast = compute_loan_features(loans_df, repayments_df, now=NOW).set_index("loan_id")
+
+    # Loan 5 has no repayments, loan 2 a single one
+    assert fast.loc[5, "repayment_velocity"] == 0.0
+    assert fast.loc[5, "payment_consistency_score"] == 0.0
+    assert fast.loc[2, "payment_consistency_score"] == 0.0
+    # Zero-amount loan
+    assert fast.loc[3, "repayment_velocity"] == 0.0
+
+def test_incremental_updates_match_full_recompute(tmp_path):
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import sessionmaker
+    from database import Base
+    from models import Loan, Repayment, LoanFeatures
+    from features import update_features_incremental
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'features.db'}")
+    Base.metadata.create_all(bind=engine)
+    rng = np.random.default_rng(3)
+    loans = [{"id": i, "amount": float(rng.integers(1000, 20000)), "loan_status": "Current",
+              "issue_date": pd.Timestamp("2023-01-01") + pd.Timedelta(days=int(rng.integers(0, 600)))}
+             for i in range(1, 41)]
+    payments = [{"id": i, "loan_id": int(rng.integers(1, 41)), "payment_amount": float(np.round(rng.uniform(50, 900), 2)),
+                 "payment_date": pd.Timestamp("2024-01-01") + pd.Timedelta(days=int(i))}
+                for i in range(1, 301)]
+
+    def full_recompute(num_payments):
+        return compute_loan_features(pd.DataFrame(loans), pd.DataFrame(payments[:num_payments]), now=NOW).set_index("loan_id")
+
+    def stored_features():
+        db = sessionmaker(bind=engine)()
+        rows = {f.loan_id: f for f in db.query(LoanFeatures)}
+        db.close()
+        return rows
+
+    with engine.connect() as conn:
+        conn.execute(insert(Loan), loans)
+        conn.execute(insert(Repayment), payments[:200])
+        conn.commit()
+        assert update_features_incremental(conn, now=NOW) == len({p["loan_id"] for p in payments[:200]})
+
+        # Apply two more deltas; only the loans they touch are rewritten
+        for start, end in ((200, 260), (260, 300)):
+            conn.execute(insert(Repayment), payments[start:end])
+            conn.commit()
+            touched = {p["loan_id"] for p in payments[start:end]}
+            assert update_features_incremental(conn, now=NOW) == len(touched)
+        assert update_features_incremental(conn, now=NOW) == 0
+
+    expected = full_recompute(300)
+    stored = stored_features()
+    for loan_id, row in stored.items():
+        assert row.delinquency_freq == expected.loc[loan_id, "delinquency_freq"]
+        assert abs(row.repayment_velocity - expected.loc[loan_id, "repayment_velocity"]) < 1e-9
+        assert abs(row.payment_consistency_score - expected.loc[loan_id, "payment_consistency_score"]) < 1e-9
+
+def test_incremental_rebuilds_corrected_repayments(tmp_path):
+    from sqlalchemy import create_engine
+    from features import calculate_features, update_features_incremental
+    from ingest import ingest_data
+
+    data_dir = tmp_path / "raw"
+    data_dir.mkdir()
+    ids = range(1, 11)
+    pd.DataFrame({"id": ids, "full_name": [f"B{i}" for i in ids], "credit_score": [650 + i for i in ids],
+                  "annual_income": [50000.0] * 10}).to_csv(data_dir / "borrowers.csv", index=False)
+    pd.DataFrame({"id": ids, "borrower_id": ids, "amount": [1000.0 * i for i in ids], "loan_status": ["Current"] * 10,
+                  "issue_date": ["2023-06-01"] * 10}).to_csv(data_dir / "loans.csv", index=False)
+    pd.DataFrame({"id": range(1, 31), "loan_id": [i for i in ids for _ in range(3)],
+                  "payment_date": ["2024-02-15"] * 30, "payment_amount": [100.0 + i for i in range(30)],
+                  }).to_csv(data_dir / "repayments.csv", index=False)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'features.db'}")
+    ingest_data(str(data_dir), bind=engine)
+    calculate_features(bind=engine, export_path=str(tmp_path / "train.csv"), export_format="csv")
+    with engine.connect() as conn:
+        assert update_features_incremental(conn) == 0
+
+    # Correct two existing repayments (loans 1 and 2), re-deliver one unchanged, add one for loan 5
+    pd.DataFrame({"id": [1, 4, 5, 31], "loan_id": [1, 2, 2, 5], "payment_date": ["2024-02-15"] * 4,
+                  "payment_amount": [900.0, 5.0, 104.0, 60.0]}).to_csv(data_dir / "repayments_2024-03-01.csv", index=False)
+    ingest_data(str(data_dir), bind=engine)
+    with engine.connect() as conn:
+        assert update_features_incremental(conn) == 3
+        assert update_features_incremental(conn) == 0
+
+    def stored():
+        return pd.read_sql("SELECT loan_id, repayment_velocity, delinquency_freq, payment_consistency_score "
+                           "FROM loan_features ORDER BY loan_id", engine)
+
+    incremental = stored()
+    calculate_features(bind=engine, export_path=str(tmp_path / "train.csv"), export_format="csv")
+    pd.testing.assert_frame_equal(incremental, stored())
+
+def test_streaming_matches_in_memory(tmp_path):
+    from sqlalchemy import create_engine, insert
+    from database import Base
+    from models import Borrower, Loan, Repayment, LoanFeatures
+    from features import calculate_features, calculate_features_streaming
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'features.db'}")
+    Base.metadata.create_all(bind=engine)
+    rng = np.random.default_rng(5)
+    with engine.connect() as conn:
+        conn.execute(insert(Borrower), [{"id": i, "full_name": f"B{i}", "credit_score": 600 + i, "annual_income": 50000.0}
+                                        for i in range(1, 31)])
+        conn.execute(insert(Loan), [{"id": i, "borrower_id": (i % 30) + 1, "amount": float(rng.integers(1000, 20000)),
+                                     "loan_status": "Charged Off" if i % 7 == 0 else "Current",
+                                     "issue_date": pd.Timestamp("2023-01-01") + pd.Timedelta(days=i)}
+                                    for i in range(1, 101)])
+        conn.execute(insert(Repayment), [{"id": i, "loan_id": int(rng.integers(1, 101)),
+                                          "payment_amount": float(np.round(rng.uniform(50, 900), 2)),
+                                          "payment_date": pd.Timestamp("2024-01-01")}
+                                         for i in range(1, 501)])
+        conn.commit()
+
+    def stored():
+        return pd.read_sql("SELECT * FROM loan_features ORDER BY loan_id", engine).drop(
+            columns=["id", "credit_utilization_ratio", "updated_at"])
+
+    full_csv, stream_csv = str(tmp_path / "full" / "train.csv"), str(tmp_path / "stream" / "train.csv")
+    calculate_features(bind=engine, export_path=full_csv, export_format="csv")
+    expected = stored()
+    assert calculate_features_streaming(bind=engine, chunk_size=7, export_path=stream_csv, export_format="csv") == 100
+    pd.testing.assert_frame_equal(stored(), expected)
+
+    drop = ["credit_utilization_ratio"]
+    pd.testing.assert_frame_equal(pd.read_csv(stream_csv).drop(columns=drop), pd.read_csv(full_csv).drop(columns=drop))
+
+def test_parquet_export_roundtrip(tmp_path):
+    from training_data import TrainingDataWriter, load_training_data
+
+    loans_df, repayments_df = make_frames()
+    loans_df = loans_df.assign(borrower_id=loans_df["id"], credit_score=700, annual_income=50000.0)
+    features_df = compute_loan_features(loans_df, repayments_df, now=NOW)
+    export_df = loans_df.merge(features_df, left_on="id", right_on="loan_id")
+
+    path = str(tmp_path / "training_data")
+    writer = TrainingDataWriter(path, "parquet")
+    writer.write(export_df.iloc[:3])
+    writer.write(export_df.iloc[3:])
+    writer.close()
+
+    # One hive partition per issue month
+    assert sorted(os.listdir(path)) == sorted(f"issue_month={m}" for m in
+                                              pd.to_datetime(export_df["issue_date"]).dt.strftime("%Y-%m").unique())
+    columns = ["loan_id", "repayment_velocity", "credit_score", "default_probability"]
+    loaded = load_training_data(path, columns).sort_values("loan_id").reset_index(drop=True)
+    assert list(loaded.columns) == columns
+    pd.testing.assert_frame_equal(loaded, export_df[columns], check_dtype=False)
+
+    recent = load_training_data(path, ["loan_id"], filters=[("issue_month", ">=", "2024-06")])
+    assert sorted(recent["loan_id"]) == [2, 5]
+
+def test_parquet_export_drops_rows_without_issue_month(tmp_path, capsys):
+    from training_data import TrainingDataWriter, load_training_data
+
+    loans_df, repayments_df = make_frames()
+    loans_df.loc[1, "issue_date"] = pd.NaT
+    export_df = loans_df.merge(compute_loan_features(loans_df, repayments_df, now=NOW), left_on="id", right_on="loan_id")
+
+    path = str(tmp_path / "training_data")
+    writer = TrainingDataWriter(path, "parquet")
+    writer.write(export_df)
+    writer.close()
+
+    assert writer.dropped_rows == 1
+    assert "Dropped 1 rows without issue_month" in capsys.readouterr().out
+    assert sorted(load_training_data(path, ["loan_id"])["loan_id"]) == [1, 3, 4, 5]
+    assert not any("None" in name for name in os.listdir(path))
+
+def test_latest_export_path(tmp_path):
+    from training_data import latest_export_path
+
+    parquet_dir, csv_path = str(tmp_path / "training_data"), str(tmp_path / "training_data.csv")
+    assert latest_export_path((parquet_dir, csv_path)) is None
+    os.makedirs(parquet_dir)
+    open(csv_path, "w").close()
+    os.utime(parquet_dir, (1_000_000, 1_000_000))
+    # An older Parquet export does not win over a newer CSV one
+    assert latest_export_path((parquet_dir, csv_path)) == csv_path
+    os.utime(csv_path, (500_000, 500_000))
+    assert latest_export_path((parquet_dir, csv_path)) == parquet_dir
+
+def test_incremental_rebuilds_loans_repayments_moved_away_from(tmp_path):
+    from sqlalchemy import create_engine
+    from features import calculate_features, update_features_incremental
+    from ingest import ingest_data
+
+    data_dir = tmp_path / "raw"
+    data_dir.mkdir()
+    ids = range(1, 11)
+    pd.DataFrame({"id": ids, "full_name": [f"B{i}" for i in ids], "credit_score": [650 + i for i in ids],
+                  "annual_income": [50000.0] * 10}).to_csv(data_dir / "borrowers.csv", index=False)
+    pd.DataFrame({"id": ids, "borrower_id": ids, "amount": [1000.0 * i for i in ids], "loan_status": ["Current"] * 10,
+                  "issue_date": ["2023-06-01"] * 10}).to_csv(data_dir / "loans.csv", index=False)
+    pd.DataFrame({"id": range(1, 31), "loan_id": [i for i in ids for _ in range(3)],
+                  "payment_date": ["2024-02-15"] * 30, "payment_amount": [100.0 + i for i in range(30)],
+                  }).to_csv(data_dir / "repayments.csv", index=False)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'features.db'}")
+    ingest_data(str(data_dir), bind=engine)
+    calculate_features(bind=engine, export_path=str(tmp_path / "train.csv"), export_format="csv")
+
+    def stored():
+        return pd.read_sql("SELECT loan_id, repayment_velocity, delinquency_freq, payment_consistency_score "
+                           "FROM loan_features ORDER BY loan_id", engine)
+
+    # Repayment 7 moves from loan 3 to loan 4; repayment 10 moves 4 -> 6 -> 8 before the job runs
+    pd.DataFrame({"id": [7, 10], "loan_id": [4, 6], "payment_date": ["2024-02-15"] * 2,
+                  "payment_amount": [106.0, 109.0]}).to_csv(data_dir / "repayments_2024-03-01.csv", index=False)
+    pd.DataFrame({"id": [10], "loan_id": [8], "payment_date": ["2024-02-15"],
+                  "payment_amount": [109.0]}).to_csv(data_dir / "repayments_2024-03-02.csv", index=False)
+    ingest_data(str(data_dir), bind=engine)
+    with engine.connect() as conn:
+        assert update_features_incremental(conn) == 3  # loans 3, 4 and 8
+        assert update_features_incremental(conn) == 0
+    assert pd.read_sql("SELECT COUNT(*) AS n FROM repayments WHERE previous_loan_id IS NOT NULL", engine)["n"][0] == 0
+
+    incremental = stored()
+    calculate_features(bind=engine, export_path=str(tmp_path / "train.csv"), export_format="csv")
+    pd.testing.assert_frame_equal(incremental, stored())
@@ -0,0 +1,46 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, func, select
+
+# Add app and the data generator to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../data"))
+
+from generate_data import MAX_PAYMENTS, MIN_PAYMENTS, generate_sharded_data
+from database import Base
+from ingest import ingest_data
+from models import Loan, Repayment
+
+def read_all(data_dir):
+    return {name: open(os.path.join(data_dir, name)).read() for name in sorted(os.listdir(data_dir))}
+
+def test_sharded_output_is_deterministic(tmp_path):
+    serial = generate_sharded_data(250, str(tmp_path / "a"), shard_size=100, n_jobs=1, as_of="2025-01-01")
+    parallel = generate_sharded_data(250, str(tmp_path / "b"), shard_size=100, n_jobs=2, as_of="2025-01-01")
+    assert serial == parallel
+    files = read_all(tmp_path / "a")
+    assert len(files) == 9 and files == read_all(tmp_path / "b")
+
+    loans = pd.concat(pd.read_csv(tmp_path / "a" / f"loans_{i:05d}.csv") for i in range(3))
+    repayments = pd.concat(pd.read_csv(tmp_path / "a" / f"repayments_{i:05d}.csv") for i in range(3))
+    assert list(loans["id"]) == list(range(1, 251))
+    assert repayments["id"].is_unique and len(repayments) == serial
+    assert repayments.groupby("loan_id").size().max() < MAX_PAYMENTS
+    # Installment n is paid about 30 * n days after issue
+    merged = repayments.merge(loans, left_on="loan_id", right_on="id", suffixes=("", "_loan"))
+    days = (pd.to_datetime(merged["payment_date"]) - pd.to_datetime(merged["issue_date"])).dt.days
+    installment_no = merged["id"] - merged["loan_id"] * MAX_PAYMENTS
+    assert installment_no.between(1, MAX_PAYMENTS - 1).all()
+    assert np.all((days - 30 * installment_no).between(-5, 9))
+
+def test_sharded_output_ingests(tmp_path):
+    generate_sharded_data(120, str(tmp_path / "raw"), shard_size=50, n_jobs=1, as_of="2025-01-01")
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(bind=engine)
+    ingest_data(str(tmp_path / "raw"), bind=engine)
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(Loan)).scalar() == 120
+        assert conn.execute(select(func.count()).select_from(Repayment)).scalar() >= 120 * MIN_PAYMENTS // 2
@@ -0,0 +1,70 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from scoring import FEATURE_COLUMNS
+from training_data import TrainingDataWriter
+from incremental_training import iter_training_batches, train_incremental
+from model_registry import list_versions
+from compiled_model import load_compiled_model
+
+def write_export(path, n=4000, seed=2):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, len(FEATURE_COLUMNS)))
+    df = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    df["delinquency_freq"] = np.round(np.clip(X[:, 2] * 3 + 6, 0, None))
+    df["credit_score"] = np.round(700 + X[:, 7] * 50)
+    df["loan_id"] = np.arange(1, n + 1)
+    df["default_probability"] = (X[:, 0] - X[:, 2] + rng.normal(scale=0.5, size=n) > 0).astype(float)
+    df["issue_date"] = np.where(df["loan_id"] <= n // 2, pd.Timestamp("2024-01-05"), pd.Timestamp("2024-02-05"))
+    writer = TrainingDataWriter(path, "parquet")
+    writer.write(df)
+    writer.close()
+
+def test_batches_split_holdout_and_respect_filters(tmp_path):
+    path = str(tmp_path / "training_data")
+    write_export(path)
+    train = list(iter_training_batches(path, batch_rows=500))
+    holdout = list(iter_training_batches(path, batch_rows=500, holdout=True))
+    assert max(len(X) for X, _ in train) <= 500
+    assert sum(len(X) for X, _ in train) == 3600 and sum(len(X) for X, _ in holdout) == 400
+    january = list(iter_training_batches(path, filters=[("issue_month", "=", "2024-01")]))
+    assert sum(len(X) for X, _ in january) == 1800
+
+def test_out_of_core_training_and_warm_start(tmp_path):
+    path = str(tmp_path / "training_data")
+    write_export(path)
+    compiled_dir = str(tmp_path / "artifacts" / "compiled")
+    artifacts = {"model_path": str(tmp_path / "artifacts" / "best_model.pkl"),
+                 "shared_dir": str(tmp_path / "artifacts" / "shared"), "compiled_dir": compiled_dir}
+
+    model, auc = train_incremental(path, "xgboost", batch_rows=500, num_boost_round=20, **artifacts)
+    assert auc > 0.85
+    assert model.get_booster().num_boosted_rounds() == 20
+
+    # Warm start on one month adds trees to the saved booster
+    model, auc = train_incremental(path, "auto", batch_rows=500, filters=[("issue_month", "=", "2024-02")],
+                                   num_boost_round=5, **artifacts)
+    assert model.get_booster().num_boosted_rounds() == 25
+    assert auc > 0.85
+    # The compiled export follows the retrained model
+    X = np.random.default_rng(0).normal(size=(50, len(FEATURE_COLUMNS)))
+    np.testing.assert_allclose(load_compiled_model(compiled_dir).predict_proba(X)[:, 1],
+                               model.predict_proba(X)[:, 1], atol=1e-6)
+
+    registry = str(tmp_path / "registry")
+    linear, auc = train_incremental(path, "linear", warm_start=False, batch_rows=500, registry_dir=registry,
+                                    **artifacts)
+    assert type(linear).__name__ == "LogisticRegression" and auc > 0.85
+    warm, warm_auc = train_incremental(path, "auto", batch_rows=500, filters=[("issue_month", "=", "2024-02")],
+                                       epochs=1, registry_dir=registry, **artifacts)
+    versions = list_versions(registry)
+    assert [(m["version"], m["parent"]) for m in versions] == [("v0001", None), ("v0002", "v0001")]
+    assert versions[1]["metrics"]["holdout_auc"] == warm_auc
+    assert warm_auc > 0.85
+    np.testing.assert_allclose(warm.coef_, linear.coef_, atol=0.5)
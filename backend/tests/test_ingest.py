@@ -0,0 +1,188 @@
+import sys
+import os
+import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from ingest import ingest_data
+from models import Borrower, Loan, Repayment, LoanStatusAggregate
+
+def write_raw(data_dir, num_loans=20, bad_repayment=False):
+    os.makedirs(data_dir, exist_ok=True)
+    ids = range(1, num_loans + 1)
+    pd.DataFrame({
+        "id": ids, "full_name": [f"Borrower_{i}" for i in ids], "credit_score": [650 + i for i in ids],
+        "annual_income": [40000.0 + i for i in ids], "employment_years": [i % 10 for i in ids],
+        "home_ownership": ["RENT"] * num_loans,
+    }).to_csv(os.path.join(data_dir, "borrowers.csv"), index=False)
+    pd.DataFrame({
+        "id": ids, "borrower_id": ids, "amount": [1000.0 * i for i in ids], "term_months": [36] * num_loans,
+        "interest_rate": [0.1] * num_loans, "grade": ["A"] * num_loans,
+        "issue_date": ["2024-01-15 10:30:00.123456"] * num_loans,
+        "loan_status": ["Current" if i % 2 else "Charged Off" for i in ids], "installment": [30.0] * num_loans,
+    }).to_csv(os.path.join(data_dir, "loans.csv"), index=False)
+    repayments = pd.DataFrame({
+        "id": range(1, 3 * num_loans + 1),
+        "loan_id": [i for i in ids for _ in range(3)],
+        "payment_date": ["2024-02-15"] * (3 * num_loans),
+        "payment_amount": [25.5] * (3 * num_loans),
+    })
+    if bad_repayment:
+        repayments.loc[len(repayments) - 1, "id"] = 1  # duplicate primary key
+    repayments.to_csv(os.path.join(data_dir, "repayments.csv"), index=False)
+
+def make_engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+
+def test_bulk_ingest_loads_all_tables(tmp_path):
+    data_dir = str(tmp_path / "raw")
+    write_raw(data_dir)
+    engine = make_engine(tmp_path)
+
+    stats = ingest_data(data_dir, chunk_size=7, bind=engine)
+    assert stats["repayments.csv"]["rows"] == 60
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(Borrower).count() == 20
+    assert db.query(Repayment).count() == 60
+    loan = db.get(Loan, 3)
+    assert loan.issue_date == datetime.datetime(2024, 1, 15, 10, 30, 0, 123456)
+    assert loan.borrower.full_name == "Borrower_3"
+    aggregates = {a.loan_status: a.loan_count for a in db.query(LoanStatusAggregate)}
+    assert aggregates == {"Current": 10, "Charged Off": 10}
+    db.close()
+
+    # Re-running is a no-op: every file is checkpointed
+    assert ingest_data(data_dir, chunk_size=7, bind=engine) == {}
+
+def test_interrupted_load_resumes_from_checkpoint(tmp_path, monkeypatch):
+    import ingest
+
+    data_dir = str(tmp_path / "raw")
+    write_raw(data_dir)
+    engine = make_engine(tmp_path)
+
+    real_to_rows = ingest._to_rows
+    calls = {"n": 0}
+
+    def flaky_to_rows(chunk, columns, date_columns):
+        calls["n"] += 1
+        if "payment_amount" in columns and calls["n"] > 9:
+            raise RuntimeError("disk full")
+        return real_to_rows(chunk, columns, date_columns)
+
+    monkeypatch.setattr(ingest, "_to_rows", flaky_to_rows)
+    with pytest.raises(RuntimeError):
+        ingest_data(data_dir, chunk_size=7, bind=engine)
+
+    db = sessionmaker(bind=engine)()
+    partial = db.query(Repayment).count()
+    assert 0 < partial < 60 and partial % 7 == 0
+    db.close()
+
+    monkeypatch.setattr(ingest, "_to_rows", real_to_rows)
+    stats = ingest_data(data_dir, chunk_size=7, bind=engine)
+    assert list(stats) == ["repayments.csv"]
+    assert stats["repayments.csv"]["rows"] == 60
+    assert stats["repayments.csv"]["rows_written"] == 60 - partial
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(Repayment).count() == 60
+    db.close()
+
+def test_delta_files_upsert_only_new_or_changed_rows(tmp_path):
+    data_dir = str(tmp_path / "raw")
+    write_raw(data_dir)
+    engine = make_engine(tmp_path)
+    ingest_data(data_dir, chunk_size=7, bind=engine)
+
+    # Delta: 2 re-delivered unchanged rows, 1 corrected amount, 2 new payments
+    pd.DataFrame({
+        "id": [1, 2, 3, 61, 62],
+        "loan_id": [1, 1, 1, 5, 6],
+        "payment_date": ["2024-02-15"] * 3 + ["2024-03-15"] * 2,
+        "payment_amount": [25.5, 25.5, 30.0, 40.0, 41.0],
+    }).to_csv(os.path.join(data_dir, "repayments_2024-03-16.csv"), index=False)
+
+    stats = ingest_data(data_dir, chunk_size=7, bind=engine)
+    assert list(stats) == ["repayments_2024-03-16.csv"]
+    assert stats["repayments_2024-03-16.csv"]["rows_written"] == 3
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(Repayment).count() == 62
+    assert db.get(Repayment, 3).payment_amount == 30.0
+    db.close()
+
+    # Status corrections to existing loans rebuild the dashboard aggregates
+    pd.DataFrame({
+        "id": [2], "borrower_id": [2], "amount": [2000.0], "term_months": [36], "interest_rate": [0.1],
+        "grade": ["A"], "issue_date": ["2024-01-15 10:30:00.123456"], "loan_status": ["Fully Paid"],
+        "installment": [30.0],
+    }).to_csv(os.path.join(data_dir, "loans_2024-03-16.csv"), index=False)
+    ingest_data(data_dir, chunk_size=7, bind=engine)
+    db = sessionmaker(bind=engine)()
+    aggregates = {a.loan_status: a.loan_count for a in db.query(LoanStatusAggregate)}
+    assert aggregates == {"Current": 10, "Charged Off": 9, "Fully Paid": 1}
+    db.close()
+
+def test_sharded_export_builds_indexes_and_aggregates_once(tmp_path, monkeypatch):
+    import ingest
+    from sqlalchemy import event, inspect
+
+    data_dir = str(tmp_path / "raw")
+    write_raw(data_dir)
+    loans_csv = os.path.join(data_dir, "loans.csv")
+    loans = pd.read_csv(loans_csv)
+    os.remove(loans_csv)
+    for shard, rows in enumerate((loans.iloc[:8], loans.iloc[8:15], loans.iloc[15:])):
+        rows.to_csv(os.path.join(data_dir, f"loans_{shard:05d}.csv"), index=False)
+    engine = make_engine(tmp_path)
+
+    rebuilds = []
+    real_rebuild = ingest.rebuild_aggregates
+    monkeypatch.setattr(ingest, "rebuild_aggregates", lambda conn: rebuilds.append(1) or real_rebuild(conn))
+    index_ddl = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record_ddl(conn, cursor, statement, *args):
+        if statement.lstrip().startswith(("CREATE INDEX", "DROP INDEX")):
+            index_ddl.append(statement)
+
+    ingest_data(data_dir, chunk_size=4, bind=engine)
+
+    assert len(rebuilds) == 1
+    # create_all builds each index; the empty loans table drops it once and rebuilds it once
+    loan_indexes = Loan.__table__.indexes
+    for index in loan_indexes:
+        statements = [s.split()[0] for s in index_ddl if index.name in s.split()]
+        assert statements == ["CREATE", "DROP", "CREATE"]
+    assert {i["name"] for i in inspect(engine).get_indexes("loans")} >= {i.name for i in loan_indexes if i.name}
+
+    db = sessionmaker(bind=engine)()
+    aggregates = {a.loan_status: a.loan_count for a in db.query(LoanStatusAggregate)}
+    assert aggregates == {"Current": 10, "Charged Off": 10}
+    db.close()
+
+def test_bulk_load_pragmas_are_restored_on_pooled_connections(tmp_path):
+    from sqlalchemy import text
+    from database import make_engine as make_pooled_engine
+
+    data_dir = str(tmp_path / "raw")
+    write_raw(data_dir)
+    engine = make_pooled_engine(f"sqlite:///{tmp_path / 'ingest.db'}", pool_size=1, max_overflow=0)
+
+    def pragmas():
+        with engine.connect() as conn:
+            return {name: conn.execute(text(f"PRAGMA {name}")).scalar()
+                    for name in ("journal_mode", "synchronous", "temp_store", "cache_size")}
+
+    before = pragmas()
+    ingest_data(data_dir, bind=engine)
+    assert pragmas() == before
+    engine.dispose()
@@ -0,0 +1,51 @@
+import sys
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from instrumentation import Histogram, InstrumentationMiddleware, Metrics, SlowRequestProfiler
+
+def test_histogram_exposition():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(("/a",), value)
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/a"} 4' in lines
+
+def test_middleware_routes_and_slow_request_profiles(tmp_path):
+    app = FastAPI()
+    metrics = Metrics()
+    profiler = SlowRequestProfiler(threshold_ms=30, output_dir=str(tmp_path), interval_ms=1)
+    app.add_middleware(InstrumentationMiddleware, metrics=metrics, profiler=profiler)
+
+    @app.get("/items/{item_id}")
+    def slow_item(item_id: int):
+        time.sleep(0.1)
+        return {"id": item_id}
+
+    @app.get("/fast")
+    def fast():
+        return {}
+
+    client = TestClient(app)
+    assert client.get("/items/1").status_code == 200
+    assert client.get("/fast").status_code == 200
+    assert client.get("/missing").status_code == 404
+
+    text = metrics.render()
+    assert 'creditpath_http_requests_total{method="GET",route="/items/{item_id}",status="200"} 1.0' in text
+    assert 'creditpath_http_requests_total{method="GET",route="unmatched",status="404"} 1.0' in text
+
+    # Only the slow request is dumped, with the handler on its sampled stacks
+    dumps = os.listdir(tmp_path)
+    assert len(dumps) == 1 and "items" in dumps[0]
+    with open(tmp_path / dumps[0]) as f:
+        assert "slow_item" in f.read()
@@ -0,0 +1,78 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from model_registry import (ModelHolder, ModelWatcher, current_version, list_versions, load_version,
+                            register_model, set_current)
+from scoring import FEATURE_COLUMNS
+
+def make_model(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(200, len(FEATURE_COLUMNS)))
+    y = (X[:, seed % len(FEATURE_COLUMNS)] > 0).astype(int)
+    return LogisticRegression().fit(X, y)
+
+def test_register_versions_and_current(tmp_path):
+    registry = str(tmp_path / "registry")
+    v1 = register_model(make_model(1), registry, metrics={"auc": 0.71}, training_hash="abc")
+    v2 = register_model(make_model(2), registry, activate=False, parent=v1)
+    assert (v1, v2) == ("v0001", "v0002")
+    assert current_version(registry) == v1
+    versions = list_versions(registry)
+    assert [m["version"] for m in versions] == [v1, v2]
+    assert versions[0]["metrics"] == {"auc": 0.71} and versions[0]["training_hash"] == "abc"
+    assert versions[0]["features"] == FEATURE_COLUMNS and versions[1]["parent"] == v1
+
+    shared = load_version(registry, v2, model_format="shared")
+    pickled = load_version(registry, v2)
+    X = np.random.default_rng(0).normal(size=(5, len(FEATURE_COLUMNS)))
+    np.testing.assert_allclose(shared.predict(X), pickled.predict(X))
+    compiled = load_version(registry, v2, model_format="compiled")
+    assert type(compiled.model).__name__ == "CompiledLinearModel"
+    np.testing.assert_allclose(compiled.predict(X), pickled.predict(X), atol=1e-12)
+
+    with pytest.raises(ValueError):
+        set_current(registry, "v0009")
+    for bad in ("../v0001", "v0001/..", "/etc/passwd", "v1"):
+        with pytest.raises(ValueError):
+            set_current(registry, bad)
+        with pytest.raises(ValueError):
+            load_version(registry, bad)
+
+def test_holder_swap_keeps_snapshots_and_watcher_follows_current(tmp_path):
+    registry = str(tmp_path / "registry")
+    v1 = register_model(make_model(1), registry)
+    v2 = register_model(make_model(2), registry, activate=False)
+    holder = ModelHolder(registry)
+    holder.load()
+    in_flight = holder.current
+    assert in_flight.version == v1
+
+    watcher = ModelWatcher(holder)
+    assert not watcher.check()
+    set_current(registry, v2)
+    assert watcher.check()
+    assert holder.current.version == v2 and holder.swaps == 2
+    # A request that read the model before the swap still scores with v1
+    assert in_flight.version == v1
+
+def test_shadow_scoring_records_latency_and_diffs(tmp_path):
+    registry = str(tmp_path / "registry")
+    register_model(make_model(1), registry)
+    v2 = register_model(make_model(2), registry, activate=False)
+    holder = ModelHolder(registry)
+    holder.load()
+    holder.set_shadow(v2, sample_rate=0.5)
+    assert [holder.shadow_due() for _ in range(4)] == [False, True, False, True]
+
+    X = np.random.default_rng(3).normal(size=(10, len(FEATURE_COLUMNS)))
+    holder.run_shadow(X, holder.current.predict(X), 0.1)
+    stats = holder.shadow_stats.snapshot()
+    assert stats["calls"] == 1 and stats["rows"] == 10 and stats["errors"] == 0
+    assert stats["max_abs_diff"] > 0 and stats["shadow_latency_ms"]["p50"] is not None
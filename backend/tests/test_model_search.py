@@ -0,0 +1,47 @@
+import sys
+import os
+
+import numpy as np
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from model_search import make_estimator, run_search
+
+SPACES = {
+    "logistic_regression": {"C": [0.1, 1.0]},
+    "xgboost": {"max_depth": [2], "n_estimators": [10]},
+    "lightgbm": {"num_leaves": [4], "n_estimators": [10]},
+}
+
+def make_data(n=300, seed=11):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 8))
+    y = (X[:, 0] - X[:, 2] + rng.normal(scale=0.5, size=n) > 0).astype(int)
+    return X, y
+
+def test_search_ranks_candidates_and_reuses_cached_folds(tmp_path):
+    X, y = make_data()
+    cache_dir = str(tmp_path / "cache")
+
+    first = run_search(X, y, n_splits=3, n_jobs=2, cache_dir=cache_dir, search_spaces=SPACES)
+    assert len(first) == 4
+    assert [r["mean_auc"] for r in first] == sorted((r["mean_auc"] for r in first), reverse=True)
+    assert all(len(r["fold_aucs"]) == 3 and r["cached_folds"] == 0 for r in first)
+    assert len(os.listdir(cache_dir)) == 4 * 3
+
+    # Rerun: every fold comes from the cache with identical scores
+    second = run_search(X, y, n_splits=3, n_jobs=2, cache_dir=cache_dir, search_spaces=SPACES)
+    assert all(r["cached_folds"] == 3 for r in second)
+    assert [(r["family"], r["fold_aucs"]) for r in second] == [(r["family"], r["fold_aucs"]) for r in first]
+
+    # Different data -> different cache keys
+    X2, y2 = make_data(seed=12)
+    third = run_search(X2, y2, n_splits=3, n_jobs=1, cache_dir=cache_dir, search_spaces=SPACES)
+    assert all(r["cached_folds"] == 0 for r in third)
+
+def test_make_estimator_threads():
+    # CV candidates are single-threaded; the final refit passes its n_jobs through
+    for family in ("xgboost", "lightgbm"):
+        assert make_estimator(family, {}).get_params()["n_jobs"] == 1
+        assert make_estimator(family, {}, n_jobs=4).get_params()["n_jobs"] == 4
@@ -0,0 +1,46 @@
+import sys
+import os
+import time
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from prediction_cache import PredictionCache
+
+def test_lru_eviction_and_hits():
+    cache = PredictionCache(max_entries=2)
+    for i in range(3):
+        cache.put(cache.key("predict", [i]), {"p": i}, "v1")
+    assert cache.get(cache.key("predict", [0]), "v1") is None
+    assert cache.get(cache.key("predict", [1]), "v1") == {"p": 1}
+
+    # 1 is now the most recently used, so 2 goes next
+    cache.put(cache.key("predict", [3]), {"p": 3}, "v1")
+    assert cache.get(cache.key("predict", [2]), "v1") is None
+    assert cache.get(cache.key("predict", [1]), "v1") == {"p": 1}
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (2, 2, 2, 2)
+
+def test_ttl_rounding_and_model_change():
+    cache = PredictionCache(max_entries=10, ttl_seconds=0.05, decimals=3)
+    key = cache.key("predict", [0.12341, 5])
+    assert key == cache.key("predict", [0.12339, 5.0])
+    cache.put(key, "a", "v1")
+    assert cache.get(key, "v1") == "a"
+
+    time.sleep(0.06)
+    assert cache.get(key, "v1") is None
+    assert cache.stats()["expirations"] == 1
+
+    cache.put(key, "a", "v1")
+    assert cache.get(key, "v2") is None
+    cache.put(key, "b", "v2")
+    assert cache.get(key, "v2") == "b"
+    assert cache.stats()["invalidations"] == 1
+
+def test_disabled_cache():
+    cache = PredictionCache(max_entries=0)
+    cache.put(cache.key("predict", [1]), "a")
+    assert cache.get(cache.key("predict", [1])) is None
+    assert cache.stats()["misses"] == 0
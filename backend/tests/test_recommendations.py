@@ -0,0 +1,38 @@
+import sys
+import os
+import json
+
+import numpy as np
+import pytest
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from recommendations import CONFIG_ENV, RecommendationEngine
+
+def test_batch_matches_single():
+    engine = RecommendationEngine()
+    probs = np.concatenate([np.random.default_rng(0).uniform(size=1000), [0.0, 0.2, 0.6, 1.0, np.nan]])
+    singles = [engine.get_recommendation(float(p)) for p in probs]
+    batch = engine.get_recommendations(probs)
+    assert [r["risk_segment"] for r in batch] == [r["risk_segment"] for r in singles]
+    assert [r["recommended_actions"] for r in batch] == [r["recommended_actions"] for r in singles]
+
+    codes = engine.segment_codes(probs)
+    assert list(engine.segment_names(codes)) == [r["risk_segment"] for r in singles]
+    assert engine.segment_borrower(0.2) == "Medium Risk" and engine.segment_borrower(0.6) == "High Risk"
+    # Action lists are shared, not rebuilt per call
+    assert singles[0]["recommended_actions"] is engine.actions[singles[0]["risk_segment"]]
+
+def test_thresholds_from_config(tmp_path, monkeypatch):
+    config = {"segments": ["Low", "High"], "thresholds": [0.5], "actions": {"High": ["Call"]}}
+    path = tmp_path / "segments.json"
+    path.write_text(json.dumps(config))
+    monkeypatch.setenv(CONFIG_ENV, str(path))
+
+    engine = RecommendationEngine()
+    assert engine.get_recommendation(0.3) == {"risk_segment": "Low", "recommended_actions": (), "default_probability": 0.3}
+    assert list(engine.primary_actions(engine.segment_codes([0.1, 0.9]))) == [None, "Call"]
+
+    with pytest.raises(ValueError):
+        RecommendationEngine({"segments": ["a", "b", "c"], "thresholds": [0.6, 0.2]})
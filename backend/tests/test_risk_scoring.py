@@ -0,0 +1,54 @@
+import sys
+import os
+import datetime
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from database import Base
+from models import Borrower, Loan, Repayment, LoanFeatures
+from risk_scoring import score_loans
+
+def predict(X):
+    # Deterministic stand-in model: probability rises with delinquency_freq
+    return np.clip(X[:, 2] / 10.0, 0.0, 1.0)
+
+def make_session(tmp_path, num_loans=5):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for i in range(1, num_loans + 1):
+        db.add(Borrower(id=i, full_name=f"B{i}", credit_score=700, annual_income=50000.0))
+        db.add(Loan(id=i, borrower_id=i, amount=10000.0, interest_rate=0.1, loan_status="Current",
+                    issue_date=datetime.datetime(2024, 1, 1)))
+        db.add(LoanFeatures(loan_id=i, repayment_velocity=0.5, credit_utilization_ratio=0.3,
+                            delinquency_freq=i, payment_consistency_score=10.0))
+    db.commit()
+    return db
+
+def test_full_then_incremental_scoring(tmp_path):
+    db = make_session(tmp_path)
+
+    assert score_loans(db, predict, incremental=True) == 5
+    rows = {f.loan_id: f for f in db.query(LoanFeatures)}
+    assert rows[1].default_probability == 0.1 and rows[1].risk_segment == "Low Risk"
+    assert rows[5].risk_segment == "Medium Risk"
+    assert rows[5].recommended_action == "Offer flexible repayment plan"
+
+    # Nothing changed since the last run
+    assert score_loans(db, predict, incremental=True) == 0
+
+    # A feature update and a new repayment each trigger a rescore of one loan
+    rows[2].delinquency_freq = 9
+    db.add(Repayment(loan_id=4, payment_amount=100.0, payment_date=datetime.datetime(2024, 2, 1)))
+    db.commit()
+    assert score_loans(db, predict, incremental=True) == 2
+    db.expire_all()
+    assert db.query(LoanFeatures).filter_by(loan_id=2).one().risk_segment == "High Risk"
+
+    assert score_loans(db, predict, incremental=True) == 0
+    assert score_loans(db, predict, incremental=False) == 5
@@ -0,0 +1,66 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.linear_model import LogisticRegression
+
+# Add app to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../app"))
+
+from scoring import FEATURE_COLUMNS, build_fast_predictor, request_to_vector, rows_to_matrix, score_matrix
+
+def make_training_frame(n=400, seed=7):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    y = (X["repayment_velocity"] - X["delinquency_freq"] + rng.normal(scale=0.5, size=n) < 0).astype(int)
+    return X, y
+
+def test_fast_predictor_matches_logistic_regression():
+    X, y = make_training_frame()
+    model = LogisticRegression(max_iter=1000).fit(X, y)
+    predict = build_fast_predictor(model)
+    np.testing.assert_array_equal(predict(X.to_numpy()), model.predict_proba(X)[:, 1])
+
+def test_fast_predictor_matches_xgboost():
+    X, y = make_training_frame()
+    model = xgb.XGBClassifier(n_estimators=20, max_depth=3, eval_metric="logloss").fit(X, y)
+    predict = build_fast_predictor(model)
+    np.testing.assert_array_equal(predict(X.to_numpy()), model.predict_proba(X)[:, 1])
+
+class Row:
+    def __init__(self, d):
+        self.__dict__.update(d)
+
+def test_single_row_path_matches_dataframe_path():
+    X, y = make_training_frame()
+    for model in (LogisticRegression(max_iter=1000).fit(X, y),
+                  xgb.XGBClassifier(n_estimators=20, max_depth=3, eval_metric="logloss").fit(X, y)):
+        predict = build_fast_predictor(model)
+        for record in X.head(25).to_dict(orient="records"):
+            expected = model.predict_proba(pd.DataFrame([record])[FEATURE_COLUMNS])[0][1]
+            assert predict(request_to_vector(Row(record)))[0] == expected
+
+def test_batch_scores_agree_with_single_rows():
+    X, y = make_training_frame()
+    model = LogisticRegression(max_iter=1000).fit(X, y)
+    predict = build_fast_predictor(model)
+    rows = X.head(25).to_dict(orient="records")
+
+    batch = score_matrix(predict, rows_to_matrix(rows), chunk_size=10)
+    single = [predict(request_to_vector(Row(r)))[0] for r in rows]
+    np.testing.assert_allclose(batch, single, rtol=1e-12)
+
+def test_shared_model_export_roundtrip(tmp_path):
+    from model_artifacts import export_shared_model, load_shared_model
+
+    X, y = make_training_frame()
+    for model in (LogisticRegression(max_iter=1000).fit(X, y),
+                  xgb.XGBClassifier(n_estimators=20, max_depth=3, eval_metric="logloss").fit(X, y)):
+        out_dir = tmp_path / type(model).__name__
+        export_shared_model(model, str(out_dir))
+        shared = load_shared_model(str(out_dir))
+
+        np.testing.assert_allclose(build_fast_predictor(shared)(X.to_numpy()), model.predict_proba(X)[:, 1], rtol=1e-12)
+        np.testing.assert_allclose(shared.predict_proba(X.to_numpy()), model.predict_proba(X), rtol=1e-12)
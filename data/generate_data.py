@@ -1,7 +1,15 @@
+import argparse
 import pandas as pd
 import numpy as np
 import os
 from datetime import datetime, timedelta
+from joblib import Parallel, delayed
+
+LOAN_STATUSES = ["Current", "Fully Paid", "Charged Off", "Late (31-120 days)"]
+STATUS_PROBS = [0.6, 0.25, 0.1, 0.05]
+# Installments per loan are drawn from [MIN_PAYMENTS, MAX_PAYMENTS)
+MIN_PAYMENTS, MAX_PAYMENTS = 5, 20
+DEFAULT_SHARD_SIZE = 250000
 
 def generate_synthetic_data(num_samples=1000, output_dir="data/raw"):
     np.random.seed(42)
@@ -79,5 +87,112 @@ def generate_synthetic_data(num_samples=1000, output_dir="data/raw"):
     repayments.to_csv(os.path.join(output_dir, "repayments.csv"), index=False)
     print(f"Generated {len(repayments)} repayment records.")
 
+def _write_csv(df, output_dir, name):
+    # Written under a hidden temporary name so ingest's *.csv patterns never
+    # pick up a half-written shard
+    path = os.path.join(output_dir, name)
+    tmp_path = os.path.join(output_dir, f".{name}.tmp")
+    df.to_csv(tmp_path, index=False, date_format="%Y-%m-%d")
+    os.replace(tmp_path, path)
+
+def generate_shard(shard, start_id, num_samples, seed, as_of, output_dir):
+    """
+    Writes borrowers_/loans_/repayments_<shard>.csv for ids start_id ..
+    start_id + num_samples - 1. The random stream depends only on (seed, shard),
+    so a shard's content does not depend on which process or in which order it
+    is generated. Returns the number of repayment rows.
+    """
+    rng = np.random.default_rng([seed, shard])
+    ids = np.arange(start_id, start_id + num_samples)
+    suffix = f"{shard:05d}.csv"
+
+    borrowers = pd.DataFrame({
+        "id": ids,
+        "full_name": pd.Series(ids).map("Borrower_{}".format),
+        "credit_score": rng.integers(580, 850, num_samples),
+        "annual_income": rng.lognormal(mean=11, sigma=0.5, size=num_samples),
+        "employment_years": rng.integers(0, 30, num_samples),
+        "home_ownership": rng.choice(["RENT", "OWN", "MORTGAGE"], num_samples, p=[0.4, 0.1, 0.5])
+    })
+    _write_csv(borrowers, output_dir, f"borrowers_{suffix}")
+    del borrowers
+
+    amount = rng.integers(1000, 40000, num_samples)
+    term = rng.choice([36, 60], num_samples)
+    rate = rng.uniform(0.05, 0.25, num_samples)
+    issue_date = np.datetime64(as_of, "D") - rng.integers(100, 1000, num_samples).astype("timedelta64[D]")
+    status_code = rng.choice(len(LOAN_STATUSES), num_samples, p=STATUS_PROBS)
+    r = rate / 12
+    installment = amount * (r * (1 + r) ** term) / ((1 + r) ** term - 1)
+    loans = pd.DataFrame({
+        "id": ids,
+        "borrower_id": ids,
+        "amount": amount,
+        "term_months": term,
+        "interest_rate": rate,
+        "grade": rng.choice(["A", "B", "C", "D", "E"], num_samples),
+        "issue_date": issue_date,
+        "loan_status": np.array(LOAN_STATUSES, dtype=object)[status_code],
+        "installment": installment
+    })
+    _write_csv(loans, output_dir, f"loans_{suffix}")
+    del loans
+
+    # Repayments: one row per installment, built with repeat/cumsum instead of
+    # a Python loop; a masked draw drops the missed installments
+    num_payments = rng.integers(MIN_PAYMENTS, MAX_PAYMENTS, num_samples)
+    loan_idx = np.repeat(np.arange(num_samples), num_payments)
+    first_row = np.cumsum(num_payments) - num_payments
+    installment_no = np.arange(len(loan_idx)) - np.repeat(first_row, num_payments) + 1
+    miss_prob = np.where(status_code >= 2, 0.3, 0.05)  # Charged Off / Late
+    paid = rng.random(len(loan_idx)) >= miss_prob[loan_idx]
+    offsets = 30 * installment_no + rng.integers(-5, 10, len(loan_idx))
+    payment_amount = np.round(installment[loan_idx] * rng.uniform(0.9, 1.1, len(loan_idx)), 2)
+
+    loan_idx, installment_no = loan_idx[paid], installment_no[paid]
+    repayments = pd.DataFrame({
+        # Unique without coordinating shards: each loan owns MAX_PAYMENTS ids
+        "id": ids[loan_idx] * MAX_PAYMENTS + installment_no,
+        "loan_id": ids[loan_idx],
+        "payment_date": issue_date[loan_idx] + offsets[paid].astype("timedelta64[D]"),
+        "payment_amount": payment_amount[paid]
+    })
+    _write_csv(repayments, output_dir, f"repayments_{suffix}")
+    return len(repayments)
+
+def generate_sharded_data(num_samples=1000, output_dir="data/raw", shard_size=DEFAULT_SHARD_SIZE,
+                          n_jobs=-1, seed=42, as_of=None):
+    """
+    Vectorized generator for large datasets: writes one set of
+    borrowers_/loans_/repayments_NNNNN.csv files per shard_size loans, with
+    shards generated in a joblib process pool. Memory is bounded by shard_size
+    per worker. Output is identical for the same (num_samples, shard_size,
+    seed, as_of) whatever n_jobs is; as_of (default: today) anchors the dates.
+    The file names match ingest.py's patterns.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    as_of = str(as_of or datetime.today().date())
+    shards = [(shard, start, min(shard_size, num_samples - start + 1))
+              for shard, start in enumerate(range(1, num_samples + 1, shard_size))]
+    counts = Parallel(n_jobs=n_jobs)(
+        delayed(generate_shard)(shard, start, n, seed, as_of, output_dir) for shard, start, n in shards
+    )
+    print(f"Generated {num_samples} borrowers, {num_samples} loans and {sum(counts)} repayment records "
+          f"in {len(shards)} shards.")
+    return sum(counts)
+
 if __name__ == "__main__":
-    generate_synthetic_data(num_samples=2000, output_dir="CreditPathAI/data/raw")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--output-dir", default="CreditPathAI/data/raw")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Vectorized generator writing seed-partitioned shards (for large datasets)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="Loans per shard with --sharded")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes with --sharded (-1 = all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--as-of", help="With --sharded: reference date (YYYY-MM-DD) for issue/payment dates")
+    args = parser.parse_args()
+    if args.sharded:
+        generate_sharded_data(args.samples, args.output_dir, args.shard_size, args.n_jobs, args.seed, args.as_of)
+    else:
+        generate_synthetic_data(num_samples=args.samples, output_dir=args.output_dir)